@@ -9,21 +9,23 @@ YouTube 字幕翻译工具 - Streamlit Web 应用
 import streamlit as st
 import os
 import sys
-import tempfile
 import time
 
 # 添加项目路径到系统路径
 sys.path.insert(0, os.path.dirname(__file__))
 
-# 从 Streamlit Secrets 加载环境变量
+# 从 Streamlit Secrets 读取 YouTube Cookies（用于 yt-dlp 字幕提取），随配置传给流水线，不写入环境变量
+YT_COOKIES = None
 if hasattr(st, 'secrets'):
-    # 加载 YouTube Cookies（用于 yt-dlp 字幕提取）
-    if 'YT_COOKIES' in st.secrets:
-        os.environ['YT_COOKIES'] = st.secrets['YT_COOKIES']
+    try:
+        YT_COOKIES = st.secrets.get('YT_COOKIES')
+    except Exception:  # 未配置 secrets.toml
+        YT_COOKIES = None
 
-from yt_translator.extractor import extract_transcript_with_fallback, parse_video_id
-from yt_translator.translator import SubtitleTranslator
-from yt_translator.html_report import HtmlReportGenerator
+from yt_translator.extractor import parse_video_id
+from yt_translator.config import PipelineConfig
+from yt_translator.jobs import get_job_manager
+from yt_translator.pipeline import cached_report
 from file_share import create_shareable_link
 
 
@@ -126,7 +128,8 @@ def sidebar_config():
             "批处理大小",
             min_value=1,
             max_value=200,
-            value=100
+            value=100,
+            help="Google 逐行模式每批的行数；DeepSeek 按 token 预算自动分批，不受此项限制"
         )
         
         max_retries = st.number_input(
@@ -143,6 +146,18 @@ def sidebar_config():
             value=4
         )
         
+        youtube_translation = st.checkbox(
+            "优先使用 YouTube 自带翻译字幕",
+            value=True,
+            help="视频支持翻译到目标语言时，逐行字幕直接取自 YouTube，跳过大模型分段翻译；总结仍由所选服务生成"
+        )
+        
+        refresh_report = st.checkbox(
+            "忽略报告缓存，重新处理",
+            value=False,
+            help="默认直接返回相同视频与配置已生成过的报告；勾选后重新提取、翻译并覆盖缓存"
+        )
+        
         yt_browser = st.selectbox(
             "浏览器 Cookie",
             ["不使用", "chrome", "firefox", "safari", "edge"],
@@ -168,6 +183,8 @@ def sidebar_config():
         "batch_size": batch_size,
         "max_retries": max_retries,
         "concurrent_workers": concurrent_workers,
+        "youtube_translation": youtube_translation,
+        "refresh_report": refresh_report,
         "yt_browser": None if yt_browser == "不使用" else yt_browser
     }
 
@@ -187,296 +204,124 @@ def validate_config(config):
     return errors
 
 
-def process_video(config, progress_container=None):
-    """处理视频翻译"""
-    # 设置环境变量
-    if config["provider"] == "deepseek":
-        os.environ["DEEPSEEK_API_KEY"] = config["deepseek_api_key"]
-        os.environ["DEEPSEEK_BASE_URL"] = config["deepseek_base_url"]
-        os.environ["DEEPSEEK_MODEL"] = config["deepseek_model"]
-        os.environ["DEEPSEEK_TEMPERATURE"] = str(config["deepseek_temperature"])
+def _spinner_html(message):
+    """进行中状态的转圈提示"""
+    return f"""
+    <div style="display: flex; align-items: center; padding: 12px;">
+        <div style="
+            width: 16px;
+            height: 16px;
+            border: 2px solid #999;
+            border-top-color: transparent;
+            border-radius: 50%;
+            animation: spin 0.8s linear infinite;
+            margin-right: 8px;
+        "></div>
+        <span style="color: #666;">{message}</span>
+    </div>
+    <style>
+        @keyframes spin {{
+            to {{ transform: rotate(360deg); }}
+        }}
+    </style>
+    """
+
+
+def build_pipeline_config(config):
+    """侧边栏配置转为单次请求的 PipelineConfig；未填写的项取环境变量默认值"""
+    return PipelineConfig.from_env(yt_cookies=YT_COOKIES, **config)
+
+
+def process_video(config):
+    """提交视频处理任务到后台线程池，立即返回任务 ID；相同视频与配置的进行中任务会被复用"""
+    job = get_job_manager().submit(build_pipeline_config(config))
+    if job.subscribers > 1:
+        st.toast("相同视频正在处理中，已加入该任务，完成后共享结果")
+    return job.id
+
+
+def render_job_progress(job):
+    """显示单个任务的进度条与最新状态"""
+    snap = job.snapshot()
+    st.progress(snap['percent'])
+    if snap['level'] == 'success':
+        st.success(f"✅ {snap['message']}")
+    elif snap['level'] == 'warning':
+        st.warning(f"⚠️ {snap['message']}")
+    else:
+        st.markdown(_spinner_html(snap['message']), unsafe_allow_html=True)
+
+
+def add_to_history(result, max_history):
+    """把处理结果加入历史记录"""
+    # 格式化处理时长
+    processing_time = result['stats'].get('processing_time', 0)
+    if processing_time < 60:
+        time_str = f"{processing_time:.1f}秒"
+    else:
+        minutes = int(processing_time // 60)
+        seconds = int(processing_time % 60)
+        time_str = f"{minutes}分{seconds}秒"
     
-    if config["yt_browser"]:
-        os.environ["YT_DLP_BROWSER"] = config["yt_browser"]
+    # 获取原文总字符数
+    total_chars = result['stats'].get('full_text_length', 0)
     
-    # 解析视频 ID
-    video_id = parse_video_id(config["url"])
+    history_item = {
+        'index': len(st.session_state.history),
+        'video_id': result['video_id'],
+        'title': result['title'],  # 使用原始标题
+        'title_cn': result['title_cn'],  # 保留翻译标题备用
+        'processing_time': time_str,
+        'total_length': f"{total_chars}字",  # 总长度（原文字符数）
+        'html_content': result['html_content'],  # 存储HTML内容
+        'timestamp': time.time(),
+        'preview_url': None,  # 初始为空，点击预览后才生成
+        'gist_id': None  # 初始为空，点击预览后才生成
+    }
+    st.session_state.history.insert(0, history_item)
     
-    # 使用临时目录，会话结束后自动删除
-    with tempfile.TemporaryDirectory() as tmpdir:
-        video_outdir = tmpdir
-        
-        # 记录开始时间
-        start_time = time.time()
-        
-        # 创建进度显示 - 使用原生组件
-        if progress_container:
-            # 清空容器并创建进度元素
-            with progress_container.container():
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-        else:
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-        
-        # 步骤 1: 提取字幕
-        status_text.markdown("""
-        <div style="display: flex; align-items: center; padding: 12px;">
-            <div style="
-                width: 16px;
-                height: 16px;
-                border: 2px solid #999;
-                border-top-color: transparent;
-                border-radius: 50%;
-                animation: spin 0.8s linear infinite;
-                margin-right: 8px;
-            "></div>
-            <span style="color: #666;">正在连接 YouTube...</span>
-        </div>
-        <style>
-            @keyframes spin {
-                to { transform: rotate(360deg); }
-            }
-        </style>
-        """, unsafe_allow_html=True)
-        progress_bar.progress(10)
-        
-        try:
-            transcript_items, detected_lang, title, source_name, chapters = extract_transcript_with_fallback(
-                config["url"],
-                preferred_langs=config["source_langs"],
-                workdir=video_outdir
-            )
-        except Exception as e:
-            error_msg = str(e)
-            if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-                st.error(f"❌ 提取字幕超时（视频可能过长）。错误信息：{error_msg}")
-            else:
-                st.error(f"❌ 提取字幕失败：{error_msg}")
-            st.info("💡 提示：对于超长视频（>20分钟），可能需要更长时间。请稍后重试或尝试较短视频。")
-            return None
-        
-        if not transcript_items:
-            st.error("❌ 未能获取到任何字幕，请检查视频是否有字幕。")
-            st.info("💡 可能的原因：\n1. 视频确实没有字幕\n2. 视频过长导致超时（Streamlit Cloud 限制）\n3. Cookie 已过期，需要重新配置")
-            return None
-        
-        status_text.success(f"✅ 提取字幕完成！检测到语言：{detected_lang}")
-        progress_bar.progress(30)
-        
-        # 步骤 2: 翻译字幕
-        status_text.markdown(f"""
-        <div style="display: flex; align-items: center; padding: 12px;">
-            <div style="
-                width: 16px;
-                height: 16px;
-                border: 2px solid #999;
-                border-top-color: transparent;
-                border-radius: 50%;
-                animation: spin 0.8s linear infinite;
-                margin-right: 8px;
-            "></div>
-            <span style="color: #666;">正在使用 {config['provider'].upper()} 翻译字幕...</span>
-        </div>
-        <style>
-            @keyframes spin {{
-                to {{ transform: rotate(360deg); }}
-            }}
-        </style>
-        """, unsafe_allow_html=True)
-        progress_bar.progress(40)
-        
-        translator = SubtitleTranslator(
-            target_language=config["target_lang"],
-            provider=config["provider"],
-            batch_size=config["batch_size"],
-            max_retries=config["max_retries"],
-            concurrent_workers=config["concurrent_workers"]
-        )
-        
-        items_en = [{
-            'start': it['start'],
-            'duration': it['duration'],
-            'text': it['text'],
-            'translated_text': ''
-        } for it in transcript_items]
-        
-        progress_bar.progress(50)
-        
-        # 翻译全文并分段
-        full_text = "\n".join([it.get('text', '').strip() for it in transcript_items if it.get('text')])
-        cn_paragraphs = translator.translate_full_and_split(full_text)
-        
-        status_text.success(f"✅ 翻译完成！生成了 {len(cn_paragraphs)} 个段落")
-        progress_bar.progress(70)
-        
-        # 生成总结
-        status_text.markdown("""
-        <div style="display: flex; align-items: center; padding: 12px;">
-            <div style="
-                width: 16px;
-                height: 16px;
-                border: 2px solid #999;
-                border-top-color: transparent;
-                border-radius: 50%;
-                animation: spin 0.8s linear infinite;
-                margin-right: 8px;
-            "></div>
-            <span style="color: #666;">正在生成内容总结...</span>
-        </div>
-        <style>
-            @keyframes spin {
-                to { transform: rotate(360deg); }
-            }
-        </style>
-        """, unsafe_allow_html=True)
-        summary = translator.generate_summary(full_text)
-        
-        progress_bar.progress(80)
-        
-        # 翻译标题
-        status_text.markdown("""
-        <div style="display: flex; align-items: center; padding: 12px;">
-            <div style="
-                width: 16px;
-                height: 16px;
-                border: 2px solid #999;
-                border-top-color: transparent;
-                border-radius: 50%;
-                animation: spin 0.8s linear infinite;
-                margin-right: 8px;
-            "></div>
-            <span style="color: #666;">正在翻译视频标题...</span>
-        </div>
-        <style>
-            @keyframes spin {
-                to { transform: rotate(360deg); }
-            }
-        </style>
-        """, unsafe_allow_html=True)
-        title_cn = translator.translate_title(title or '')
-        
-        # 翻译章节
-        if chapters:
-            status_text.markdown("""
-            <div style="display: flex; align-items: center; padding: 12px;">
-                <div style="
-                    width: 16px;
-                    height: 16px;
-                    border: 2px solid #999;
-                    border-top-color: transparent;
-                    border-radius: 50%;
-                    animation: spin 0.8s linear infinite;
-                    margin-right: 8px;
-                "></div>
-                <span style="color: #666;">正在翻译章节标题...</span>
-            </div>
-            <style>
-                @keyframes spin {
-                    to { transform: rotate(360deg); }
-                }
-            </style>
-            """, unsafe_allow_html=True)
-            chapters = translator.translate_chapters(chapters)
-        
-        progress_bar.progress(85)
-        
-        # 分配时间轴
-        if transcript_items:
-            total_start = float(transcript_items[0]['start'])
-            total_end = float(transcript_items[-1]['start']) + float(transcript_items[-1]['duration'])
-        else:
-            total_start = 0.0
-            total_end = 0.0
-        
-        total_duration = max(0.0, total_end - total_start)
-        total_chars = sum(max(1, len(p)) for p in cn_paragraphs) or 1
-        min_seg = 1.8
-        
-        items_cn = []
-        acc = total_start
-        for i, p in enumerate(cn_paragraphs):
-            frac = max(1, len(p)) / total_chars
-            seg = total_duration * frac if total_duration > 0 else min_seg
-            seg = max(seg, min_seg)
-            end = acc + seg
-            if i == len(cn_paragraphs) - 1:
-                end = total_end or (acc + seg)
-            items_cn.append({
-                'start': round(acc, 3),
-                'duration': round(max(0.1, end - acc), 3),
-                'text': '',
-                'translated_text': p
-            })
-            acc = end
-        
-        progress_bar.progress(90)
-        
-        # 步骤 3: 生成 HTML 报告
-        status_text.markdown("""
-        <div style="display: flex; align-items: center; padding: 12px;">
-            <div style="
-                width: 16px;
-                height: 16px;
-                border: 2px solid #999;
-                border-top-color: transparent;
-                border-radius: 50%;
-                animation: spin 0.8s linear infinite;
-                margin-right: 8px;
-            "></div>
-            <span style="color: #666;">正在生成 HTML 报告...</span>
-        </div>
-        <style>
-            @keyframes spin {
-                to { transform: rotate(360deg); }
-            }
-        </style>
-        """, unsafe_allow_html=True)
-        
-        html_generator = HtmlReportGenerator()
-        html_path = os.path.join(video_outdir, 'report.html')
-        
-        html_generator.generate(
-            output_path=html_path,
-            video_id=video_id,
-            title=title,
-            title_cn=title_cn,
-            items_en=items_en,
-            items_cn=items_cn,
-            chapters=chapters,
-            summary=summary,
-            source_language=detected_lang,
-            target_language=config["target_lang"]
-        )
-        
-        status_text.success("✅ 处理完成！")
-        progress_bar.progress(100)
-        
-        # 计算处理时长
-        end_time = time.time()
-        processing_time = end_time - start_time
-        
-        # 读取生成的 HTML
-        with open(html_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        return {
-            'video_id': video_id,
-            'title': title,
-            'title_cn': title_cn,
-            'html_content': html_content,  # 返回 HTML 内容
-            'summary': summary,
-            'full_text': full_text,  # 返回原文全文
-            'stats': {
-                'source_language': detected_lang,
-                'target_language': config["target_lang"],
-                'subtitle_count': len(transcript_items),
-                'paragraph_count': len(cn_paragraphs),
-                'source': source_name,
-                'processing_time': processing_time,
-                'full_text_length': len(full_text)  # 原文字符数
-            }
-        }
+    # 更新索引
+    for i, item in enumerate(st.session_state.history):
+        item['index'] = i
+    
+    # 只保留最近的记录
+    if len(st.session_state.history) > max_history:
+        st.session_state.history = st.session_state.history[:max_history]
+
+
+def poll_jobs(progress_container, max_history, interval=0.5):
+    """
+    轮询本会话的后台任务，直到全部结束。
+    页面重跑会中断这里的轮询，但不会中断任务；下一次运行会从会话状态中的任务 ID 继续轮询，
+    已结束任务的结果在那时写入历史记录。
+    """
+    manager = get_job_manager()
+    active = st.session_state.active_jobs
+    while active:
+        finished = []
+        with progress_container.container():
+            for job_id in list(active):
+                job = manager.get(job_id)
+                if job is None:
+                    # 任务已被清理（例如服务重启），放弃跟踪
+                    active.remove(job_id)
+                elif job.finished:
+                    finished.append(job)
+                else:
+                    render_job_progress(job)
+        if finished:
+            for job in finished:
+                active.remove(job.id)
+                if job.result is not None:
+                    st.session_state.processing_count += 1
+                    add_to_history(job.result, max_history)
+                    st.session_state.job_messages.append(('success', "✅ 处理完成！", '', None))
+                else:
+                    st.session_state.job_messages.append(('error', f"❌ 处理失败：{job.error}", job.hint, job.exception))
+            progress_container.empty()
+            st.rerun()
+        time.sleep(interval)
+    progress_container.empty()
 
 
 def main():
@@ -497,6 +342,10 @@ def main():
         st.session_state.session_start_time = time.time()
     if 'processing_count' not in st.session_state:
         st.session_state.processing_count = 0
+    if 'active_jobs' not in st.session_state:
+        st.session_state.active_jobs = []   # 本会话未结束的后台任务 ID
+    if 'job_messages' not in st.session_state:
+        st.session_state.job_messages = []  # 已结束任务的提示，显示一次后清除
     
     # 配置限制参数（统一为10，保持逻辑一致）
     MAX_HISTORY = 10                    # 历史记录最多保留 10 个
@@ -529,6 +378,18 @@ def main():
     # 创建固定的进度显示区域
     progress_container = st.empty()
     
+    # 显示上一轮结束的任务结果
+    for level, message, hint, exc in st.session_state.job_messages:
+        if level == 'success':
+            st.success(message)
+        else:
+            st.error(message)
+            if hint:
+                st.info(f"💡 提示：{hint}")
+            elif exc is not None:
+                st.exception(exc)
+    st.session_state.job_messages = []
+    
     # 显示历史记录
     if st.session_state.history:
         # 注入CSS来缩小列间距
@@ -693,7 +554,7 @@ def main():
         
         if session_age_hours > SESSION_TIMEOUT_HOURS:
             st.warning(f"⏰ 会话已超时（{SESSION_TIMEOUT_HOURS}小时），请刷新页面重新开始")
-        elif st.session_state.processing_count >= MAX_PROCESSING_PER_SESSION:
+        elif st.session_state.processing_count + len(st.session_state.active_jobs) >= MAX_PROCESSING_PER_SESSION:
             st.error(f"🚫 已达到单个会话处理上限（{MAX_PROCESSING_PER_SESSION} 个视频）")
             st.info("💡 **原因**: 为了保护服务器资源，限制单次会话处理数量")
             st.info("🔄 **解决方法**: 请刷新页面开始新的会话，或下载已处理的内容")
@@ -703,59 +564,18 @@ def main():
                 for error in errors:
                     st.error(error)
             else:
-                try:
-                    result = process_video(config, progress_container)
-                    
-                    # 清空进度显示
-                    progress_container.empty()
-                    
-                    if result:
-                        # 增加处理计数
-                        st.session_state.processing_count += 1
-                        
-                        # 格式化处理时长
-                        processing_time = result['stats'].get('processing_time', 0)
-                        if processing_time < 60:
-                            time_str = f"{processing_time:.1f}秒"
-                        else:
-                            minutes = int(processing_time // 60)
-                            seconds = int(processing_time % 60)
-                            time_str = f"{minutes}分{seconds}秒"
-                        
-                        # 获取原文总字符数
-                        total_chars = result['stats'].get('full_text_length', 0)
-                        
-                        # 添加到历史记录
-                        history_item = {
-                            'index': len(st.session_state.history),
-                            'video_id': result['video_id'],
-                            'title': result['title'],  # 使用原始标题
-                            'title_cn': result['title_cn'],  # 保留翻译标题备用
-                            'processing_time': time_str,
-                            'total_length': f"{total_chars}字",  # 总长度（原文字符数）
-                            'html_content': result['html_content'],  # 存储HTML内容
-                            'timestamp': time.time(),
-                            'preview_url': None,  # 初始为空，点击预览后才生成
-                            'gist_id': None  # 初始为空，点击预览后才生成
-                        }
-                        st.session_state.history.insert(0, history_item)
-                        
-                        # 更新索引
-                        for i, item in enumerate(st.session_state.history):
-                            item['index'] = i
-                        
-                        # 只保留最近的记录
-                        if len(st.session_state.history) > MAX_HISTORY:
-                            st.session_state.history = st.session_state.history[:MAX_HISTORY]
-                        
-                        st.success("✅ 处理完成！")
-                        st.rerun()
-                        
-                except Exception as e:
-                    # 清空进度显示
-                    progress_container.empty()
-                    st.error(f"❌ 处理失败：{str(e)}")
-                    st.exception(e)
+                cached = None if config["refresh_report"] else cached_report(build_pipeline_config(config))
+                if cached is not None:
+                    # 命中成品缓存：不提交任务，直接写入历史记录
+                    add_to_history(cached, MAX_HISTORY)
+                    st.session_state.job_messages.append(('success', "✅ 已有相同配置的报告，直接使用缓存", '', None))
+                    st.rerun()
+                job_id = process_video(config)
+                if job_id not in st.session_state.active_jobs:
+                    st.session_state.active_jobs.append(job_id)
+    
+    # 轮询后台任务：页面重跑不会中断任务，结束后写入历史记录
+    poll_jobs(progress_container, MAX_HISTORY)
 
 
 if __name__ == "__main__":
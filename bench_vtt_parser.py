@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+VTT 解析基准脚本
+对比旧解析器（整文件读入 + splitlines + 多个正则）、流式解析器（逐行 + 单个正则）
+与生产路径 _read_vtt_cues（流式解析 + 滚动字幕去重）的峰值内存与解析速度。
+三者都产出完整的字幕列表，数字可以直接比较。用法：python bench_vtt_parser.py [小时数]
+"""
+
+import os
+import re
+import sys
+import time
+import tempfile
+import tracemalloc
+
+from yt_translator.extractor import iter_vtt_cues, _read_vtt_cues, _vtt_time_to_seconds
+
+
+# 旧版实现的副本，仅用于对比
+_RE_TAG_C = re.compile(r"</?c[^>]*>")
+_RE_TAG_V = re.compile(r"<v[^>]*>")
+_RE_TIME_INLINE = re.compile(r"<\d{2}:\d{2}:\d{2}\.\d{3}>")
+_RE_ITALIC = re.compile(r"</?i>")
+_RE_BOLD = re.compile(r"</?b>")
+_RE_SPACES = re.compile(r"\s{2,}")
+
+
+def legacy_clean(text):
+    t = text
+    t = _RE_TAG_C.sub('', t)
+    t = _RE_TAG_V.sub('', t)
+    t = _RE_TIME_INLINE.sub('', t)
+    t = _RE_ITALIC.sub('', t)
+    t = _RE_BOLD.sub('', t)
+    t = t.replace('\u200e', '').replace('\u200f', '').replace('\ufeff', '')
+    return _RE_SPACES.sub(' ', t).strip()
+
+
+def legacy_parse(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        vtt_text = f.read()
+    items = []
+    lines = vtt_text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if '-->' in line:
+            try:
+                start_s, end_s = [p.strip().split(' ')[0] for p in line.split('-->')]
+                start = _vtt_time_to_seconds(start_s)
+                end = _vtt_time_to_seconds(end_s)
+                text_lines = []
+                i += 1
+                while i < len(lines) and lines[i].strip():
+                    text_lines.append(lines[i].strip())
+                    i += 1
+                items.append({
+                    'start': round(start, 3),
+                    'duration': round(end - start, 3),
+                    'text': legacy_clean(' '.join(text_lines)),
+                })
+            except Exception:
+                i += 1
+                continue
+        i += 1
+    return items
+
+
+def streaming_parse(path):
+    """流式解析并收集为列表，与旧解析器的输出对等。"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(iter_vtt_cues(f))
+
+
+def production_parse(path):
+    """
+    提取器实际使用的路径：流式解析 → 滚动字幕去重 → Transcript 的生成器链。
+    合成字幕模拟自动字幕，因此包含去重。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        transcript, _ = _read_vtt_cues(f, automatic=True)
+    return transcript
+
+
+def _ts(seconds):
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{int(h):02d}:{int(m):02d}:{s:06.3f}"
+
+
+def write_synthetic_vtt(path, hours):
+    """生成类似 YouTube 自动字幕（带 <c> 与行内时间标签）的 VTT 文件。"""
+    words = ['so', 'today', 'we', 'are', 'going', 'to', 'talk', 'about', 'streaming', 'parsers']
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('WEBVTT\nKind: captions\nLanguage: en\n\n')
+        t = 0.0
+        n = 0
+        while t < hours * 3600:
+            end = t + 2.0
+            inline = ''.join(f"<{_ts(t + k * 0.2)}><c> {w}</c>" for k, w in enumerate(words[n % 5:n % 5 + 5]))
+            f.write(f"{_ts(t)} --> {_ts(end)} align:start position:0%\n")
+            f.write(f"{words[n % 10]} previous line\n{words[(n + 1) % 10]}{inline}\n\n")
+            t = end
+            n += 1
+
+
+def measure(fn, path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(result), elapsed, peak
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'bench.en.vtt')
+        write_synthetic_vtt(path, hours)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"📄 合成字幕：{hours:g} 小时，{size_mb:.1f} MB")
+        for name, fn in (('旧解析器', legacy_parse), ('流式解析器', streaming_parse), ('_read_vtt_cues', production_parse)):
+            count, elapsed, peak = measure(fn, path)
+            print(f"   • {name}: {count} 条，{elapsed:.2f}s，{count / elapsed:,.0f} 条/秒，峰值内存 {peak / 1024 / 1024:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
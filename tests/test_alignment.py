@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"""段落时间轴对齐与锚点。"""
+
+from yt_translator.alignment import _RE_ANCHOR, align_paragraphs
+
+
+CUES = [{'start': i * 2.0, 'duration': 2.0, 'text': t} for i, t in enumerate([
+    'word0 is the intro', 'we talk about things', 'more things here', 'and more stuff',
+    'closing the first part', 'second part begins', 'it keeps going', 'almost done now',
+    'final words', 'the end',
+])]
+
+
+def test_anchor_pattern_skips_digits_inside_tokens():
+    found = _RE_ANCHOR.findall('word0 v2 3 2021 1,000 在2021年 iPhone Google 3.14 x86')
+    assert found == ['2021', '1,000', '2021', 'Google', '3.14']
+
+
+def test_digit_inside_word_does_not_pin_paragraph():
+    paragraphs = ['第一部分讲了很多内容，介绍各种事情', '第二部分 word0 开始继续讲', '最后结束了']
+    out = align_paragraphs(CUES, paragraphs)
+    starts = [p['start'] for p in out]
+    assert starts[0] == 0.0
+    assert starts == sorted(set(starts))
+    assert all(p['duration'] > 1.8 for p in out)
+
+
+def test_anchor_moves_boundary_to_matching_cue():
+    cues = [{'start': i * 2.0, 'duration': 2.0, 'text': t} for i, t in enumerate([
+        'a long introduction about many things', 'that goes on for a while', 'and then',
+        'Google announced it', 'in 2021 with details',
+    ])]
+    out = align_paragraphs(cues, ['很长的介绍，讲了许多事情，持续了一段时间，然后', 'Google 在 2021 年宣布了细节'])
+    assert out[1]['start'] == 6.0
+
+
+def test_no_paragraphs():
+    assert align_paragraphs(CUES, []) == []
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+"""按 token 预算打包批次与章节断点。"""
+
+from yt_translator.batching import chapter_break_offsets, pack_batches
+from yt_translator.transcript import Transcript
+
+
+def test_pack_batches_keeps_order_and_budget():
+    texts = ['word ' * 50] * 10
+    batches = pack_batches(texts, max_input_tokens=200, max_output_tokens=10000)
+    assert [t for b in batches for t in b.texts] == texts
+    assert len(batches) > 1
+    assert all(b.input_tokens <= 200 or len(b.texts) == 1 for b in batches)
+
+
+def test_chapter_offsets_match_for_list_and_transcript_with_blank_cues():
+    items = [{'start': i * 2.0, 'duration': 2.0, 'text': t} for i, t in enumerate([
+        'Hello there.', '  ', 'this is part one.', ' ', 'now part two starts.', 'more.', '\n', 'part three.',
+    ])]
+    chapters = [{'start_time': 0}, {'start_time': 7.0}, {'start_time': 13.0}]
+    transcript = Transcript.from_items(items)
+    offsets = chapter_break_offsets(items, chapters)
+    assert offsets == chapter_break_offsets(transcript, chapters)
+    assert [transcript.full_text[o:].split('\n')[0] for o in offsets] == ['now part two starts.', 'part three.']
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+"""TranscriptCache 的语言选择与命中计数。"""
+
+from yt_translator.cache import TranscriptCache
+
+DEFAULT_PREFS = ['en', 'en-US', 'en-GB', 'auto']
+
+
+def _items(text):
+    return [{'start': 0.0, 'duration': 1.0, 'text': text}]
+
+
+def _cache(tmp_path):
+    return TranscriptCache(str(tmp_path / 'transcripts.sqlite3'))
+
+
+def test_language_outside_preferences_is_a_miss(tmp_path):
+    cache = _cache(tmp_path)
+    cache.store('vid', _items('hi'), 'en', 'T', 'api', [], ['en'])
+    assert cache.lookup('vid', ['ja']) is None
+    assert cache.lookup('vid', ['de', 'fr']) is None
+    assert cache.stats()['misses'] == 2
+
+
+def test_first_preference_hits_regardless_of_stored_preferences(tmp_path):
+    cache = _cache(tmp_path)
+    cache.store('vid', _items('hi'), 'en', 'T', 'api', [], ['de', 'en'])
+    hit = cache.lookup('vid', DEFAULT_PREFS)
+    assert hit is not None and hit[1] == 'en'
+    assert cache.stats()['hits'] == 1
+
+
+def test_wildcard_needs_same_preferences(tmp_path):
+    cache = _cache(tmp_path)
+    cache.store('vid', _items('hallo'), 'de', 'T', 'api', [], ['de'])
+    # 默认优先英文：缓存无法证明该视频没有英文字幕
+    assert cache.lookup('vid', DEFAULT_PREFS) is None
+    cache.store('vid', _items('hallo'), 'de', 'T', 'api', [], DEFAULT_PREFS)
+    hit = cache.lookup('vid', DEFAULT_PREFS)
+    assert hit is not None and hit[1] == 'de'
+
+
+def test_lower_preference_needs_same_preferences(tmp_path):
+    cache = _cache(tmp_path)
+    cache.store('vid', _items('hallo'), 'de', 'T', 'api', [], ['de'])
+    assert cache.lookup('vid', ['en', 'de']) is None
+    assert cache.lookup('vid', ['de', 'en'])[1] == 'de'
+
+
+def test_preferences_are_normalized(tmp_path):
+    cache = _cache(tmp_path)
+    cache.store('vid', _items('hallo'), 'de', 'T', 'api', [], ['EN', ' auto '])
+    assert cache.lookup('vid', ['en', 'auto', 'en'])[1] == 'de'
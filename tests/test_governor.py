@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""调控器：错误分类、重试、不可重试错误、限流与熔断。"""
+
+import asyncio
+import uuid
+
+import pytest
+
+from yt_translator.governor import AIMDController, ProviderGovernor, classify_error
+from yt_translator.health import CircuitOpenError
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f'HTTP {status_code}')
+        self.status_code = status_code
+        self.response = type('Response', (), {'status_code': status_code, 'headers': headers or {}})()
+
+
+def _governor():
+    return ProviderGovernor(f'test-{uuid.uuid4().hex}', initial_limit=8)
+
+
+def _flaky(failures):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(failures):
+            raise failures[len(calls) - 1]
+        return 'ok'
+    return fn, calls
+
+
+def test_classify_error():
+    assert classify_error(FakeHTTPError(429, {'retry-after': '3'})).retry_after == 3.0
+    assert classify_error(FakeHTTPError(429)).throttled
+    assert not classify_error(FakeHTTPError(401)).retryable
+    assert classify_error(FakeHTTPError(503)).retryable
+    assert classify_error(TimeoutError()).retryable
+
+
+def test_retryable_errors_are_retried():
+    governor = _governor()
+    fn, calls = _flaky([FakeHTTPError(503), FakeHTTPError(502)])
+    assert governor.call(fn, max_retries=3, base_delay=0) == 'ok'
+    assert len(calls) == 3
+    assert governor.retries == 2
+    assert governor.in_flight == 0
+
+
+def test_fatal_error_is_not_retried():
+    governor = _governor()
+    fn, calls = _flaky([FakeHTTPError(401)])
+    with pytest.raises(FakeHTTPError):
+        governor.call(fn, max_retries=3, base_delay=0)
+    assert len(calls) == 1
+    assert governor.fatal_errors == 1
+    assert governor.in_flight == 0
+
+
+def test_retries_exhausted_raises_last_error():
+    governor = _governor()
+    fn, calls = _flaky([FakeHTTPError(503)] * 5)
+    with pytest.raises(FakeHTTPError):
+        governor.call(fn, max_retries=1, base_delay=0)
+    assert len(calls) == 2
+
+
+def test_throttle_halves_limit():
+    governor = _governor()
+    fn, _ = _flaky([FakeHTTPError(429, {'retry-after-ms': '0'})])
+    assert governor.call(fn, max_retries=1, base_delay=0) == 'ok'
+    assert governor.controller.throttled == 1
+    assert governor.controller.current == 4
+
+
+def test_open_circuit_rejects_calls():
+    governor = _governor()
+    for _ in range(governor.breaker.failure_threshold):
+        governor.breaker.record_failure()
+    fn, calls = _flaky([])
+    with pytest.raises(CircuitOpenError):
+        governor.call(fn)
+    assert calls == []
+
+
+def test_acall_retries():
+    governor = _governor()
+    attempts = []
+
+    async def fn():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise FakeHTTPError(500)
+        return 'ok'
+
+    assert asyncio.run(governor.acall(fn, max_retries=2, base_delay=0)) == 'ok'
+    assert len(attempts) == 2
+
+
+def test_latency_baseline_is_per_kind():
+    controller = AIMDController(initial=8)
+    for _ in range(30):
+        controller.on_success(1.0, 'lines')
+    limit = controller.limit
+    for _ in range(5):
+        controller.on_success(120.0, 'paragraphs')
+    assert controller.limit > limit
+    assert controller.baseline_latency == {'lines': 1.0, 'paragraphs': 120.0}
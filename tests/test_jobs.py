@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""后台任务：状态、失败提示与单飞合并。"""
+
+import threading
+
+from yt_translator.jobs import DONE, FAILED, JobManager
+from yt_translator.pipeline import PipelineError
+
+URL = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+
+
+class BlockingRunner:
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, config, on_progress=None):
+        self.calls.append(config)
+        on_progress(50, '处理中')
+        self.release.wait(5)
+        return {'video_id': 'dQw4w9WgXcQ', 'source_langs': config.source_langs}
+
+
+def test_identical_requests_share_one_run():
+    runner = BlockingRunner()
+    manager = JobManager(max_workers=2, runner=runner)
+    jobs = [manager.submit({'url': URL, 'source_langs': ['en']}) for _ in range(3)]
+    assert jobs[0] is jobs[1] is jobs[2]
+    runner.release.set()
+    assert jobs[0].wait(5)
+    assert jobs[0].state == DONE
+    assert len(runner.calls) == 1
+    assert jobs[0].subscribers == 3
+    assert manager.stats()['coalesced'] == 2
+
+
+def test_different_source_langs_are_not_coalesced():
+    runner = BlockingRunner()
+    manager = JobManager(max_workers=2, runner=runner)
+    a = manager.submit({'url': URL, 'source_langs': ['en']})
+    b = manager.submit({'url': URL, 'source_langs': ['de', 'en']})
+    assert a is not b
+    runner.release.set()
+    assert a.wait(5) and b.wait(5)
+    assert b.result['source_langs'] == ['de', 'en']
+
+
+def test_finished_job_is_not_joined():
+    runner = BlockingRunner()
+    runner.release.set()
+    manager = JobManager(runner=runner)
+    first = manager.submit({'url': URL})
+    assert first.wait(5)
+    second = manager.submit({'url': URL})
+    assert second.wait(5)
+    assert first is not second and len(runner.calls) == 2
+
+
+def test_failure_keeps_error_and_hint():
+    def runner(config, on_progress=None):
+        raise PipelineError('提取失败', '请稍后重试')
+
+    job = JobManager(runner=runner).submit({'url': URL})
+    assert job.wait(5)
+    assert job.state == FAILED
+    assert job.error == '提取失败' and job.hint == '请稍后重试'
+
+
+def test_progress_events_are_recorded():
+    runner = BlockingRunner()
+    runner.release.set()
+    job = JobManager(runner=runner).submit({'url': URL})
+    assert job.wait(5)
+    assert [e.message for e in job.events_since(0)] == ['处理中']
+    assert job.percent == 100
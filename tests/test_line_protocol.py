@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""编号行协议：解析、定位需重发的行与修复轮次。"""
+
+from yt_translator.config import PipelineConfig
+from yt_translator.line_protocol import format_numbered, parse_numbered
+from yt_translator.translator import SubtitleTranslator
+
+
+def test_format_numbered_keeps_one_line_per_id():
+    assert format_numbered([1, 2], ['a\nb', 'c']) == '[1] a b\n[2] c'
+
+
+def test_parse_complete_reply():
+    found, retry = parse_numbered('[1] 甲\n[2] 乙\n[3] 丙', [1, 2, 3])
+    assert found == {1: '甲', 2: '乙', 3: '丙'}
+    assert retry == []
+
+
+def test_missing_line_also_retries_previous():
+    # 第 2 行被合并进第 1 行：两行都要重发
+    found, retry = parse_numbered('[1] 甲乙\n[3] 丙', [1, 2, 3])
+    assert found == {3: '丙'}
+    assert retry == [1, 2]
+
+
+def test_duplicate_and_continuation_lines_are_suspicious():
+    found, retry = parse_numbered('[1] 甲\n[1] 甲2\n[2] 乙\n续行\n[3] 丙', [1, 2, 3])
+    assert found == {3: '丙'}
+    assert retry == [1, 2]
+
+
+def test_unknown_ids_and_code_fences_are_ignored():
+    found, retry = parse_numbered('```\n[5] 乙\n[4] 甲\n```', [4, 5])
+    assert found == {4: '甲', 5: '乙'}
+    assert retry == []
+
+
+def _translator(max_repair_rounds=2):
+    config = PipelineConfig(deepseek_api_key='test-key', deepseek_base_url='http://line-protocol.test')
+    return SubtitleTranslator(provider='deepseek', config=config, use_async=False,
+                              max_repair_rounds=max_repair_rounds)
+
+
+def test_repair_resends_only_broken_lines():
+    translator = _translator()
+    sent = []
+    replies = iter(['[1] 甲乙\n[3] 丙', '[1] 甲\n[2] 乙'])
+
+    def fake_create(messages, timeout, temperature=None, kind='default'):
+        sent.append(messages[-1]['content'])
+        return next(replies)
+
+    translator._deepseek_create = fake_create
+    lines, oks, unresolved = translator._translate_batch(['a', 'b', 'c'])
+    assert lines == ['甲', '乙', '丙'] and all(oks) and unresolved == 0
+    # 第二轮只重发缺失的第 2 行与紧邻其前、可能合并了它的第 1 行
+    assert '[1] a' in sent[1] and '[2] b' in sent[1] and '[3] c' not in sent[1]
+    assert translator.line_stats['repair_requests'] == 1
+
+
+def test_unresolved_lines_keep_source_and_are_counted_per_call():
+    translator = _translator(max_repair_rounds=1)
+    translator._deepseek_create = lambda messages, timeout, temperature=None, kind='default': '[1] 甲'
+    lines, oks = translator._translate_with_deepseek_concurrent(['a', 'b'])
+    assert lines == ['a', 'b'] and oks == [False, False]
+    assert translator.line_stats['unresolved_lines'] == 2
+
+    translator._deepseek_create = lambda messages, timeout, temperature=None, kind='default': '[1] 丙\n[2] 丁'
+    lines, oks = translator._translate_with_deepseek_concurrent(['c', 'd'])
+    assert lines == ['丙', '丁'] and oks == [True, True]
+    assert translator.line_stats['unresolved_lines'] == 2
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+"""滚动字幕去重。"""
+
+from yt_translator.normalize import dedupe_rolling_cues, iter_dedupe_rolling_cues
+
+
+def _cue(start, duration, text):
+    return {'start': start, 'duration': duration, 'text': text}
+
+
+def test_rolling_captions_keep_only_new_words():
+    cues = [
+        _cue(0.0, 2.0, 'so today we are'),
+        _cue(1.0, 2.0, 'today we are going to talk'),
+        _cue(2.0, 2.0, 'going to talk about parsers'),
+    ]
+    out, stats = dedupe_rolling_cues(cues)
+    assert [c['text'] for c in out] == ['so today we are', 'going to talk', 'about parsers']
+    assert stats['tokens_removed'] == 6
+    # 输出互不重叠
+    assert all(a['start'] + a['duration'] <= b['start'] for a, b in zip(out, out[1:]))
+
+
+def test_single_word_overlap_is_kept():
+    out, _ = dedupe_rolling_cues([_cue(0.0, 1.0, 'yes'), _cue(5.0, 1.0, 'yes we can')])
+    assert [c['text'] for c in out] == ['yes', 'yes we can']
+
+
+def test_exact_repeat_extends_previous_cue():
+    out, stats = dedupe_rolling_cues([_cue(0.0, 2.0, 'hello there friend'), _cue(1.0, 3.0, 'hello there friend')])
+    assert len(out) == 1
+    assert out[0]['duration'] == 4.0
+    assert stats['cues_in'] == 2 and stats['cues_out'] == 1
+
+
+def test_generator_matches_list_version():
+    cues = [_cue(i * 1.0, 2.0, f'w{i} w{i + 1} w{i + 2}') for i in range(20)]
+    stats = {}
+    streamed = list(iter_dedupe_rolling_cues(iter(cues), stats))
+    listed, list_stats = dedupe_rolling_cues(cues)
+    assert streamed == listed
+    assert stats == list_stats
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+"""句子重组与译文回填。"""
+
+from yt_translator.sentences import Sentence, group_lines, group_sentences, map_to_cues, split_translation
+
+
+CUES = [
+    {'start': 0.0, 'duration': 2.0, 'text': 'so today we are'},
+    {'start': 2.0, 'duration': 2.0, 'text': 'going to talk about parsers.'},
+    {'start': 4.0, 'duration': 2.0, 'text': 'they are fun'},
+    {'start': 6.0, 'duration': 2.0, 'text': 'and fast.'},
+]
+
+
+def test_group_sentences_breaks_on_punctuation():
+    sentences = group_sentences(CUES)
+    assert [(s.first, s.last) for s in sentences] == [(0, 2), (2, 4)]
+    assert sentences[0].text == 'so today we are going to talk about parsers.'
+
+
+def test_group_sentences_breaks_on_gap():
+    cues = [{'start': 0.0, 'duration': 1.0, 'text': 'no punctuation'},
+            {'start': 5.0, 'duration': 1.0, 'text': 'after a pause'}]
+    assert [(s.first, s.last) for s in group_sentences(cues)] == [(0, 1), (1, 2)]
+
+
+def test_split_translation_keeps_piece_count():
+    pieces = split_translation('今天我们来谈谈，解析器。', [15, 28])
+    assert len(pieces) == 2 and ''.join(pieces) == '今天我们来谈谈，解析器。'
+
+
+def test_map_to_cues_keeps_source_for_failed_sentence():
+    sentences = group_sentences(CUES)
+    out = map_to_cues(CUES, sentences, ['今天我们来谈谈解析器。', sentences[1].text])
+    assert out[2:] == ['they are fun', 'and fast.']
+
+
+def test_map_to_cues_leaves_uncovered_cues_empty():
+    out = map_to_cues(CUES, [Sentence('so today we are', 0, 1, 0.0, 2.0)], ['今天'])
+    assert out == ['今天', '', '', '']
+
+
+def test_group_lines_breaks_at_sentence_end_and_chapters():
+    text = 'Hello there.\nthis is part one of the talk.\nnow part two starts.\nmore of part two.'
+    paragraphs = group_lines(text, [text.index('now')], max_chars=20)
+    assert paragraphs == ['Hello there. this is part one of the talk.', 'now part two starts.', 'more of part two.']
+
+
+def test_group_lines_joins_cjk_without_spaces():
+    assert group_lines('你好。\n今天讲解析器。') == ['你好。今天讲解析器。']
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""
+段落时间轴对齐模块：
+- 按原文字幕的累计字符长度，把每个译文段落对应到一段连续的原文字幕，取其起止时间
+  （旧做法按总时长的字符比例分配，遇到停顿、片头片尾时会明显漂移）
+- 可选锚点：段落中保留下来的数字、英文专名与原文中的出现位置配对，作为分段线性映射的控制点
+- 使用 NumPy 前缀和与 searchsorted，整体 O(n log n)；未安装 NumPy 时退回 bisect
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Dict, List, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except Exception:  # NumPy 为可选依赖
+    np = None  # type: ignore
+
+from .transcript import Transcript
+
+
+# 锚点：至少两个数字字符的数（含小数/千分位）与首字母大写的英文词（人名、产品名等通常不被翻译）。
+# 两侧不能紧邻英文字母或数字，避免 word0、v2 这类词内的单个数字成为锚点；
+# 不用 \b，因为中文译文里数字常直接挨着汉字（如“在2021年”）
+_RE_ANCHOR = re.compile(r"(?<![A-Za-z0-9])(?<!\d[.,])(?:\d+(?:[.,]\d+)+|\d{2,}|[A-Z][A-Za-z]{2,})(?![A-Za-z0-9])")
+MIN_PARAGRAPH_SECONDS = 1.8
+
+
+def _anchor_points(full_text: str, paragraphs: List[str], window_ratio: float = 0.05) -> Tuple[List[float], List[float]]:
+    """
+    锚点对应关系：译文中的数字/专名与其在原文中最近（按比例估计位置）的出现位置配对，
+    返回单调递增的控制点 (译文位置列表, 原文位置列表)，首尾固定为 (0, 0) 与 (T, S)。
+    只在估计位置附近 window_ratio * 原文长度 的范围内配对，避免把段落拉到远处的同名词上。
+    """
+    total_tgt = float(sum(max(1, len(p)) for p in paragraphs))
+    total_src = float(len(full_text) + 1)
+    xs: List[float] = [0.0]
+    ys: List[float] = [0.0]
+    tgt_hits = []
+    pos = 0
+    for p in paragraphs:
+        for m in _RE_ANCHOR.finditer(p):
+            tgt_hits.append((pos + m.start(), m.group()))
+        pos += max(1, len(p))
+    if tgt_hits:
+        wanted = {tok for _, tok in tgt_hits}
+        occurrences: Dict[str, List[int]] = {}
+        for m in _RE_ANCHOR.finditer(full_text):
+            if m.group() in wanted:
+                occurrences.setdefault(m.group(), []).append(m.start())
+        window = max(200.0, window_ratio * total_src)
+        for x, tok in tgt_hits:
+            occ = occurrences.get(tok)
+            if not occ:
+                continue
+            estimate = x / total_tgt * total_src
+            j = bisect_left(occ, estimate)
+            near = [occ[i] for i in (j - 1, j) if 0 <= i < len(occ)]
+            y = min(near, key=lambda v: abs(v - estimate))
+            # 只保留保持单调的控制点
+            if abs(y - estimate) <= window and x > xs[-1] and y > ys[-1]:
+                xs.append(float(x))
+                ys.append(float(y))
+    xs.append(total_tgt)
+    ys.append(max(total_src, ys[-1]))
+    return xs, ys
+
+
+def _interp(values: List[float], xs: List[float], ys: List[float]) -> List[float]:
+    """分段线性插值（np.interp 的纯 Python 版本）。"""
+    out: List[float] = []
+    for v in values:
+        i = min(max(bisect_right(xs, v), 1), len(xs) - 1)
+        x0, x1, y0, y1 = xs[i - 1], xs[i], ys[i - 1], ys[i]
+        out.append(y0 if x1 == x0 else y0 + (v - x0) * (y1 - y0) / (x1 - x0))
+    return out
+
+
+def _paragraph_starts(src_ends, paragraphs: List[str], xs: List[float], ys: List[float]) -> List[int]:
+    """把各段在译文中的起始位置经控制点映射到原文位置，再二分查找对应的字幕下标。"""
+    n = len(src_ends)
+    weights = [max(1, len(p)) for p in paragraphs]
+    if np is not None:
+        before = np.concatenate(([0], np.cumsum(weights[:-1])))
+        idx = np.searchsorted(np.asarray(src_ends), np.interp(before, xs, ys), side='right')
+        return np.minimum(idx, n - 1).tolist()
+    positions = _interp(list(accumulate([0] + weights[:-1])), xs, ys)
+    return [min(bisect_right(src_ends, pos), n - 1) for pos in positions]
+
+
+def align_paragraphs(items: Union[Transcript, Sequence[Dict]], paragraphs: List[str], use_anchors: bool = True) -> List[Dict]:
+    """
+    为译文段落分配时间轴，返回 [{'start', 'duration', 'text': '', 'translated_text'}]。
+    段落 k 对应原文字幕 [b_k, b_{k+1})，起点取第 b_k 条的开始时间，终点取下一段的起点（末段取字幕结束时间）。
+    边界单调不减：段落多于字幕时，多段可能共享同一起点。
+    """
+    if not paragraphs:
+        return []
+    transcript = Transcript.from_items(items)
+    n = len(transcript)
+    if n == 0:
+        out = []
+        acc = 0.0
+        for p in paragraphs:
+            out.append({'start': round(acc, 3), 'duration': MIN_PARAGRAPH_SECONDS, 'text': '', 'translated_text': p})
+            acc += MIN_PARAGRAPH_SECONDS
+        return out
+
+    if use_anchors:
+        xs, ys = _anchor_points(transcript.full_text, paragraphs)
+    else:
+        xs = [0.0, float(sum(max(1, len(p)) for p in paragraphs))]
+        ys = [0.0, float(len(transcript.full_text) + 1)]
+    bounds = _paragraph_starts(transcript.text_ends_array(), paragraphs, xs, ys) + [n]
+    bounds[0] = 0
+
+    starts = transcript.starts
+    end_time = transcript.end
+    out: List[Dict] = []
+    for k, p in enumerate(paragraphs):
+        start = float(starts[min(bounds[k], n - 1)])
+        if k + 1 < len(paragraphs) and bounds[k + 1] < n:
+            end = float(starts[bounds[k + 1]])
+        else:
+            end = end_time
+        if end - start < 0.1:
+            end = start + MIN_PARAGRAPH_SECONDS
+        out.append({
+            'start': round(start, 3),
+            'duration': round(end - start, 3),
+            'text': '',
+            'translated_text': p,
+        })
+    return out
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+"""
+异步翻译引擎模块：
+- 进程级后台事件循环，同步代码可通过 run_sync 提交协程
+- 进程级共享、带连接池的 httpx 客户端（同步/异步各一个）
+- 按 (API Key, 地址) 复用 OpenAI / AsyncOpenAI 客户端，避免每次运行重新建连；
+  复用表以 Key 的哈希为键、按 LRU 限制数量，不长期持有每个会话的明文 Key；
+  客户端关闭 SDK 自带的重试（max_retries=0），重试、Retry-After 与限流只由 governor 处理
+- run_batches：在单个事件循环中并发执行成百上千个批次，不占用额外线程
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar
+
+import httpx
+
+try:
+    from openai import OpenAI, AsyncOpenAI
+except Exception:  # 避免在未安装 openai 时导入失败
+    OpenAI = None  # type: ignore
+    AsyncOpenAI = None  # type: ignore
+
+
+T = TypeVar('T')
+
+# 连接池上限：单进程内所有会话共享
+HTTP_LIMITS = httpx.Limits(max_connections=256, max_keepalive_connections=64, keepalive_expiry=60.0)
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+# 复用的 OpenAI 客户端数上限（同步/异步各自计数），超出时淘汰最久未用的
+OPENAI_CLIENT_CACHE_SIZE = 32
+
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_openai_clients: 'OrderedDict[str, Any]' = OrderedDict()
+_async_openai_clients: 'OrderedDict[str, Any]' = OrderedDict()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """返回进程级后台事件循环（守护线程中常驻运行）。"""
+    global _loop, _loop_thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='yt-translator-async', daemon=True)
+            thread.start()
+            _loop, _loop_thread = loop, thread
+        return _loop
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """在后台事件循环中执行协程并同步等待结果，可在任意线程调用。"""
+    loop = get_loop()
+    if threading.current_thread() is _loop_thread:
+        raise RuntimeError('不能在后台事件循环线程内同步等待协程')
+    future = asyncio.run_coroutine_threadsafe(coro, loop)  # type: ignore[arg-type]
+    return future.result(timeout)
+
+
+def get_http_client() -> httpx.Client:
+    """返回进程级共享的同步 httpx 客户端。"""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """返回进程级共享的异步 httpx 客户端（仅在后台事件循环中使用）。"""
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return _async_http_client
+
+
+def _client_key(api_key: str, base_url: str) -> str:
+    """客户端复用表的键：(Key, 地址) 的 SHA-256，不以明文 Key 为键。"""
+    return hashlib.sha256(f'{api_key}\0{base_url}'.encode('utf-8')).hexdigest()
+
+
+def _cached_client(clients: 'OrderedDict[str, Any]', key: str, factory: Callable[[], Any]) -> Any:
+    """从 LRU 复用表取客户端，未命中时创建并淘汰最久未用的条目（被淘汰的客户端不关闭，连接池是共享的）。"""
+    with _lock:
+        client = clients.get(key)
+        if client is not None:
+            clients.move_to_end(key)
+            return client
+    # 创建客户端时会获取共享 httpx 客户端（同样需要 _lock），因此在锁外创建
+    client = factory()
+    with _lock:
+        client = clients.setdefault(key, client)
+        clients.move_to_end(key)
+        while len(clients) > OPENAI_CLIENT_CACHE_SIZE:
+            clients.popitem(last=False)
+    return client
+
+
+def get_openai_client(api_key: str, base_url: str) -> Any:
+    """按 (API Key, 地址) 复用同步 OpenAI 客户端，底层共享连接池。"""
+    if OpenAI is None:
+        raise RuntimeError('需要安装 openai 依赖以使用 DeepSeek：pip install openai')
+    return _cached_client(
+        _openai_clients, _client_key(api_key, base_url),
+        lambda: OpenAI(api_key=api_key, base_url=base_url, http_client=get_http_client(), max_retries=0),
+    )
+
+
+def get_async_openai_client(api_key: str, base_url: str) -> Any:
+    """按 (API Key, 地址) 复用 AsyncOpenAI 客户端；未安装时返回 None。"""
+    if AsyncOpenAI is None:
+        return None
+    return _cached_client(
+        _async_openai_clients, _client_key(api_key, base_url),
+        lambda: AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=get_async_http_client(), max_retries=0),
+    )
+
+
+async def run_batches(batches: List[T], work: Callable[[T], Awaitable[Any]], max_in_flight: int, on_done: Optional[Callable[[T, Any], None]] = None) -> List[Any]:
+    """
+    并发执行各批次协程，同时在途的请求不超过 max_in_flight，按输入顺序返回结果。
+    on_done 在每个批次完成时于事件循环线程中回调。
+    """
+    semaphore = asyncio.Semaphore(max(1, int(max_in_flight)))
+
+    async def guarded(batch: T) -> Any:
+        async with semaphore:
+            result = await work(batch)
+        if on_done is not None:
+            on_done(batch, result)
+        return result
+
+    return list(await asyncio.gather(*(guarded(b) for b in batches)))
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+"""
+批次打包模块：
+- 本地快速估算 token 数（无需分词器）
+- 按输入/输出 token 预算打包逐行翻译批次，替代固定条数分批
+- 按句子/章节边界把长文本切分为带重叠上下文的块
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from .transcript import Transcript
+
+
+# 英文等拉丁文本约 4 个字符 1 个 token；中日韩字符约 1 字 1 token
+_CHARS_PER_TOKEN_LATIN = 4.0
+# 每行额外的换行/分隔开销
+_LINE_OVERHEAD_TOKENS = 1
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    快速估算文本的 token 数。
+    利用 UTF-8 字节数与字符数之差近似统计多字节字符（中日韩文字通常为 3 字节），
+    全部在 C 层完成，避免逐字符循环。
+    """
+    if not text:
+        return 0
+    n_chars = len(text)
+    n_bytes = len(text.encode('utf-8'))
+    wide = min(n_chars, (n_bytes - n_chars) // 2)
+    narrow = n_chars - wide
+    return int(wide + narrow / _CHARS_PER_TOKEN_LATIN) + 1
+
+
+class Batch:
+    """一个待发送的翻译批次。"""
+
+    __slots__ = ('start', 'texts', 'input_tokens', 'output_tokens')
+
+    def __init__(self, start: int, texts: List[str], input_tokens: int, output_tokens: int) -> None:
+        self.start = start
+        self.texts = texts
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+    def fill_ratio(self, max_input_tokens: int, max_output_tokens: int) -> float:
+        """批次装填率：取输入、输出两个预算中占用更高的一方。"""
+        return max(self.input_tokens / max(1, max_input_tokens), self.output_tokens / max(1, max_output_tokens))
+
+
+def pack_batches(texts: List[str], max_input_tokens: int = 2000, max_output_tokens: int = 4000, max_items: int = 200, output_ratio: float = 1.5) -> List[Batch]:
+    """
+    按 token 预算顺序打包批次，保持原有顺序。
+    - max_input_tokens：单批输入 token 上限
+    - max_output_tokens：单批预计输出 token 上限（按 output_ratio 由输入估算）
+    - max_items：单批最多行数，避免单次对齐的行数过多
+    单行超出预算时独占一批。
+    """
+    batches: List[Batch] = []
+    cur: List[str] = []
+    cur_in = 0
+    cur_out = 0
+    start = 0
+    for idx, text in enumerate(texts):
+        t_in = estimate_tokens(text) + _LINE_OVERHEAD_TOKENS
+        t_out = int(t_in * output_ratio)
+        if cur and (cur_in + t_in > max_input_tokens or cur_out + t_out > max_output_tokens or len(cur) >= max_items):
+            batches.append(Batch(start, cur, cur_in, cur_out))
+            cur, cur_in, cur_out, start = [], 0, 0, idx
+        cur.append(text)
+        cur_in += t_in
+        cur_out += t_out
+    if cur:
+        batches.append(Batch(start, cur, cur_in, cur_out))
+    return batches
+
+
+def summarize_batches(batches: List[Batch], max_input_tokens: int, max_output_tokens: int) -> Dict[str, Any]:
+    """汇总批次装填情况，用于日志与统计。"""
+    if not batches:
+        return {'batches': 0, 'lines': 0, 'avg_fill': 0.0, 'min_fill': 0.0, 'max_fill': 0.0}
+    fills = [b.fill_ratio(max_input_tokens, max_output_tokens) for b in batches]
+    return {
+        'batches': len(batches),
+        'lines': sum(len(b.texts) for b in batches),
+        'input_tokens': sum(b.input_tokens for b in batches),
+        'avg_fill': sum(fills) / len(fills),
+        'min_fill': min(fills),
+        'max_fill': max(fills),
+    }
+
+
+_SENTENCE_END = frozenset('.!?。！？…')
+
+
+def _split_units(text: str) -> List[Tuple[int, str]]:
+    """
+    将文本切分为句子级单元，返回 [(起始偏移, 单元文本)]。
+    以句末标点或换行为界；无标点的自动字幕以行为单元。
+    """
+    units: List[Tuple[int, str]] = []
+    start = 0
+    n = len(text)
+    i = 0
+    while i < n:
+        ch = text[i]
+        if ch == '\n' or (ch in _SENTENCE_END and (i + 1 >= n or text[i + 1].isspace())):
+            end = i + 1
+            # 句末空白（含换行）归入本单元，拼接时保持原有换行
+            while ch != '\n' and end < n and text[end].isspace():
+                end += 1
+                if text[end - 1] == '\n':
+                    break
+            if text[start:end].strip():
+                units.append((start, text[start:end]))
+            start = end
+            i = end
+            continue
+        i += 1
+    if start < n and text[start:].strip():
+        units.append((start, text[start:]))
+    return units
+
+
+class TextChunk:
+    """长文本分块：context 为上一块末尾的重叠部分（仅供参考），body 为本块需要处理的正文。"""
+
+    __slots__ = ('index', 'context', 'body', 'tokens')
+
+    def __init__(self, index: int, context: str, body: str, tokens: int) -> None:
+        self.index = index
+        self.context = context
+        self.body = body
+        self.tokens = tokens
+
+
+def chunk_text(text: str, max_tokens: int = 6000, overlap_tokens: int = 200, break_offsets: Optional[List[int]] = None) -> List[TextChunk]:
+    """
+    按句子边界把长文本切成不超过 max_tokens 的块，并附带少量重叠上下文。
+    - break_offsets：优先断开的字符偏移（如章节起点）；当前块已超过一半预算时在此处断开
+    - 单个句子超出预算时独占一块
+    """
+    units = _split_units(text)
+    breaks = set(break_offsets or [])
+    chunks: List[TextChunk] = []
+    cur: List[str] = []
+    cur_tokens = 0
+    prev_tail: List[str] = []
+
+    def flush() -> None:
+        nonlocal cur, cur_tokens, prev_tail
+        if not cur:
+            return
+        chunks.append(TextChunk(len(chunks), ''.join(prev_tail).strip(), ''.join(cur).strip(), cur_tokens))
+        # 取本块末尾若干句作为下一块的上下文
+        tail: List[str] = []
+        tail_tokens = 0
+        for unit in reversed(cur):
+            t = estimate_tokens(unit)
+            if tail and tail_tokens + t > overlap_tokens:
+                break
+            tail.insert(0, unit)
+            tail_tokens += t
+            if tail_tokens >= overlap_tokens:
+                break
+        prev_tail = tail if overlap_tokens > 0 else []
+        cur, cur_tokens = [], 0
+
+    for offset, unit in units:
+        t = estimate_tokens(unit)
+        at_break = offset in breaks
+        if cur and (cur_tokens + t > max_tokens or (at_break and cur_tokens >= max_tokens // 2)):
+            flush()
+        cur.append(unit)
+        cur_tokens += t
+    flush()
+    return chunks
+
+
+def chapter_break_offsets(items: Sequence[Dict], chapters: List[Dict]) -> List[int]:
+    """
+    计算章节起点在全文中的字符偏移。
+    全文与 Transcript.full_text 一致：非空字幕文本去除首尾空白后以换行连接（空白字幕跳过）。
+    字典列表先转换为 Transcript，两种输入的结果相同。
+    """
+    if not items or not chapters:
+        return []
+    transcript = Transcript.from_items(items)
+    starts = sorted(float(ch.get('start_time', 0) or 0) for ch in chapters)
+    # 按二分查找定位章节起点所在条目，偏移直接取自文本缓冲区
+    offsets: List[int] = []
+    for ch_start in starts:
+        i = bisect_left(transcript.starts, ch_start)
+        if 0 < i < len(transcript):
+            # 章节起点落在第 i 条之前时，从第 i 条开始断开
+            pos = transcript.text_offset(i)
+            if not offsets or offsets[-1] != pos:
+                offsets.append(pos)
+    return offsets
@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+
+"""
+持久化缓存模块：
+- 基于 SQLite 的键值缓存，支持 TTL 过期与按容量的 LRU 淘汰
+- TranscriptCache：按 (视频 ID, 解析后的语言, 提取来源, 优先语言) 缓存字幕条目、标题与章节
+- TranslationMemory：跨会话翻译记忆，按 (提供方, 模型, 目标语言, 提示词版本, 文本哈希) 缓存译文
+- ReportCache：成品缓存，按 (视频 ID, 流水线配置指纹) 缓存渲染好的 HTML 报告、总结与统计
+- 记录命中/未命中计数，便于观察缓存效果
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Dict, Tuple, Any
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'yt_translator')
+
+
+def default_cache_path(filename: str) -> str:
+    """返回默认缓存文件路径，可通过环境变量 YT_TRANSLATOR_CACHE_DIR 覆盖目录。"""
+    cache_dir = os.getenv('YT_TRANSLATOR_CACHE_DIR') or DEFAULT_CACHE_DIR
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    return os.path.join(cache_dir, filename)
+
+
+class SqliteLRUCache:
+    """
+    SQLite 键值缓存基类。
+    - 每条记录保存写入时间与最近访问时间，超过 ttl_seconds 视为过期
+    - 总字节数超过 max_bytes 时按最近访问时间淘汰（LRU）
+    - 线程安全：单连接 + 互斥锁，适合 Streamlit 多会话共享
+    """
+
+    def __init__(self, path: str, table: str, ttl_seconds: Optional[float] = 7 * 24 * 3600, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max(0, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'key TEXT PRIMARY KEY, '
+            'tag TEXT, '
+            'payload TEXT NOT NULL, '
+            'size INTEGER NOT NULL, '
+            'created_at REAL NOT NULL, '
+            'accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_tag ON {self.table}(tag)')
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table}(accessed_at)')
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，过期或不存在时返回 None。"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT payload, created_at FROM {self.table} WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if self._expired(row[1], now):
+                self._conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+                self.misses += 1
+                return None
+            self._conn.execute(f'UPDATE {self.table} SET accessed_at = ? WHERE key = ?', (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """批量读取缓存，返回命中的 {key: value}；未命中的键不出现在结果中。"""
+        found: Dict[str, Any] = {}
+        if not keys:
+            return found
+        now = time.time()
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            expired: List[str] = []
+            # SQLite 默认变量上限 999，分块查询
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key, payload, created_at FROM {self.table} WHERE key IN ({placeholders})', chunk
+                ).fetchall()
+                for key, payload, created_at in rows:
+                    if self._expired(created_at, now):
+                        expired.append(key)
+                        continue
+                    found[key] = json.loads(payload)
+            if expired:
+                self._conn.executemany(f'DELETE FROM {self.table} WHERE key = ?', [(k,) for k in expired])
+            if found:
+                self._conn.executemany(
+                    f'UPDATE {self.table} SET accessed_at = ? WHERE key = ?', [(now, k) for k in found]
+                )
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+        return found
+
+    def set(self, key: str, value: Any, tag: Optional[str] = None) -> None:
+        """写入缓存，并在超出容量时淘汰最久未访问的记录。"""
+        self.set_many({key: value}, tag=tag)
+
+    def set_many(self, entries: Dict[str, Any], tag: Optional[str] = None) -> None:
+        """批量写入缓存。"""
+        if not entries:
+            return
+        now = time.time()
+        rows: List[Tuple[str, Optional[str], str, int, float, float]] = []
+        for key, value in entries.items():
+            payload = json.dumps(value, ensure_ascii=False)
+            rows.append((key, tag, payload, len(payload.encode('utf-8')), now, now))
+        with self._lock:
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (key, tag, payload, size, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+            self._evict_locked()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+
+    def delete_tag(self, tag: str) -> int:
+        """删除某个标签下的全部记录，返回删除条数。"""
+        with self._lock:
+            cur = self._conn.execute(f'DELETE FROM {self.table} WHERE tag = ?', (tag,))
+            return cur.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f'DELETE FROM {self.table}')
+
+    def _evict_locked(self) -> None:
+        """删除过期记录，再按 LRU 淘汰直到总大小不超过 max_bytes。"""
+        if self.ttl_seconds is not None:
+            cur = self._conn.execute(
+                f'DELETE FROM {self.table} WHERE created_at < ?', (time.time() - self.ttl_seconds,)
+            )
+            self.evictions += max(0, cur.rowcount)
+        total = self._conn.execute(f'SELECT COALESCE(SUM(size), 0) FROM {self.table}').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        to_free = total - self.max_bytes
+        victims: List[str] = []
+        for key, size in self._conn.execute(f'SELECT key, size FROM {self.table} ORDER BY accessed_at ASC'):
+            victims.append(key)
+            to_free -= size
+            if to_free <= 0:
+                break
+        self._conn.executemany(f'DELETE FROM {self.table} WHERE key = ?', [(k,) for k in victims])
+        self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中率、条目数与占用字节数。"""
+        with self._lock:
+            count, size = self._conn.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}'
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': count,
+            'bytes': size,
+        }
+
+
+class TranscriptCache(SqliteLRUCache):
+    """
+    字幕缓存：键为 (视频 ID, 解析后的语言, 提取来源, 提取时的优先语言)，值为字幕条目、标题与章节。
+    读取时按优先语言顺序选择已缓存的语言版本：
+    - 与首选语言相同的版本总可直接返回
+    - 其余版本（包括 'auto' 匹配到的任意语言）只在提取时的优先语言与本次相同时返回；
+      否则无法确定更优先的语言在该视频上确实不存在，按未命中处理
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[float] = 7 * 24 * 3600, max_bytes: int = 256 * 1024 * 1024) -> None:
+        super().__init__(path or default_cache_path('transcripts.sqlite3'), 'transcripts', ttl_seconds, max_bytes)
+
+    @staticmethod
+    def normalize_prefs(preferred_langs: Optional[Iterable[str]]) -> List[str]:
+        """规范化优先语言列表：去空白、转小写、去重并保持顺序。"""
+        return list(dict.fromkeys(p.strip().lower() for p in preferred_langs or [] if p and p.strip()))
+
+    @classmethod
+    def make_key(cls, video_id: str, lang: Optional[str], source: str, preferred_langs: Optional[Iterable[str]] = None) -> str:
+        return f'{video_id}|{lang or ""}|{source}|{",".join(cls.normalize_prefs(preferred_langs))}'
+
+    def lookup(self, video_id: str, preferred_langs: List[str]) -> Optional[Tuple[List[Dict], Optional[str], Optional[str], str, List[Dict]]]:
+        """
+        按优先语言查找缓存的字幕。
+        返回 (items, lang, title, source, chapters)；未命中返回 None。
+        """
+        wanted = self.normalize_prefs(preferred_langs)
+        wanted_key = ','.join(wanted)
+        wildcard = wanted.index('auto') if 'auto' in wanted else None
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT key, created_at FROM {self.table} WHERE tag = ? ORDER BY accessed_at DESC', (video_id,)
+            ).fetchall()
+            candidates: List[Tuple[int, str]] = []
+            for key, created_at in rows:
+                if self._expired(created_at, now):
+                    continue
+                parts = key.split('|', 3)
+                lang = parts[1].lower()
+                same_prefs = len(parts) == 4 and parts[3] == wanted_key
+                if lang in wanted:
+                    rank = wanted.index(lang)
+                elif wildcard is not None:
+                    rank = wildcard
+                else:
+                    continue
+                if rank == 0 or same_prefs:
+                    candidates.append((rank, key))
+            if not candidates:
+                self.misses += 1
+                return None
+            # 稳定排序：同等优先级时保持最近访问顺序
+            candidates.sort(key=lambda c: c[0])
+            key = candidates[0][1]
+            row = self._conn.execute(f'SELECT payload FROM {self.table} WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(f'UPDATE {self.table} SET accessed_at = ? WHERE key = ?', (now, key))
+            self.hits += 1
+        entry = json.loads(row[0])
+        return entry['items'], entry['lang'], entry['title'], entry['source'], entry['chapters']
+
+    def store(self, video_id: str, items: Iterable[Dict], lang: Optional[str], title: Optional[str], source: str, chapters: List[Dict], preferred_langs: Optional[List[str]] = None) -> None:
+        """写入一次成功提取的结果；preferred_langs 为提取时使用的优先语言。"""
+        entry = {
+            'items': [{'start': it['start'], 'duration': it['duration'], 'text': it['text']} for it in items],
+            'lang': lang,
+            'title': title,
+            'source': source,
+            'chapters': chapters or [],
+        }
+        self.set(self.make_key(video_id, lang, source, preferred_langs), entry, tag=video_id)
+
+
+_default_transcript_cache: Optional[TranscriptCache] = None
+_default_lock = threading.Lock()
+
+
+def get_transcript_cache() -> TranscriptCache:
+    """返回进程内共享的默认字幕缓存。"""
+    global _default_transcript_cache
+    with _default_lock:
+        if _default_transcript_cache is None:
+            _default_transcript_cache = TranscriptCache()
+        return _default_transcript_cache
+
+
+def normalize_text(text: str) -> str:
+    """归一化待翻译文本：去除首尾空白并合并连续空白。"""
+    return ' '.join(text.split())
+
+
+class TranslationMemory(SqliteLRUCache):
+    """
+    跨会话翻译记忆：键为 (提供方, 模型, 目标语言, 提示词版本, 归一化文本哈希)。
+    相同的片头、口播与常用语只需翻译一次。
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[float] = 30 * 24 * 3600, max_bytes: int = 128 * 1024 * 1024) -> None:
+        super().__init__(path or default_cache_path('translation_memory.sqlite3'), 'translations', ttl_seconds, max_bytes)
+
+    @staticmethod
+    def make_key(provider: str, model: str, target_language: str, prompt_version: str, text: str) -> str:
+        digest = hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+        return f'{provider}|{model}|{target_language}|{prompt_version}|{digest}'
+
+    def lookup_many(self, provider: str, model: str, target_language: str, prompt_version: str, texts: List[str]) -> Dict[str, str]:
+        """批量查询，返回命中的 {原文: 译文}。"""
+        keys = {self.make_key(provider, model, target_language, prompt_version, t): t for t in texts}
+        found = self.get_many(list(keys))
+        return {keys[k]: v for k, v in found.items()}
+
+    def store_many(self, provider: str, model: str, target_language: str, prompt_version: str, pairs: Dict[str, str]) -> None:
+        """批量写入 {原文: 译文}。"""
+        entries = {self.make_key(provider, model, target_language, prompt_version, src): dst for src, dst in pairs.items()}
+        self.set_many(entries, tag=f'{provider}|{model}|{target_language}')
+
+
+_default_translation_memory: Optional[TranslationMemory] = None
+
+
+def get_translation_memory() -> TranslationMemory:
+    """返回进程内共享的默认翻译记忆。"""
+    global _default_translation_memory
+    with _default_lock:
+        if _default_translation_memory is None:
+            _default_translation_memory = TranslationMemory()
+        return _default_translation_memory
+
+
+class ReportCache(SqliteLRUCache):
+    """
+    成品报告缓存：键为 (视频 ID, 配置指纹)，值为流水线结果字典（html_content、summary、stats 等）。
+    命中时跳过提取、翻译、时间轴分配与报告渲染。以视频 ID 为标签，便于按视频失效。
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[float] = 7 * 24 * 3600, max_bytes: int = 256 * 1024 * 1024) -> None:
+        super().__init__(path or default_cache_path('reports.sqlite3'), 'reports', ttl_seconds, max_bytes)
+
+    @staticmethod
+    def make_key(video_id: str, fingerprint: str) -> str:
+        return f'{video_id}|{fingerprint}'
+
+    def lookup(self, video_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """返回缓存的结果字典；未命中返回 None。"""
+        return self.get(self.make_key(video_id, fingerprint))
+
+    def store(self, video_id: str, fingerprint: str, result: Dict[str, Any]) -> None:
+        self.set(self.make_key(video_id, fingerprint), result, tag=video_id)
+
+    def invalidate(self, video_id: Optional[str] = None, fingerprint: Optional[str] = None) -> int:
+        """
+        使缓存失效，返回删除条数：
+        - 同时给出 video_id 与 fingerprint：只删除这一份报告
+        - 只给出 video_id：删除该视频的全部报告
+        - 都不给出：清空全部报告
+        """
+        if video_id is None:
+            with self._lock:
+                cur = self._conn.execute(f'DELETE FROM {self.table}')
+                return max(0, cur.rowcount)
+        if fingerprint is None:
+            return self.delete_tag(video_id)
+        with self._lock:
+            cur = self._conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (self.make_key(video_id, fingerprint),))
+            return max(0, cur.rowcount)
+
+
+_default_report_cache: Optional[ReportCache] = None
+
+
+def get_report_cache() -> ReportCache:
+    """返回进程内共享的默认报告缓存。"""
+    global _default_report_cache
+    with _default_lock:
+        if _default_report_cache is None:
+            _default_report_cache = ReportCache()
+        return _default_report_cache
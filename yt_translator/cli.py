@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+
+"""
+命令行批处理模块（python -m yt_translator）：
+- 输入可以是视频链接、播放列表/频道链接（经 yt-dlp 平铺提取展开为视频），或每行一个链接的文本文件
+- 在有上限的进程池中并行执行流水线，每个视频写出 <video_id>.json 结果与 <video_id>.html 报告
+- 断点续跑：输出目录中已成功的视频直接跳过，失败的视频下次重试
+- 结束时打印并写出吞吐统计（batch_stats.json）
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import yt_dlp  # 可选依赖：展开播放列表与频道
+except Exception:
+    yt_dlp = None  # type: ignore
+
+try:
+    from dotenv import load_dotenv  # 可选依赖：读取 .env
+except Exception:
+    load_dotenv = None  # type: ignore
+
+from .config import PipelineConfig
+from .extractor import parse_video_id, ytdlp_cookie_options
+from .pipeline import PipelineError, run_pipeline
+
+
+DONE = 'done'
+FAILED = 'failed'
+STATS_FILENAME = 'batch_stats.json'
+
+
+def _watch_url(video_id: str) -> str:
+    return f'https://www.youtube.com/watch?v={video_id}'
+
+
+def _is_collection_url(url: str) -> bool:
+    """播放列表或频道链接（而非单个视频）。"""
+    if 'list=' in url and 'v=' not in url:
+        return True
+    return any(part in url for part in ('/playlist', '/channel/', '/c/', '/user/', '/@'))
+
+
+def _flat_video_ids(url: str, config: PipelineConfig, depth: int = 2) -> List[str]:
+    """
+    用 yt-dlp 平铺提取（不解析各视频详情）展开播放列表或频道，返回视频 ID 列表。
+    频道主页的条目是各个标签页（视频、直播、Shorts），再向下展开 depth 层。
+    """
+    if yt_dlp is None:
+        raise RuntimeError('展开播放列表/频道需要安装 yt-dlp')
+    opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+        'extract_flat': 'in_playlist',
+        **ytdlp_cookie_options(config),
+    }
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=False) or {}
+    ids: List[str] = []
+    for entry in info.get('entries') or []:
+        if not entry:
+            continue
+        entry_url = entry.get('url') or entry.get('webpage_url') or ''
+        if entry.get('_type') == 'playlist' or (entry.get('ie_key') == 'YoutubeTab' and entry_url):
+            if depth > 0 and entry_url:
+                ids.extend(_flat_video_ids(entry_url, config, depth - 1))
+            continue
+        video_id = entry.get('id') if entry.get('ie_key') in (None, 'Youtube') else None
+        video_id = video_id or parse_video_id(entry_url)
+        if video_id:
+            ids.append(video_id)
+    return ids
+
+
+def expand_inputs(sources: Iterable[str], config: Optional[PipelineConfig] = None) -> List[str]:
+    """
+    把命令行输入展开为去重后的视频链接列表（保持输入顺序）。
+    文本文件中每行一个链接，空行与 # 开头的行忽略；文件中的播放列表/频道链接同样会展开。
+    config 提供展开时使用的 Cookie 设置，未传入时按环境变量构造。
+    """
+    if config is None:
+        config = PipelineConfig.from_env()
+    urls: List[str] = []
+    for source in sources:
+        if os.path.isfile(source):
+            with open(source, 'r', encoding='utf-8') as f:
+                lines = [line.strip() for line in f]
+            urls.extend(line for line in lines if line and not line.startswith('#'))
+        else:
+            urls.append(source.strip())
+
+    seen = set()
+    videos: List[str] = []
+    for url in urls:
+        if _is_collection_url(url):
+            ids = _flat_video_ids(url, config)
+            print(f".. 展开 {url}：{len(ids)} 个视频", flush=True)
+        else:
+            video_id = parse_video_id(url)
+            if not video_id:
+                print(f".. 跳过无法识别的链接：{url}", flush=True)
+                continue
+            ids = [video_id]
+        for video_id in ids:
+            if video_id not in seen:
+                seen.add(video_id)
+                videos.append(_watch_url(video_id))
+    return videos
+
+
+def _write_json(path: str, data: Any) -> None:
+    """先写临时文件再替换，避免中断时留下半个 JSON（断点续跑依赖其完整性）。"""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _result_path(outdir: str, video_id: str) -> str:
+    return os.path.join(outdir, f'{video_id}.json')
+
+
+def is_done(outdir: str, video_id: str) -> bool:
+    """输出目录中是否已有该视频的成功结果。"""
+    try:
+        with open(_result_path(outdir, video_id), 'r', encoding='utf-8') as f:
+            return json.load(f).get('status') == DONE
+    except (OSError, ValueError):
+        return False
+
+
+def process_one(config: PipelineConfig, outdir: str) -> Dict[str, Any]:
+    """
+    在工作进程中处理一个视频：写出报告与结果 JSON，返回用于统计的摘要。
+    所有异常都被记录到结果 JSON 中，不向进程池抛出。
+    """
+    video_id = parse_video_id(config.url or '') or 'unknown'
+    started = time.time()
+    record: Dict[str, Any] = {'video_id': video_id, 'url': config.url}
+    try:
+        result = run_pipeline(config)
+    except Exception as e:
+        record.update({
+            'status': FAILED,
+            'error': str(e) or e.__class__.__name__,
+            'hint': e.hint if isinstance(e, PipelineError) else '',
+        })
+    else:
+        report_name = f'{video_id}.html'
+        with open(os.path.join(outdir, report_name), 'w', encoding='utf-8') as f:
+            f.write(result['html_content'])
+        record.update({
+            'status': DONE,
+            'title': result['title'],
+            'title_cn': result['title_cn'],
+            'summary': result['summary'],
+            'report': report_name,
+            'stats': result['stats'],
+        })
+    record['elapsed'] = time.time() - started
+    record['finished_at'] = time.time()
+    _write_json(_result_path(outdir, video_id), record)
+    return {
+        'video_id': video_id,
+        'status': record['status'],
+        'error': record.get('error'),
+        'elapsed': record['elapsed'],
+        'chars': (record.get('stats') or {}).get('full_text_length', 0),
+        'cache': (record.get('stats') or {}).get('cache'),
+    }
+
+
+def build_config(args: argparse.Namespace, url: Optional[str] = None) -> PipelineConfig:
+    """命令行参数覆盖环境变量默认值（DeepSeek Key/模型、Cookie 等），得到单个视频的配置。"""
+    return PipelineConfig.from_env(
+        url=url,
+        provider=args.provider,
+        target_lang=args.lang,
+        source_langs=[s.strip() for s in args.source_langs.split(',') if s.strip()],
+        batch_size=args.batch_size,
+        max_retries=args.max_retries,
+        concurrent_workers=args.concurrency,
+        youtube_translation=not args.no_youtube_translation,
+        refresh_report=args.refresh,
+    )
+
+
+def _format_stats(stats: Dict[str, Any]) -> str:
+    return (
+        f"完成 {stats['done']}，失败 {stats['failed']}，跳过 {stats['skipped']}（共 {stats['total']}）；"
+        f"耗时 {stats['wall_time']:.1f} 秒，{stats['videos_per_minute']:.2f} 个/分钟，"
+        f"{stats['chars_per_second']:.0f} 字符/秒，单个视频平均 {stats['avg_video_seconds']:.1f} 秒"
+    )
+
+
+def run_batch(args: argparse.Namespace) -> Dict[str, Any]:
+    """展开输入、跳过已完成的视频，在进程池中处理其余视频，返回吞吐统计。"""
+    os.makedirs(args.outdir, exist_ok=True)
+    base = build_config(args)
+    urls = expand_inputs(args.inputs, base)
+    if args.limit:
+        urls = urls[:args.limit]
+    pending = [u for u in urls if args.force or not is_done(args.outdir, parse_video_id(u))]
+    skipped = len(urls) - len(pending)
+    print(f".. 共 {len(urls)} 个视频，已完成跳过 {skipped} 个，待处理 {len(pending)} 个（{args.workers} 个进程）", flush=True)
+
+    started = time.time()
+    outcomes: List[Dict[str, Any]] = []
+    interrupted = False
+    if pending:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(process_one, base.replace(url=url), args.outdir): url for url in pending}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        outcome = future.result()
+                    except Exception as e:  # 工作进程异常退出
+                        outcome = {'video_id': parse_video_id(futures[future]), 'status': FAILED,
+                                   'error': str(e), 'elapsed': 0.0, 'chars': 0, 'cache': None}
+                    outcomes.append(outcome)
+                    if outcome['status'] == DONE:
+                        print(f".. [{len(outcomes)}/{len(pending)}] {outcome['video_id']} 完成（{outcome['elapsed']:.1f}秒）", flush=True)
+                    else:
+                        print(f".. [{len(outcomes)}/{len(pending)}] {outcome['video_id']} 失败：{outcome['error']}", flush=True)
+            except KeyboardInterrupt:
+                interrupted = True
+                for future in futures:
+                    future.cancel()
+                print(".. 已中断，已完成的视频会在下次运行时跳过", flush=True)
+
+    wall_time = time.time() - started
+    done = [o for o in outcomes if o['status'] == DONE]
+    stats = {
+        'total': len(urls),
+        'done': len(done),
+        'failed': len(outcomes) - len(done),
+        'skipped': skipped,
+        'interrupted': interrupted,
+        'workers': args.workers,
+        'wall_time': wall_time,
+        'videos_per_minute': len(done) / wall_time * 60 if wall_time > 0 else 0.0,
+        'chars_per_second': sum(o['chars'] for o in done) / wall_time if wall_time > 0 else 0.0,
+        'avg_video_seconds': sum(o['elapsed'] for o in done) / len(done) if done else 0.0,
+        'report_cache_hits': sum(1 for o in done if o.get('cache') == 'hit'),
+        'failures': {o['video_id']: o['error'] for o in outcomes if o['status'] != DONE},
+    }
+    _write_json(os.path.join(args.outdir, STATS_FILENAME), stats)
+    print(f".. {_format_stats(stats)}", flush=True)
+    return stats
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m yt_translator',
+        description='批量提取、翻译 YouTube 字幕并生成 HTML 报告',
+    )
+    parser.add_argument('inputs', nargs='+', help='视频链接、播放列表/频道链接，或每行一个链接的文本文件')
+    parser.add_argument('--outdir', default='outputs', help='输出目录（默认 outputs）')
+    parser.add_argument('--lang', default='zh-CN', help='目标语言（默认 zh-CN）')
+    parser.add_argument('--provider', choices=['google', 'deepseek'], default='google', help='翻译引擎（默认 google）')
+    parser.add_argument('--source-langs', default='en,en-US,en-GB,auto', help='源字幕语言优先级，逗号分隔')
+    parser.add_argument('--workers', type=int, default=2, help='并行处理的进程数（默认 2）')
+    parser.add_argument('--concurrency', type=int, default=4, help='每个视频内的翻译并发线程数（默认 4）')
+    parser.add_argument('--batch-size', type=int, default=100, help='Google 逐行模式每批行数（默认 100；DeepSeek 按 token 预算分批）')
+    parser.add_argument('--max-retries', type=int, default=3, help='最大重试次数（默认 3）')
+    parser.add_argument('--limit', type=int, default=0, help='最多处理的视频数（0 为不限）')
+    parser.add_argument('--no-youtube-translation', action='store_true', help='不使用 YouTube 自带翻译字幕')
+    parser.add_argument('--refresh', action='store_true', help='忽略报告缓存，重新处理')
+    parser.add_argument('--force', action='store_true', help='重新处理输出目录中已完成的视频')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if load_dotenv is not None:
+        load_dotenv()
+    args = build_parser().parse_args(argv)
+    args.workers = max(1, args.workers)
+    if args.provider == 'deepseek' and not build_config(args).deepseek_api_key:
+        print('使用 DeepSeek 时必须设置环境变量 DEEPSEEK_API_KEY', file=sys.stderr)
+        return 2
+    try:
+        stats = run_batch(args)
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    return 1 if stats['failed'] or stats['interrupted'] else 0
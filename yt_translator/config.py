@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""
+流水线配置模块：
+- PipelineConfig 是单次请求的完整配置（视频链接、目标语言、翻译引擎及其密钥/模型、Cookie 等），
+  显式传给提取器与翻译器，不再写入 os.environ；同一进程内的多个会话互不影响，
+  并继续共享进程内复用的客户端、调控器与缓存
+- from_env 从环境变量读取默认值（命令行、本地运行），只读不写
+- 构造后视为只读；需要修改时用 replace 得到新对象
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+
+DEFAULT_DEEPSEEK_BASE_URL = 'https://api.deepseek.com'
+DEFAULT_DEEPSEEK_MODEL = 'deepseek-chat'
+DEFAULT_SOURCE_LANGS = ['en', 'en-US', 'en-GB', 'auto']
+
+
+class PipelineConfig:
+    """
+    单次处理请求的配置。字段与 app 侧边栏配置字典的键一致，可用 from_dict / to_dict 互相转换。
+    - yt_cookies：Netscape 格式的 Cookie 文本；yt_browser：从该浏览器读取 Cookie（二者取其一，yt_cookies 优先）
+    - hedge_delay：对冲提取延迟（秒），None 为 API 失败后再用 yt-dlp
+    """
+
+    __slots__ = (
+        'url', 'provider', 'target_lang', 'source_langs',
+        'deepseek_api_key', 'deepseek_base_url', 'deepseek_model', 'deepseek_temperature',
+        'batch_size', 'max_retries', 'concurrent_workers',
+        'youtube_translation', 'refresh_report',
+        'yt_browser', 'yt_cookies', 'hedge_delay',
+    )
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        provider: str = 'google',
+        target_lang: str = 'zh-CN',
+        source_langs: Optional[List[str]] = None,
+        deepseek_api_key: Optional[str] = None,
+        deepseek_base_url: str = DEFAULT_DEEPSEEK_BASE_URL,
+        deepseek_model: str = DEFAULT_DEEPSEEK_MODEL,
+        deepseek_temperature: float = 0.2,
+        batch_size: int = 100,
+        max_retries: int = 3,
+        concurrent_workers: int = 4,
+        youtube_translation: bool = True,
+        refresh_report: bool = False,
+        yt_browser: Optional[str] = None,
+        yt_cookies: Optional[str] = None,
+        hedge_delay: Optional[float] = None,
+    ) -> None:
+        self.url = url
+        self.provider = provider
+        self.target_lang = target_lang
+        self.source_langs = list(source_langs) if source_langs else list(DEFAULT_SOURCE_LANGS)
+        self.deepseek_api_key = deepseek_api_key
+        self.deepseek_base_url = deepseek_base_url or DEFAULT_DEEPSEEK_BASE_URL
+        self.deepseek_model = deepseek_model or DEFAULT_DEEPSEEK_MODEL
+        self.deepseek_temperature = float(deepseek_temperature)
+        self.batch_size = int(batch_size)
+        self.max_retries = int(max_retries)
+        self.concurrent_workers = int(concurrent_workers)
+        self.youtube_translation = bool(youtube_translation)
+        self.refresh_report = bool(refresh_report)
+        self.yt_browser = yt_browser or None
+        self.yt_cookies = yt_cookies or None
+        self.hedge_delay = None if hedge_delay is None else float(hedge_delay)
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> 'PipelineConfig':
+        """
+        以环境变量为默认值构造（DEEPSEEK_*、YT_COOKIES、YT_DLP_BROWSER、YT_HEDGE_DELAY），
+        overrides 中非 None 的值优先。只读取环境变量，不修改。
+        """
+        hedge_delay: Optional[float] = None
+        if os.getenv('YT_HEDGE_DELAY'):
+            try:
+                hedge_delay = float(os.environ['YT_HEDGE_DELAY'])
+            except ValueError:
+                hedge_delay = None
+        try:
+            temperature = float(os.getenv('DEEPSEEK_TEMPERATURE', '0.2'))
+        except ValueError:
+            temperature = 0.2
+        values: Dict[str, Any] = {
+            'deepseek_api_key': os.getenv('DEEPSEEK_API_KEY'),
+            'deepseek_base_url': os.getenv('DEEPSEEK_BASE_URL', DEFAULT_DEEPSEEK_BASE_URL),
+            'deepseek_model': os.getenv('DEEPSEEK_MODEL', DEFAULT_DEEPSEEK_MODEL),
+            'deepseek_temperature': temperature,
+            'yt_browser': os.getenv('YT_DLP_BROWSER'),
+            'yt_cookies': os.getenv('YT_COOKIES'),
+            'hedge_delay': hedge_delay,
+        }
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**values)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> 'PipelineConfig':
+        """从配置字典构造；未知键忽略，缺失的键取默认值。"""
+        return cls(**{k: data[k] for k in cls.__slots__ if k in data})
+
+    @classmethod
+    def coerce(cls, config: Union['PipelineConfig', Mapping[str, Any]]) -> 'PipelineConfig':
+        """PipelineConfig 原样返回，字典按 from_dict 转换。"""
+        return config if isinstance(config, PipelineConfig) else cls.from_dict(config)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def replace(self, **changes: Any) -> 'PipelineConfig':
+        """返回修改了部分字段的新配置。"""
+        values = self.to_dict()
+        values.update(changes)
+        return PipelineConfig(**values)
+
+    def __repr__(self) -> str:
+        # 不输出密钥与 Cookie 内容
+        return (f'PipelineConfig(url={self.url!r}, provider={self.provider!r}, target_lang={self.target_lang!r}, '
+                f'model={self.deepseek_model!r}, api_key={"***" if self.deepseek_api_key else None})')
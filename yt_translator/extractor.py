@@ -3,23 +3,43 @@
 """
 字幕提取模块：
 - 优先使用 youtube-transcript-api 提取字幕
-- 失败时使用 yt-dlp 下载 .vtt 并解析
+- 失败时使用 yt-dlp（进程内 YoutubeDL，必要时退回子进程）获取 .vtt 并流式解析，合并自动字幕的滚动重复
+- 可选持久化缓存：命中时直接返回，不访问网络
+- 各提取路径接入熔断器：API 连续失败时在冷却期内直接走 yt-dlp
+- Cookie 与对冲延迟取自显式传入的 PipelineConfig，不读写进程环境变量
 """
 
 from __future__ import annotations
 
+import io
 import os
 import re
 import json
 import sys
 import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict
+from typing import Iterable, Iterator, List, Sequence, Tuple, Optional, Dict
 
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
 
+try:
+    import yt_dlp
+except Exception:  # 未安装时退回子进程方式
+    yt_dlp = None  # type: ignore
+
+from .cache import TranscriptCache
+from .config import PipelineConfig
+from .health import CircuitBreaker, get_breaker
+from .langs import same_language
+from .normalize import iter_dedupe_rolling_cues
+from .transcript import Transcript
+
 
 YOUTUBE_URL_RE = re.compile(r"(?:v=|youtu.be/)([A-Za-z0-9_-]{11})")
+_RE_VTT_LANG = re.compile(r"\.([A-Za-z]{2,3}(?:-[A-Za-z0-9]{2,8})*)\.vtt$")
 
 
 def parse_video_id(url: str) -> Optional[str]:
@@ -63,84 +83,275 @@ def _select_transcript(video_id: str, preferred_langs: List[str]) -> Tuple[List[
     raise NoTranscriptFound('No transcript available')
 
 
+# 目标语言代码到 YouTube 翻译语言代码的映射（YouTube 使用 zh-Hans / zh-Hant）
+YOUTUBE_TRANSLATION_CODES = {
+    'zh-CN': 'zh-Hans',
+    'zh-SG': 'zh-Hans',
+    'zh': 'zh-Hans',
+    'zh-TW': 'zh-Hant',
+    'zh-HK': 'zh-Hant',
+}
+
+
+def _translation_language_codes(transcript) -> List[str]:
+    """兼容不同版本的 translation_languages（dict 或对象）。"""
+    codes: List[str] = []
+    for lang in getattr(transcript, 'translation_languages', None) or []:
+        code = lang.get('language_code') if isinstance(lang, dict) else getattr(lang, 'language_code', None)
+        if code:
+            codes.append(code)
+    return codes
+
+
+def fetch_youtube_translation(video_id: str, source_lang: Optional[str], target_language: str) -> Optional[List[Dict]]:
+    """
+    使用 YouTube 自带的字幕翻译（Transcript.translate）直接获取目标语言的逐行字幕，不消耗大模型调用。
+    优先翻译与 source_lang 相同的字幕轨，其次人工字幕、再次任一可翻译的字幕轨。
+    视频不支持翻译到目标语言、API 熔断中或请求失败时返回 None。
+    """
+    target = YOUTUBE_TRANSLATION_CODES.get(target_language, target_language)
+    breaker = _path_breaker(API_SOURCE)
+    # 与 ProviderGovernor.call 一致：半开状态下占用探测名额，之后必须记录一种结果以归还
+    if not breaker.allow():
+        return None
+    started = time.monotonic()
+    try:
+        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+        tracks = list(transcript_list)
+        # 已有目标语言字幕时直接使用；否则优先翻译源语言轨，人工字幕优先
+        tracks.sort(key=lambda t: (not same_language(t.language_code, target), not same_language(t.language_code, source_lang), t.is_generated))
+        for t in tracks:
+            if same_language(t.language_code, target):
+                items = t.fetch()
+            elif t.is_translatable and target in _translation_language_codes(t):
+                items = t.translate(target).fetch()
+            else:
+                continue
+            breaker.record_success(time.monotonic() - started)
+            return items or None
+    except (NoTranscriptFound, TranscriptsDisabled):
+        # 视频没有可用的翻译：不是路径故障
+        breaker.record_neutral()
+        return None
+    except Exception:
+        breaker.record_failure(time.monotonic() - started)
+        return None
+    breaker.record_neutral()
+    return None
+
+
 def _vtt_time_to_seconds(ts: str) -> float:
-    """将 VTT 时间戳转换为秒。形如 '00:01:02.345'"""
-    h, m, s = ts.split(':')
+    """将 VTT 时间戳转换为秒。形如 '00:01:02.345'，也兼容省略小时的 '01:02.345'。"""
+    parts = ts.split(':')
+    if len(parts) == 2:
+        return int(parts[0]) * 60 + float(parts[1])
+    h, m, s = parts
     return int(h) * 3600 + int(m) * 60 + float(s)
 
 
+def iter_vtt_cues(lines: Iterable[str]) -> Iterator[Dict]:
+    """
+    逐行解析 WebVTT，按需产出字幕条目。
+    lines 可以是打开的文件对象，整个文件不会被读入内存。
+    """
+    it = iter(lines)
+    for raw in it:
+        if '-->' not in raw:
+            continue
+        try:
+            start_s, end_s = [p.strip().split(' ')[0] for p in raw.strip().split('-->')]
+            start = _vtt_time_to_seconds(start_s)
+            end = _vtt_time_to_seconds(end_s)
+        except Exception:
+            continue
+        text_lines: List[str] = []
+        for raw_text in it:
+            # 只有真正的空行才结束一条字幕；YouTube 自动字幕首行常为单个空格占位
+            if not raw_text.rstrip('\r\n'):
+                break
+            line = raw_text.strip()
+            if line:
+                text_lines.append(line)
+        yield {
+            'start': round(start, 3),
+            'duration': round(end - start, 3),
+            'text': _clean_vtt_inline_markup(' '.join(text_lines)),
+        }
+
+
 def _parse_vtt(vtt_text: str) -> List[Dict]:
     """解析 WebVTT 内容为字幕条目列表。"""
-    items: List[Dict] = []
-    lines = vtt_text.splitlines()
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        if '-->' in line:
-            try:
-                start_s, end_s = [p.strip().split(' ')[0] for p in line.split('-->')]
-                start = _vtt_time_to_seconds(start_s)
-                end = _vtt_time_to_seconds(end_s)
-                text_lines: List[str] = []
-                i += 1
-                while i < len(lines) and lines[i].strip():
-                    text_lines.append(lines[i].strip())
-                    i += 1
-                text = ' '.join(text_lines)
-                text = _clean_vtt_inline_markup(text)
-                items.append({
-                    'start': round(start, 3),
-                    'duration': round(end - start, 3),
-                    'text': text,
-                })
-            except Exception:
-                i += 1
-                continue
-        i += 1
-    return items
+    return list(iter_vtt_cues(io.StringIO(vtt_text)))
+
 
+# 行内标记一次性清理：<c>...</c>、<v Speaker>、<00:00:01.000>、<i>/<b> 以及方向/BOM 控制字符
+_RE_INLINE_MARKUP = re.compile(
+    r"</?c[^>]*>|<v[^>]*>|<\d{2}:\d{2}:\d{2}\.\d{3}>|</?[ib]>|[\u200e\u200f\ufeff]"
+)
 
-_RE_TAG_C = re.compile(r"</?c[^>]*>")
-_RE_TAG_V = re.compile(r"<v[^>]*>")
-_RE_TIME_INLINE = re.compile(r"<\d{2}:\d{2}:\d{2}\.\d{3}>")
-_RE_ITALIC = re.compile(r"</?i>")
-_RE_BOLD = re.compile(r"</?b>")
-_RE_SPACES = re.compile(r"\s{2,}")
 
 def _clean_vtt_inline_markup(text: str) -> str:
     """清理 VTT 行内标记，例如 <c>...</c>、<00:00:01.000>、<v Speaker> 等。"""
-    t = text
-    t = _RE_TAG_C.sub('', t)
-    t = _RE_TAG_V.sub('', t)
-    t = _RE_TIME_INLINE.sub('', t)
-    t = _RE_ITALIC.sub('', t)
-    t = _RE_BOLD.sub('', t)
-    # 常见转义字符处理
-    t = t.replace('\u200e', '').replace('\u200f', '').replace('\ufeff', '')
-    t = _RE_SPACES.sub(' ', t).strip()
-    return t
-
-
-def _try_ytdlp_vtt(url: str, workdir: str) -> Tuple[List[Dict], Optional[str], Optional[str], List[Dict]]:
-    """使用 yt-dlp 下载 vtt 字幕（优先人工字幕，退回自动字幕）并解析。返回 (items, lang, title, chapters)。"""
+    if '<' in text or '\u200e' in text or '\u200f' in text or '\ufeff' in text:
+        text = _RE_INLINE_MARKUP.sub('', text)
+    # 合并连续空白
+    return ' '.join(text.split())
+
+
+def _read_vtt_cues(lines: Iterable[str], automatic: bool = False) -> Tuple[Transcript, Optional[Dict[str, int]]]:
+    """
+    逐行流式解析 VTT：解析 → （自动字幕）滚动去重 → Transcript 串成生成器链，
+    不把整个文件读成字符串，也不生成中间的字幕列表。
+    automatic=True（自动字幕）时合并滚动字幕中的重复内容；人工字幕原样保留，重复的台词是真实内容。
+    返回 (字幕, 去重统计)；未去重时统计为 None。
+    """
+    if not automatic:
+        return Transcript.from_items(iter_vtt_cues(lines)), None
+    dedup_stats: Dict[str, int] = {}
+    transcript = Transcript.from_items(iter_dedupe_rolling_cues(iter_vtt_cues(lines), dedup_stats))
+    return transcript, dedup_stats
+
+
+def _log_dedup(dedup_stats: Optional[Dict[str, int]]) -> None:
+    """输出滚动字幕去重的统计（有重复被移除时）。"""
+    if dedup_stats and dedup_stats['tokens_removed']:
+        print(
+            f".. 滚动字幕去重：{dedup_stats['cues_in']} 条合并为 {dedup_stats['cues_out']} 条，"
+            f"移除重复词 {dedup_stats['tokens_removed']}/{dedup_stats['tokens_in']}",
+            flush=True,
+        )
+
+
+def ytdlp_cookie_options(config: PipelineConfig) -> Dict:
+    """按配置构造 YoutubeDL 的 Cookie 参数；Cookie 内容直接以内存文件传入，不落盘。"""
+    if config.yt_cookies:
+        return {'cookiefile': io.StringIO(config.yt_cookies)}
+    if config.yt_browser:
+        return {'cookiesfrombrowser': (config.yt_browser,)}
+    return {}
+
+
+def _strip_orig(code: str) -> str:
+    """自动字幕的原始语言轨形如 'en-orig'，返回其真实语言代码。"""
+    return code[:-len('-orig')] if code.endswith('-orig') else code
+
+
+def _pick_subtitle_track(info: Dict, preferred_langs: List[str]) -> Tuple[Optional[str], Optional[Dict], bool]:
+    """
+    从一次元数据提取结果中选出最匹配的字幕轨，返回 (语言代码, vtt 格式条目, 是否为自动字幕)。
+    按 preferred_langs 顺序匹配，人工字幕优先于自动字幕；语言代码先精确匹配，再按主语言匹配（en -> en-US）。
+    都不匹配且允许 auto 时，退回任一人工字幕或自动字幕的原始语言轨（*-orig）。
+    """
+    manual = {k: v for k, v in (info.get('subtitles') or {}).items() if k != 'live_chat'}
+    automatic = info.get('automatic_captions') or {}
+
+    def vtt_format(formats: List[Dict]) -> Optional[Dict]:
+        for fmt in formats or []:
+            if fmt.get('ext') == 'vtt' and fmt.get('url'):
+                return fmt
+        return None
+
+    def lookup(tracks: Dict, want: str) -> Tuple[Optional[str], Optional[Dict]]:
+        candidates = [k for k in tracks if k.lower() == want.lower()]
+        # 主语言匹配时，原始语言轨（*-orig）优先于机器翻译轨
+        related = [k for k in tracks if k.split('-')[0].lower() == want.split('-')[0].lower() and k not in candidates]
+        candidates += sorted(related, key=lambda k: (not k.endswith('-orig'), len(k)))
+        for code in candidates:
+            fmt = vtt_format(tracks[code])
+            if fmt is not None:
+                return _strip_orig(code), fmt
+        return None, None
+
+    for want in preferred_langs:
+        if want == 'auto':
+            continue
+        for tracks in (manual, automatic):
+            code, fmt = lookup(tracks, want)
+            if fmt is not None:
+                return code, fmt, tracks is automatic
+    if 'auto' in preferred_langs or not preferred_langs:
+        for code, formats in manual.items():
+            fmt = vtt_format(formats)
+            if fmt is not None:
+                return code, fmt, False
+        for code, formats in automatic.items():
+            fmt = vtt_format(formats)
+            if code.endswith('-orig') and fmt is not None:
+                return _strip_orig(code), fmt, True
+    return None, None, False
+
+
+def _try_ytdlp_inprocess(url: str, preferred_langs: List[str], config: PipelineConfig, cancel: Optional[threading.Event] = None) -> Tuple[Sequence[Dict], Optional[str], Optional[str], List[Dict]]:
+    """
+    在当前进程内使用 yt_dlp.YoutubeDL 提取字幕：
+    只做一次元数据提取，从中同时获得人工/自动字幕列表、标题与章节，
+    仅把最匹配的一条字幕轨下载到内存并流式解析，不读写文件系统。
+    返回 (items, lang, title, chapters)；yt-dlp 未安装或提取出错时抛出异常。
+    元数据提取无法中途打断，cancel 被置位后不再下载字幕轨。
+    """
+    if yt_dlp is None:
+        raise RuntimeError('未安装 yt-dlp')
+    opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True,
+        'skip_download': True,
+        'noplaylist': True,
+        'socket_timeout': 30,
+        **ytdlp_cookie_options(config),
+    }
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        # process=False：跳过格式选择，只需要字幕与元数据
+        info = ydl.extract_info(url, download=False, process=False) or {}
+        title = info.get('title')
+        chapters = info.get('chapters') or []
+        lang, fmt, is_automatic = _pick_subtitle_track(info, preferred_langs)
+        if fmt is None or (cancel is not None and cancel.is_set()):
+            return [], None, title, chapters
+        with ydl.urlopen(fmt['url']) as resp:
+            items, dedup_stats = _read_vtt_cues(io.TextIOWrapper(resp, encoding='utf-8'), automatic=is_automatic)
+    _log_dedup(dedup_stats)
+    return items, lang, title, chapters
+
+
+def _run_cancellable(cmd: List[str], timeout: float, cancel: Optional[threading.Event]) -> Optional[int]:
+    """运行子进程并返回退出码；超时或 cancel 被置位时结束进程并返回 None。"""
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except Exception:
+        return None
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return proc.wait(timeout=0.2)
+        except subprocess.TimeoutExpired:
+            pass
+        if (cancel is not None and cancel.is_set()) or time.monotonic() > deadline:
+            proc.kill()
+            proc.wait()
+            return None
+
+
+def _try_ytdlp_vtt(url: str, workdir: str, config: PipelineConfig, cancel: Optional[threading.Event] = None) -> Tuple[Sequence[Dict], Optional[str], Optional[str], List[Dict]]:
+    """
+    使用 yt-dlp 子进程下载 vtt 字幕（优先人工字幕，退回自动字幕）并解析。返回 (items, lang, title, chapters)。
+    cancel 被置位时立即结束正在运行的子进程。
+    """
     Path(workdir).mkdir(parents=True, exist_ok=True)
     
-    # 根据环境变量决定 Cookie 配置
+    # 根据配置决定 Cookie 参数
     cookie_args: List[str] = []
     
-    # 方式1：从 Secrets 读取 Cookie 内容（Streamlit Cloud 推荐）
-    yt_cookies_content = os.getenv('YT_COOKIES')
-    if yt_cookies_content:
+    # 方式1：Cookie 内容（Streamlit Cloud 从 Secrets 读取）
+    if config.yt_cookies:
         # 将 Cookie 内容写入临时文件
         cookies_file = os.path.join(workdir, 'cookies.txt')
         with open(cookies_file, 'w', encoding='utf-8') as f:
-            f.write(yt_cookies_content)
+            f.write(config.yt_cookies)
         cookie_args = ['--cookies', cookies_file]
-    # 方式2：从浏览器读取 Cookie（本地开发使用）
-    else:
-        browser = os.getenv('YT_DLP_BROWSER')  # 例如: 'chrome' 或 'safari'
-        if browser:
-            cookie_args = ['--cookies-from-browser', browser]
+    # 方式2：从浏览器读取 Cookie（本地开发使用），例如 'chrome' 或 'safari'
+    elif config.yt_browser:
+        cookie_args = ['--cookies-from-browser', config.yt_browser]
 
     attempts = [
         [
@@ -173,27 +384,16 @@ def _try_ytdlp_vtt(url: str, workdir: str) -> Tuple[List[Dict], Optional[str], O
         ],
     ]
     ran_ok = False
+    is_automatic = False  # 成功的是第二个（--write-auto-sub）命令时为自动字幕
     timeout_seconds = 300  # 5分钟超时，适合长视频
-    for cmd in attempts:
-        try:
-            result = subprocess.run(
-                cmd, 
-                check=True, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                timeout=timeout_seconds,
-                text=True
-            )
+    for attempt, cmd in enumerate(attempts):
+        if cancel is not None and cancel.is_set():
+            break
+        # 超时、失败或被取消：继续尝试下一个方法（取消时循环开头直接退出）
+        if _run_cancellable(cmd, timeout_seconds, cancel) == 0:
             ran_ok = True
+            is_automatic = attempt == 1
             break
-        except subprocess.TimeoutExpired:
-            # 超时：继续尝试下一个方法
-            continue
-        except subprocess.CalledProcessError as e:
-            # 命令执行失败：继续尝试下一个方法
-            continue
-        except Exception:
-            continue
     if not ran_ok:
         return [], None, None, []
     # 找到 vtt 与 info.json
@@ -218,37 +418,221 @@ def _try_ytdlp_vtt(url: str, workdir: str) -> Tuple[List[Dict], Optional[str], O
     if not vtt_path or not os.path.exists(vtt_path):
         return [], None, title, chapters
     with open(vtt_path, 'r', encoding='utf-8') as f:
-        vtt_text = f.read()
-    items = _parse_vtt(vtt_text)
-    # 语言从文件名或 vtt 头部猜测（简化处理）
+        items, dedup_stats = _read_vtt_cues(f, automatic=is_automatic)
+    _log_dedup(dedup_stats)
+    # 语言从文件名（<id>.<lang>.vtt）中解析，兼容 zh-Hans、en-US、en-orig 等形式
     lang = None
-    m = re.search(r"\.(\w\w(?:-\w\w)?)\.vtt$", os.path.basename(vtt_path))
+    m = _RE_VTT_LANG.search(os.path.basename(vtt_path))
     if m:
-        lang = m.group(1)
+        lang = _strip_orig(m.group(1))
     return items, lang, title, chapters
 
 
-def extract_transcript_with_fallback(url: str, preferred_langs: List[str], workdir: str) -> Tuple[List[Dict], Optional[str], Optional[str], str, List[Dict]]:
+API_SOURCE = 'youtube-transcript-api'
+YTDLP_SOURCE = 'yt-dlp'
+
+
+class ExtractionStats:
+    """对冲提取统计：各路径的尝试、获胜、失败次数与耗时，进程内共享。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._paths: Dict[str, Dict[str, float]] = {}
+
+    def record(self, path: str, latency: Optional[float], ok: bool, won: bool) -> None:
+        """latency 为 None 表示该路径落败时尚未结束、已被取消。"""
+        with self._lock:
+            p = self._paths.setdefault(path, {'attempts': 0, 'wins': 0, 'failures': 0, 'cancelled': 0, 'total_latency': 0.0, 'max_latency': 0.0})
+            p['attempts'] += 1
+            p['wins'] += int(won)
+            if latency is None:
+                p['cancelled'] += 1
+                return
+            p['failures'] += int(not ok)
+            p['total_latency'] += latency
+            p['max_latency'] = max(p['max_latency'], latency)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            out: Dict[str, Dict[str, float]] = {}
+            for path, p in self._paths.items():
+                finished = max(1, int(p['attempts'] - p['cancelled']))
+                out[path] = {
+                    'attempts': p['attempts'],
+                    'wins': p['wins'],
+                    'failures': p['failures'],
+                    'cancelled': p['cancelled'],
+                    'win_rate': p['wins'] / max(1, int(p['attempts'])),
+                    'avg_latency': p['total_latency'] / finished,
+                    'max_latency': p['max_latency'],
+                }
+            return out
+
+
+_extraction_stats = ExtractionStats()
+
+
+def get_extraction_stats() -> Dict[str, Dict[str, float]]:
+    """返回各提取路径的胜率与耗时统计。"""
+    return _extraction_stats.stats()
+
+
+def _api_leg(video_id: str, preferred_langs: List[str]) -> Tuple[List[Dict], Optional[str], Optional[str], List[Dict]]:
+    # 获取视频标题（通过 transcript list 的 metadata 不稳定，这里不强求）
+    items, lang = _select_transcript(video_id, preferred_langs)
+    return items, lang, None, []
+
+
+def _ytdlp_leg(url: str, preferred_langs: List[str], workdir: str, config: PipelineConfig, cancel: Optional[threading.Event] = None) -> Tuple[Sequence[Dict], Optional[str], Optional[str], List[Dict]]:
+    """yt-dlp 路径：优先进程内提取，出错时退回子进程方式；两种方式都出错时抛出异常。"""
+    try:
+        return _try_ytdlp_inprocess(url, preferred_langs, config, cancel)
+    except Exception as e:
+        if cancel is not None and cancel.is_set():
+            return [], None, None, []
+        result = _try_ytdlp_vtt(url, workdir, config, cancel)
+        if not result[0] and not (cancel is not None and cancel.is_set()):
+            raise RuntimeError('yt-dlp 提取失败') from e
+        return result
+
+
+def _path_breaker(path: str) -> CircuitBreaker:
+    return get_breaker(f'extract:{path}')
+
+
+def _timed(path: str, fn, *args) -> Tuple[str, float, Optional[Tuple[List[Dict], Optional[str], Optional[str], List[Dict]]]]:
+    """
+    执行一条提取路径，返回 (路径, 耗时, 结果)；异常或空结果时结果为 None。
+    结果同时计入该路径的熔断器：视频本身没有字幕不算路径故障。
+    """
+    breaker = _path_breaker(path)
+    started = time.monotonic()
+    try:
+        result = fn(*args)
+    except (NoTranscriptFound, TranscriptsDisabled):
+        breaker.record_neutral()
+        return path, time.monotonic() - started, None
+    except Exception:
+        latency = time.monotonic() - started
+        breaker.record_failure(latency)
+        return path, latency, None
+    latency = time.monotonic() - started
+    if not result[0]:
+        breaker.record_neutral()
+        return path, latency, None
+    breaker.record_success(latency)
+    return path, latency, result
+
+
+def _extract_hedged(url: str, video_id: str, preferred_langs: List[str], workdir: str, hedge_delay: Optional[float], config: PipelineConfig) -> Tuple[List[Dict], Optional[str], Optional[str], str, List[Dict]]:
+    """
+    对冲提取：先启动 API 请求，hedge_delay 秒内未返回（或已失败）即并行启动 yt-dlp；
+    hedge_delay 为 None 时等 API 失败后再启动 yt-dlp。
+    先得到有效字幕的路径获胜；yt-dlp 落败时置位取消事件以结束其子进程，API 落败时结果直接丢弃。
+    """
+    cancel = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='yt-extract')
+    pending = {executor.submit(_timed, API_SOURCE, _api_leg, video_id, preferred_langs)}
+    started = {API_SOURCE}
+    winner: Optional[Tuple[str, Tuple[List[Dict], Optional[str], Optional[str], List[Dict]]]] = None
+    outcomes: Dict[str, Tuple[Optional[float], bool]] = {}
+    try:
+        done, pending = wait(pending, timeout=None if hedge_delay is None else max(0.0, hedge_delay))
+        while True:
+            for fut in done:
+                path, latency, result = fut.result()
+                outcomes[path] = (latency, result is not None)
+                if result is not None and winner is None:
+                    winner = (path, result)
+            if winner is not None:
+                break
+            if YTDLP_SOURCE not in started:
+                started.add(YTDLP_SOURCE)
+                pending.add(executor.submit(_timed, YTDLP_SOURCE, _ytdlp_leg, url, preferred_langs, workdir, config, cancel))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+    finally:
+        # 落败路径：yt-dlp 子进程被结束，API 线程在后台自然结束
+        cancel.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for path in started:
+        latency, ok = outcomes.get(path, (None, False))
+        _extraction_stats.record(path, latency, ok, winner is not None and winner[0] == path)
+        if latency is None:
+            # 被取消的路径不计入熔断，归还可能占用的探测名额
+            _path_breaker(path).record_neutral()
+    if winner is None:
+        return [], None, None, YTDLP_SOURCE, []
+    path, (items, lang, title, chapters) = winner
+    print(f".. 对冲提取：{path} 获胜（{outcomes[path][0]:.1f}s）", flush=True)
+    return items, lang, title, path, chapters
+
+
+def _extract_ytdlp_only(url: str, preferred_langs: List[str], workdir: str, config: PipelineConfig) -> Tuple[List[Dict], Optional[str], Optional[str], str, List[Dict]]:
+    path, latency, result = _timed(YTDLP_SOURCE, _ytdlp_leg, url, preferred_langs, workdir, config)
+    _extraction_stats.record(path, latency, result is not None, result is not None)
+    items, lang, title, chapters = result if result is not None else ([], None, None, [])
+    return items, lang, title, YTDLP_SOURCE, chapters
+
+
+def extract_transcript_with_fallback(url: str, preferred_langs: List[str], workdir: str, cache: Optional[TranscriptCache] = None, hedge_delay: Optional[float] = None, config: Optional[PipelineConfig] = None) -> Tuple[Transcript, Optional[str], Optional[str], str, List[Dict]]:
     """
     提取字幕，优先使用 API，失败则 ytdlp 兜底。
-    返回 (items, detected_lang, title, source_name, chapters)。
+    hedge_delay 不为 None 时使用对冲模式：API 在该秒数内未返回即并行启动 yt-dlp，先成功者获胜（0 表示同时启动）；
+    未传入时取 config.hedge_delay，均未设置则按顺序兜底。
+    config 提供 yt-dlp 的 Cookie 设置；未传入时按环境变量构造（PipelineConfig.from_env）。
+    API 路径熔断期间直接走 yt-dlp；yt-dlp 作为最后手段总会尝试。
+    传入 cache 时先查缓存，命中则跳过网络请求；提取成功后写回缓存。
+    返回 (transcript, detected_lang, title, source_name, chapters)；字幕以紧凑的 Transcript 返回，
+    其下标访问与迭代仍得到 {'start', 'duration', 'text'} 字典。
     """
     video_id = parse_video_id(url)
     title: Optional[str] = None
     if not video_id:
-        return [], None, title, 'unknown', []
-    # 先尝试 API
-    try:
-        items, lang = _select_transcript(video_id, preferred_langs)
-        # 获取视频标题（通过 transcript list 的 metadata 不稳定，这里不强求）
-        title = None
-        return items, lang, title, 'youtube-transcript-api', []
-    except Exception:
-        pass
-    # 兜底：yt-dlp 解析 vtt
-    items, lang, title, chapters = _try_ytdlp_vtt(url, workdir)
-    return items, lang, title, 'yt-dlp', chapters
-
+        return Transcript.from_items([]), None, title, 'unknown', []
+    if cache is not None:
+        try:
+            cached = cache.lookup(video_id, preferred_langs)
+        except Exception:
+            cached = None
+        if cached is not None:
+            items, lang, title, source, chapters = cached
+            return Transcript.from_items(items), lang, title, source, chapters
+    if config is None:
+        config = PipelineConfig.from_env()
+    if hedge_delay is None:
+        hedge_delay = config.hedge_delay
 
+    if not _path_breaker(API_SOURCE).allow():
+        print(f".. {API_SOURCE} 熔断中，直接使用 yt-dlp", flush=True)
+        result = _extract_ytdlp_only(url, preferred_langs, workdir, config)
+    elif hedge_delay is not None:
+        # yt-dlp 熔断时不提前对冲，只在 API 失败后作为最后手段
+        delay = hedge_delay if _path_breaker(YTDLP_SOURCE).available() else None
+        result = _extract_hedged(url, video_id, preferred_langs, workdir, delay, config)
+    else:
+        # 先尝试 API
+        path, latency, api_result = _timed(API_SOURCE, _api_leg, video_id, preferred_langs)
+        _extraction_stats.record(path, latency, api_result is not None, api_result is not None)
+        if api_result is not None:
+            items, lang, title, chapters = api_result
+            result = (items, lang, title, API_SOURCE, chapters)
+        else:
+            # 兜底：yt-dlp 解析 vtt
+            result = _extract_ytdlp_only(url, preferred_langs, workdir, config)
+    items, lang, title, source, chapters = result
+    transcript = Transcript.from_items(items)
+    _store_in_cache(cache, video_id, transcript, lang, title, source, chapters, preferred_langs)
+    return transcript, lang, title, source, chapters
 
 
+def _store_in_cache(cache: Optional[TranscriptCache], video_id: str, items: Sequence[Dict], lang: Optional[str], title: Optional[str], source: str, chapters: List[Dict], preferred_langs: Optional[List[str]] = None) -> None:
+    """仅缓存非空结果；缓存写入失败不影响主流程。"""
+    if cache is None or not items:
+        return
+    try:
+        cache.store(video_id, items, lang, title, source, chapters, preferred_langs)
+    except Exception:
+        pass
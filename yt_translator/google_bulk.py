@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""
+Google 批量翻译模块：
+- 将多行文本以换行拼接，在约 5000 字符的上限内一次请求翻译
+- 返回结果按换行拆回各行；行数对不上时二分拆分重试，直到单行
+- 每个线程使用各自的 requests.Session（连接复用），避免共享实例的线程安全问题
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+
+GOOGLE_TRANSLATE_URL = 'https://translate.google.com/m'
+# Google 网页接口单次上限 5000 字符，预留换行与编码余量
+GOOGLE_MAX_CHARS = 4800
+
+
+class GoogleHTTPError(Exception):
+    """Google 接口返回非 200 状态码；status_code 供调控器判断是否可重试。"""
+
+    def __init__(self, status_code: int, message: str = '') -> None:
+        super().__init__(message or f'Google 翻译请求失败：HTTP {status_code}')
+        self.status_code = status_code
+
+
+def pack_lines(lines: List[str], max_chars: int = GOOGLE_MAX_CHARS) -> List[List[int]]:
+    """按字符上限把行索引打包成块；单行超限时独占一块。"""
+    chunks: List[List[int]] = []
+    cur: List[int] = []
+    size = 0
+    for idx, line in enumerate(lines):
+        n = len(line) + 1
+        if cur and size + n > max_chars:
+            chunks.append(cur)
+            cur, size = [], 0
+        cur.append(idx)
+        size += n
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+class GoogleBulkTranslator:
+    """Google 批量翻译器：一次请求翻译多行，并在行数不一致时二分修复。"""
+
+    def __init__(self, target: str, source: str = 'auto', max_chars: int = GOOGLE_MAX_CHARS, timeout: float = 30.0) -> None:
+        self.target = target
+        self.source = source
+        self.max_chars = max_chars
+        self.timeout = timeout
+        self.requests_made = 0
+        self._count_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session: Optional[requests.Session] = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = 'Mozilla/5.0'
+            self._local.session = session
+        return session
+
+    def _request(self, text: str) -> str:
+        """发送一次翻译请求，返回译文（保留换行）。"""
+        with self._count_lock:
+            self.requests_made += 1
+        resp = self._session().get(
+            GOOGLE_TRANSLATE_URL,
+            params={'sl': self.source, 'tl': self.target, 'q': text},
+            timeout=self.timeout,
+        )
+        if resp.status_code != 200:
+            raise GoogleHTTPError(resp.status_code)
+        soup = BeautifulSoup(resp.text, 'html.parser')
+        element = soup.find('div', {'class': 'result-container'}) or soup.find('div', {'class': 't0'})
+        if element is None:
+            raise GoogleHTTPError(502, 'Google 翻译结果解析失败')
+        return element.get_text()
+
+    def translate_lines(self, lines: List[str]) -> List[str]:
+        """
+        翻译一组行（调用方保证总长度不超过 max_chars）。
+        空行原样返回，不占用请求；行内换行会被替换为空格。
+        """
+        out = list(lines)
+        todo = [i for i, line in enumerate(lines) if line.strip()]
+        if not todo:
+            return out
+        flat = [' '.join(lines[i].split()) for i in todo]
+        for i, val in zip(todo, self._translate_flat(flat)):
+            out[i] = val
+        return out
+
+    def _translate_flat(self, flat: List[str]) -> List[str]:
+        """拼接翻译；行数对不上时二分拆分重试。"""
+        if len(flat) == 1:
+            return [self._request(flat[0]).strip()]
+        result = [ln.strip() for ln in self._request('\n'.join(flat)).strip().split('\n')]
+        if len(result) == len(flat):
+            return result
+        mid = len(flat) // 2
+        return self._translate_flat(flat[:mid]) + self._translate_flat(flat[mid:])
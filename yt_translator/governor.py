@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+"""
+提供方调用调控模块：
+- 错误分类：区分可重试（超时、5xx、429）与不可重试（401/403/400 等）错误
+- 遵循 Retry-After；其余情况使用带抖动的指数退避
+- AIMD 并发控制：无限流时加性增加在途请求数，遇到 429 或延迟明显升高时乘性减少
+- 按提供方在进程内共享，多会话共同遵守同一限额
+- 接入熔断器：提供方连续失败时直接拒绝调用，不再逐个任务超时重试
+"""
+
+from __future__ import annotations
+
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .health import CircuitOpenError, get_breaker
+
+
+T = TypeVar('T')
+
+# 不可重试的 HTTP 状态码：鉴权失败、无权限、请求错误、资源不存在等
+_FATAL_STATUS = frozenset({400, 401, 403, 404, 405, 409, 413, 422})
+# 按异常类名识别（不强依赖 openai / httpx / deep-translator 的具体版本）
+_FATAL_NAMES = frozenset({
+    'AuthenticationError', 'PermissionDeniedError', 'BadRequestError', 'NotFoundError',
+    'UnprocessableEntityError', 'ConflictError', 'LanguageNotSupportedException',
+    'NotValidPayload', 'NotValidLength', 'InvalidSourceOrTargetLanguage', 'CircuitOpenError',
+})
+_THROTTLE_NAMES = frozenset({'RateLimitError', 'TooManyRequests'})
+
+
+class ErrorInfo:
+    """错误分类结果。"""
+
+    __slots__ = ('retryable', 'throttled', 'retry_after', 'status')
+
+    def __init__(self, retryable: bool, throttled: bool = False, retry_after: Optional[float] = None, status: Optional[int] = None) -> None:
+        self.retryable = retryable
+        self.throttled = throttled
+        self.retry_after = retry_after
+        self.status = status
+
+
+def _parse_retry_after(headers: Any) -> Optional[float]:
+    """解析 Retry-After / retry-after-ms 响应头，返回等待秒数。"""
+    if not headers:
+        return None
+    try:
+        ms = headers.get('retry-after-ms')
+        if ms:
+            return max(0.0, float(ms) / 1000.0)
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def classify_error(exc: BaseException) -> ErrorInfo:
+    """将提供方调用的异常分类为可重试/不可重试，并提取限流等待时间。"""
+    response = getattr(exc, 'response', None)
+    status = getattr(exc, 'status_code', None) or getattr(response, 'status_code', None)
+    retry_after = _parse_retry_after(getattr(response, 'headers', None))
+    name = type(exc).__name__
+    if status == 429 or name in _THROTTLE_NAMES:
+        return ErrorInfo(True, True, retry_after, 429)
+    if name in _FATAL_NAMES or (isinstance(status, int) and status in _FATAL_STATUS):
+        return ErrorInfo(False, status=status)
+    # 超时、连接错误、5xx 及未知错误均视为可重试
+    return ErrorInfo(True, retry_after=retry_after, status=status)
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 60.0) -> float:
+    """带抖动的指数退避（full jitter）：在 [base/2, min(cap, base * 2^attempt)] 内随机取值。"""
+    ceiling = min(cap, base * (2 ** attempt))
+    return random.uniform(min(base / 2, ceiling), ceiling)
+
+
+class AIMDController:
+    """
+    AIMD 并发限额：
+    - 每次成功且延迟正常时，限额加性增加约 1/limit（约每轮往返 +1）
+    - 遇到 429 时限额减半；短期平均延迟超过长期基线 latency_factor 倍时减少 10%
+    - 延迟按请求类型（kind，如逐行批次、标题、整段翻译）分别统计基线，
+      耗时差异很大的请求共用一个调控器时不会互相抬高平均值而误判拥塞
+    - 同一冷却窗口内只做一次乘性减少，避免一批 429 把限额压到最低
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 64, latency_factor: float = 3.0, decrease_cooldown: float = 2.0) -> None:
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(self.max_limit, max(self.min_limit, int(initial))))
+        self.latency_factor = latency_factor
+        self.decrease_cooldown = decrease_cooldown
+        # 按请求类型的快/慢延迟均值与样本数
+        self.baseline_latency: Dict[str, float] = {}
+        self.fast_latency: Dict[str, float] = {}
+        self._samples: Dict[str, int] = {}
+        self.throttled = 0
+        self.successes = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def on_success(self, latency: float, kind: str = 'default') -> None:
+        with self._lock:
+            self.successes += 1
+            # 同类请求的快/慢两条指数滑动平均：短期延迟持续高于长期基线时视为拥塞
+            samples = self._samples.get(kind, 0) + 1
+            self._samples[kind] = samples
+            if samples == 1:
+                fast = baseline = latency
+            else:
+                fast = self.fast_latency[kind] + (latency - self.fast_latency[kind]) * 0.2
+                baseline = self.baseline_latency[kind] + (latency - self.baseline_latency[kind]) * 0.02
+            self.fast_latency[kind] = fast
+            self.baseline_latency[kind] = baseline
+            if samples > 20 and fast > baseline * self.latency_factor:
+                self._decrease_locked(0.9)
+                return
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.throttled += 1
+            self._decrease_locked(0.5)
+
+    def _decrease_locked(self, factor: float) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * factor)
+
+    @property
+    def current(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+
+class ProviderGovernor:
+    """
+    单个提供方的调用调控器：限制在途请求数，并统一处理重试、退避与限流。
+    同步调用使用 call，协程调用使用 acall，二者共享同一在途计数。
+    kind 标识请求类型，成功延迟按类型分别计入 AIMD 的拥塞判断。
+    """
+
+    def __init__(self, name: str, initial_limit: int = 4, max_limit: int = 64) -> None:
+        self.name = name
+        self.controller = AIMDController(initial=initial_limit, max_limit=max_limit)
+        self.in_flight = 0
+        self.fatal_errors = 0
+        self.retries = 0
+        self.breaker = get_breaker(f'provider:{name}', failure_threshold=5, cooldown=30.0)
+        self._cond = threading.Condition()
+
+    def _try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < self.controller.current:
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= self.controller.current:
+                self._cond.wait(0.5)
+            self.in_flight += 1
+
+    async def acquire_async(self) -> None:
+        delay = 0.005
+        while not self._try_acquire():
+            await asyncio.sleep(delay)
+            delay = min(0.1, delay * 2)
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._cond.notify_all()
+
+    def _after_failure(self, exc: BaseException, attempt: int, max_retries: int, base_delay: float) -> float:
+        """记录失败并返回需要等待的秒数；不可重试或重试耗尽时重新抛出异常。"""
+        info = classify_error(exc)
+        if info.throttled:
+            self.controller.on_throttle()
+        # 限流与不可重试错误说明提供方可达，不计入熔断
+        if info.throttled or not info.retryable:
+            self.breaker.record_neutral()
+        else:
+            self.breaker.record_failure()
+        if not info.retryable:
+            self.fatal_errors += 1
+            raise exc
+        if attempt >= max_retries:
+            raise exc
+        self.retries += 1
+        delay = backoff_delay(attempt, base_delay)
+        if info.retry_after is not None:
+            delay = max(delay, info.retry_after)
+        return delay
+
+    def call(self, fn: Callable[[], T], max_retries: int = 3, base_delay: float = 2.0, kind: str = 'default') -> T:
+        """
+        同步调用 fn，按错误类型决定是否重试；最终失败时抛出最后一次异常。
+        熔断器打开时（包括重试途中）直接抛出 CircuitOpenError。
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(self.name)
+            self.acquire()
+            started = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                self.release()
+                time.sleep(self._after_failure(e, attempt, max_retries, base_delay))
+                attempt += 1
+                continue
+            self.release()
+            latency = time.monotonic() - started
+            self.controller.on_success(latency, kind)
+            self.breaker.record_success(latency)
+            return result
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], max_retries: int = 3, base_delay: float = 2.0, kind: str = 'default') -> T:
+        """协程版本的 call。"""
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(self.name)
+            await self.acquire_async()
+            started = time.monotonic()
+            try:
+                result = await fn()
+            except Exception as e:
+                self.release()
+                await asyncio.sleep(self._after_failure(e, attempt, max_retries, base_delay))
+                attempt += 1
+                continue
+            self.release()
+            latency = time.monotonic() - started
+            self.controller.on_success(latency, kind)
+            self.breaker.record_success(latency)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'limit': self.controller.current,
+            'in_flight': self.in_flight,
+            'successes': self.controller.successes,
+            'throttled': self.controller.throttled,
+            'retries': self.retries,
+            'fatal_errors': self.fatal_errors,
+            'baseline_latency': dict(self.controller.baseline_latency),
+            'circuit': self.breaker.stats()['state'],
+        }
+
+
+_governors: Dict[str, ProviderGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(name: str, initial_limit: int = 4, max_limit: int = 64) -> ProviderGovernor:
+    """返回进程内按提供方共享的调控器；初始限额仅在首次创建时生效。"""
+    with _governors_lock:
+        governor = _governors.get(name)
+        if governor is None:
+            governor = ProviderGovernor(name, initial_limit=initial_limit, max_limit=max_limit)
+            _governors[name] = governor
+        return governor
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+健康状态与熔断模块：
+- 按路径/提供方记录成功率与延迟（字幕 API、yt-dlp、各翻译提供方）
+- 连续失败达到阈值后熔断（open），冷却期内直接跳过该路径，走健康的备用路径
+- 冷却结束后进入半开（half-open），只放行少量探测请求；探测成功则恢复，失败则重新熔断
+- 进程内共享，多个任务共同受益
+"""
+
+from __future__ import annotations
+
+import time
+import threading
+from typing import Any, Dict, Optional
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，调用被直接拒绝。"""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(f'{name} 暂时不可用（熔断中）')
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    单条路径的熔断器：
+    - closed：正常放行；连续失败 failure_threshold 次后转为 open
+    - open：拒绝调用，cooldown 秒后转为 half-open
+    - half-open：最多放行 half_open_probes 个探测；成功即 closed，失败即重新 open
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 60.0, half_open_probes: int = 1) -> None:
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown = cooldown
+        self.half_open_probes = max(1, int(half_open_probes))
+        self.state = CLOSED
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.consecutive_failures = 0
+        self.avg_latency: Optional[float] = None
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _refresh_locked(self) -> None:
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self._probes = 0
+
+    def available(self) -> bool:
+        """是否值得尝试该路径（不占用探测名额）。"""
+        with self._lock:
+            self._refresh_locked()
+            return self.state != OPEN
+
+    def allow(self) -> bool:
+        """申请一次调用；半开状态下会占用探测名额。被拒绝时返回 False。"""
+        with self._lock:
+            self._refresh_locked()
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def _observe_latency_locked(self, latency: Optional[float]) -> None:
+        if latency is None:
+            return
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency += (latency - self.avg_latency) * 0.2
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self._observe_latency_locked(latency)
+            self.state = CLOSED
+
+    def record_neutral(self) -> None:
+        """既不算成功也不算失败（如限流、鉴权错误），仅归还半开状态下占用的探测名额。"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def record_failure(self, latency: Optional[float] = None) -> None:
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self._observe_latency_locked(latency)
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh_locked()
+            total = self.successes + self.failures
+            return {
+                'state': self.state,
+                'successes': self.successes,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'success_rate': (self.successes / total) if total else None,
+                'consecutive_failures': self.consecutive_failures,
+                'avg_latency': self.avg_latency,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, failure_threshold: int = 3, cooldown: float = 60.0) -> CircuitBreaker:
+    """返回进程内按名称共享的熔断器；参数仅在首次创建时生效。"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, failure_threshold=failure_threshold, cooldown=cooldown)
+            _breakers[name] = breaker
+        return breaker
+
+
+def health_snapshot() -> Dict[str, Dict[str, Any]]:
+    """返回所有已登记路径的健康状态。"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.stats() for b in breakers}
@@ -10,9 +10,11 @@ HTML 报告生成模块：
 from __future__ import annotations
 
 import html
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from string import Template
 
+from .transcript import Transcript
+
 
 def _format_time(seconds: float) -> str:
     """将秒格式化为 mm:ss 或 hh:mm:ss。"""
@@ -28,14 +30,23 @@ def _format_time(seconds: float) -> str:
 class HtmlReportGenerator:
     """生成 HTML 报告文件，支持英文/中文双轨切换。"""
 
-    def generate(self, output_path: str, video_id: str, title: Optional[str], title_cn: str, items_en: List[Dict], items_cn: List[Dict], chapters: List[Dict], summary: str, source_language: Optional[str], target_language: Optional[str]) -> None:
+    def generate(self, output_path: str, video_id: str, title: Optional[str], title_cn: str, items_en: Union[Transcript, List[Dict]], items_cn: List[Dict], chapters: List[Dict], summary: str, source_language: Optional[str], target_language: Optional[str]) -> None:
+        """渲染报告并写入 output_path。"""
+        doc = self.render(video_id, title, title_cn, items_en, items_cn, chapters, summary, source_language, target_language)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(doc)
+
+    def render(self, video_id: str, title: Optional[str], title_cn: str, items_en: Union[Transcript, List[Dict]], items_cn: List[Dict], chapters: List[Dict], summary: str, source_language: Optional[str], target_language: Optional[str]) -> str:
+        """渲染报告，返回完整的 HTML 文本（不落盘）。"""
         safe_title = title or f"YouTube 视频 {video_id}"
-        # 英文轨
+        # 英文轨（Transcript 直接按数组读取，不逐条构造字典）
         rows_en: List[str] = []
-        for it in items_en:
-            start = float(it.get('start', 0))
-            duration = float(it.get('duration', 5.0))
-            text = html.escape(it.get('text', ''))
+        if isinstance(items_en, Transcript):
+            cues_en = zip(items_en.starts, items_en.durations, items_en.texts())
+        else:
+            cues_en = ((float(it.get('start', 0)), float(it.get('duration', 5.0)), it.get('text', '')) for it in items_en)
+        for start, duration, raw_text in cues_en:
+            text = html.escape(raw_text)
             rows_en.append(
                 f'<div class="cue" data-start="{start}" data-duration="{duration}">'
                 f'<div class="time">{_format_time(start)}</div>'
@@ -415,9 +426,4 @@ document.addEventListener('keydown',function(e){
             summary_text=safe_summary,
             chapters_html=''.join(chapters_html) if chapters_html else '<div style="color:#8b949e;font-size:13px;">暂无章节信息</div>',
         )
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(doc)
-
-
-
-
+        return doc
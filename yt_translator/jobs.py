@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+"""
+后台任务模块：
+- 流水线在进程内的工作线程池中运行，不再占用 Streamlit 脚本线程；页面重跑不会中断任务
+- 每个任务有 ID、状态（queued / running / done / failed）、进度事件与结果
+- 界面只保存任务 ID 并轮询进度；任务完成后的结果在任意一次重跑中都能取回
+- 进程内共享，多个会话的任务在同一个线程池中并行
+- 单飞合并：相同视频、目标语言、源语言优先级、提供方（含 API 地址与采样温度）、模型与提示词版本的请求在进行中时，
+  后来者直接加入已有任务并共享结果，不再重复提取、翻译与生成报告
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+
+from .config import PipelineConfig
+from .pipeline import INFO, PipelineError, job_key, run_pipeline
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ProgressEvent:
+    """任务进度事件；seq 在任务内单调递增，便于增量轮询。"""
+
+    __slots__ = ('seq', 'time', 'percent', 'message', 'level')
+
+    def __init__(self, seq: int, percent: Optional[int], message: str, level: str) -> None:
+        self.seq = seq
+        self.time = time.time()
+        self.percent = percent
+        self.message = message
+        self.level = level
+
+
+class Job:
+    """
+    一个后台任务。状态与进度由工作线程写入、界面线程读取，均在锁内完成。
+    error 为失败原因，hint 为给用户的补充提示（来自 PipelineError）。
+    """
+
+    def __init__(self, job_id: str, config: PipelineConfig, key: Optional[Hashable] = None) -> None:
+        self.id = job_id
+        self.config = config
+        self.key = key
+        self.subscribers = 1  # 提交者加上合并进来的请求数
+        self.state = QUEUED
+        self.percent = 0
+        self.message = '排队中...'
+        self.level = INFO
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.hint = ''
+        self.exception: Optional[BaseException] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._events: List[ProgressEvent] = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+    def _progress(self, percent: Optional[int], message: str, level: str = INFO) -> None:
+        with self._lock:
+            if percent is not None:
+                self.percent = max(self.percent, int(percent))
+            self.message = message
+            self.level = level
+            self._events.append(ProgressEvent(len(self._events) + 1, percent, message, level))
+
+    def _run(self, runner: Callable[..., Dict[str, Any]]) -> None:
+        with self._lock:
+            self.state = RUNNING
+            self.started_at = time.time()
+        try:
+            result = runner(self.config, on_progress=self._progress)
+        except Exception as e:
+            with self._lock:
+                self.state = FAILED
+                self.error = str(e) or e.__class__.__name__
+                self.hint = getattr(e, 'hint', '') if isinstance(e, PipelineError) else ''
+                self.exception = e
+                self.finished_at = time.time()
+            print(f".. 任务 {self.id} 失败：{self.error}", flush=True)
+        else:
+            with self._lock:
+                self.state = DONE
+                self.result = result
+                self.percent = 100
+                self.finished_at = time.time()
+        finally:
+            self._done.set()
+
+    def events_since(self, seq: int = 0) -> List[ProgressEvent]:
+        """返回序号大于 seq 的进度事件。"""
+        with self._lock:
+            return self._events[seq:]
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """阻塞等待任务结束；超时返回 False。"""
+        return self._done.wait(timeout)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'id': self.id,
+                'state': self.state,
+                'percent': self.percent,
+                'message': self.message,
+                'level': self.level,
+                'error': self.error,
+                'hint': self.hint,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'events': len(self._events),
+                'subscribers': self.subscribers,
+            }
+
+
+class JobManager:
+    """
+    进程内任务管理器：max_workers 个工作线程执行流水线。
+    key_func(config) 相同且任务尚未结束的请求合并为一个任务（返回 None 的请求不合并）。
+    只保留最近 keep 个已结束的任务，更早的结果随之释放。
+    """
+
+    def __init__(self, max_workers: int = 2, keep: int = 100, runner: Callable[..., Dict[str, Any]] = run_pipeline,
+                 key_func: Optional[Callable[[PipelineConfig], Optional[Hashable]]] = job_key) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.keep = max(1, int(keep))
+        self._runner = runner
+        self._key_func = key_func
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='yt-job')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._inflight: Dict[Hashable, Job] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+
+    def submit(self, config: Union[PipelineConfig, Dict[str, Any]]) -> Job:
+        """
+        提交一个任务并立即返回；字典形式的 config 会转换为 PipelineConfig，提交后修改原字典不影响任务。
+        已有相同请求在排队或处理中时，返回那个任务（subscribers 加一），不新建任务。
+        """
+        config = PipelineConfig.coerce(config)
+        key = self._key_func(config) if self._key_func is not None else None
+        with self._lock:
+            self.submitted += 1
+            existing = self._inflight.get(key) if key is not None else None
+            if existing is not None:
+                existing.subscribers += 1
+                self.coalesced += 1
+                print(f".. 合并到进行中的任务 {existing.id}（共 {existing.subscribers} 个请求）", flush=True)
+                return existing
+            job = Job(uuid.uuid4().hex[:12], config, key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._inflight[key] = job
+            self._evict_locked()
+        self._executor.submit(self._run_job, job)
+        return job
+
+    def _run_job(self, job: Job) -> None:
+        try:
+            job._run(self._runner)
+        finally:
+            with self._lock:
+                if job.key is not None and self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        if not job_id:
+            return None
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _evict_locked(self) -> None:
+        finished = [jid for jid, job in self._jobs.items() if job.finished]
+        for jid in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[jid]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            states = [job.state for job in self._jobs.values()]
+            return {
+                'max_workers': self.max_workers,
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'queued': states.count(QUEUED),
+                'running': states.count(RUNNING),
+                'done': states.count(DONE),
+                'failed': states.count(FAILED),
+            }
+
+
+_default_job_manager: Optional[JobManager] = None
+_default_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """返回进程内共享的任务管理器；工作线程数由 YT_JOB_WORKERS 指定（默认 2）。"""
+    global _default_job_manager
+    with _default_lock:
+        if _default_job_manager is None:
+            try:
+                workers = int(os.getenv('YT_JOB_WORKERS', '2'))
+            except ValueError:
+                workers = 2
+            _default_job_manager = JobManager(max_workers=workers)
+        return _default_job_manager
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""
+语言代码与语言检测模块：
+- normalize_lang：把 BCP-47 变体统一为同一形式（zh-CN/zh-Hans -> zh-Hans，en-US/en -> en）
+- same_language：判断源语言与目标语言是否相同，用于跳过翻译
+- detect_language：基于字符集的本地快速检测（中日韩、西里尔等），可选使用 langdetect 区分拉丁语系
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, Optional
+
+try:
+    from langdetect import detect as _langdetect  # 可选依赖：区分英/法/德等拉丁字母语言
+except Exception:
+    _langdetect = None  # type: ignore
+
+
+# 中文按书写系统区分简体/繁体，其余语言只保留主语言子标签
+_CHINESE_SCRIPTS = {
+    'zh': 'zh-Hans',
+    'zh-hans': 'zh-Hans',
+    'zh-cn': 'zh-Hans',
+    'zh-sg': 'zh-Hans',
+    'zh-my': 'zh-Hans',
+    'zh-hans-cn': 'zh-Hans',
+    'zh-hant': 'zh-Hant',
+    'zh-tw': 'zh-Hant',
+    'zh-hk': 'zh-Hant',
+    'zh-mo': 'zh-Hant',
+    'zh-hant-tw': 'zh-Hant',
+    'zh-hant-hk': 'zh-Hant',
+}
+# 旧式或别名代码
+_ALIASES = {
+    'iw': 'he',
+    'in': 'id',
+    'ji': 'yi',
+    'jw': 'jv',
+    'fil': 'tl',
+}
+
+_RE_HAN = re.compile(r'[\u4e00-\u9fff\u3400-\u4dbf]')
+_RE_KANA = re.compile(r'[\u3040-\u30ff]')
+_RE_HANGUL = re.compile(r'[\uac00-\ud7af\u1100-\u11ff]')
+_RE_CYRILLIC = re.compile(r'[\u0400-\u04ff]')
+_RE_ARABIC = re.compile(r'[\u0600-\u06ff]')
+_RE_THAI = re.compile(r'[\u0e00-\u0e7f]')
+_RE_LATIN = re.compile(r'[A-Za-z\u00c0-\u024f]')
+# 常用字中简繁写法不同的一组，用于区分简体与繁体
+_SIMPLIFIED_ONLY = frozenset('这个们说时会过还对没样么发经国现进动为问关学开长见从让书网话边里')
+_TRADITIONAL_ONLY = frozenset('這個們說時會過還對沒樣麼發經國現進動為問關學開長見從讓書網話邊裡')
+
+
+def normalize_lang(code: Optional[str]) -> Optional[str]:
+    """
+    规范化语言代码：大小写与下划线统一、去掉 yt-dlp 的 '-orig' 后缀，
+    中文映射为 zh-Hans / zh-Hant，其余语言取主语言子标签（en-US -> en）。
+    """
+    if not code:
+        return None
+    c = code.strip().replace('_', '-').lower()
+    if c.endswith('-orig'):
+        c = c[:-len('-orig')]
+    if not c or c == 'auto':
+        return None
+    if c in _CHINESE_SCRIPTS:
+        return _CHINESE_SCRIPTS[c]
+    primary = c.split('-')[0]
+    if primary == 'zh':
+        # 未列出的中文变体：按书写系统子标签判断，默认简体
+        return 'zh-Hant' if '-hant' in c else 'zh-Hans'
+    return _ALIASES.get(primary, primary)
+
+
+def same_language(a: Optional[str], b: Optional[str]) -> bool:
+    """两个语言代码规范化后是否相同；任一未知时返回 False。"""
+    na, nb = normalize_lang(a), normalize_lang(b)
+    return na is not None and na == nb
+
+
+def detect_language(texts: Iterable[str], max_chars: int = 4000) -> Optional[str]:
+    """
+    对字幕文本做本地快速语言检测，只取前 max_chars 个字符。
+    按字符集判断中（简/繁）、日、韩、俄、阿、泰；拉丁字母文本在安装 langdetect 时进一步区分，否则返回 None。
+    """
+    parts = []
+    size = 0
+    for t in texts:
+        if not t:
+            continue
+        parts.append(t)
+        size += len(t)
+        if size >= max_chars:
+            break
+    sample = ' '.join(parts)[:max_chars]
+    if not sample.strip():
+        return None
+
+    han = len(_RE_HAN.findall(sample))
+    kana = len(_RE_KANA.findall(sample))
+    hangul = len(_RE_HANGUL.findall(sample))
+    counts = {
+        'cjk': han + kana + hangul,
+        'ru': len(_RE_CYRILLIC.findall(sample)),
+        'ar': len(_RE_ARABIC.findall(sample)),
+        'th': len(_RE_THAI.findall(sample)),
+        'latin': len(_RE_LATIN.findall(sample)),
+    }
+    script = max(counts, key=lambda k: counts[k])
+    if counts[script] == 0:
+        return None
+    if script == 'cjk':
+        if kana > 0 and kana * 10 >= han:
+            return 'ja'
+        if hangul > han:
+            return 'ko'
+        simplified = sum(1 for ch in sample if ch in _SIMPLIFIED_ONLY)
+        traditional = sum(1 for ch in sample if ch in _TRADITIONAL_ONLY)
+        return 'zh-Hant' if traditional > simplified else 'zh-Hans'
+    if script == 'latin':
+        if _langdetect is None:
+            return None
+        try:
+            return normalize_lang(_langdetect(sample))
+        except Exception:
+            return None
+    return script
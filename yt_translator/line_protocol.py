@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""
+编号行协议模块：
+- 发送时为每行加上编号，例如 "[12] text"
+- 解析时按编号回填译文，精确找出缺失、合并或重复的编号
+- 便于只重发出错的行，而不是整批重发或静默错位
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Tuple
+
+
+_RE_NUMBERED = re.compile(r"^\s*[\[【(（]?\s*(\d+)\s*[\]】)）.:：、]\s*(.*)$")
+
+
+def format_numbered(ids: List[int], texts: List[str]) -> str:
+    """将行格式化为 "[id] text" 形式，行内换行替换为空格以保持一行一条。"""
+    return "\n".join(f"[{i}] {' '.join(t.split())}" for i, t in zip(ids, texts))
+
+
+def parse_numbered(text: str, expected_ids: List[int]) -> Tuple[Dict[int, str], List[int]]:
+    """
+    解析模型返回的编号行。
+    返回 ({id: 译文}, 需要重发的 id 列表)。
+    需要重发的包括：缺失的编号、出现多次的编号（可能合并/拆分）、
+    以及紧邻缺失编号之前的行（缺失往往是被合并进了前一行）。
+    未带编号的续行会被视为上一行被拆分，该行同样需要重发。
+    """
+    expected = set(expected_ids)
+    found: Dict[int, str] = {}
+    suspicious = set()
+    last_id = None
+    for raw in text.split("\n"):
+        line = raw.strip()
+        if not line or line.startswith("```"):
+            continue
+        m = _RE_NUMBERED.match(line)
+        if not m or int(m.group(1)) not in expected:
+            # 无编号的续行：上一行被拆成多行
+            if last_id is not None:
+                suspicious.add(last_id)
+            continue
+        line_id = int(m.group(1))
+        if line_id in found:
+            suspicious.add(line_id)
+        found[line_id] = m.group(2).strip()
+        last_id = line_id
+
+    missing = [i for i in expected_ids if i not in found]
+    order = {i: k for k, i in enumerate(expected_ids)}
+    for i in missing:
+        k = order[i]
+        # 缺失行常被合并进前一行，前一行译文也不可信
+        if k > 0 and expected_ids[k - 1] in found:
+            suspicious.add(expected_ids[k - 1])
+    retry = [i for i in expected_ids if i in suspicious or i not in found]
+    for i in retry:
+        found.pop(i, None)
+    return found, retry
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+字幕规范化模块：
+- YouTube 自动字幕为"滚动"显示，同一短语会在相邻的两三条字幕中重复出现
+- dedupe_rolling_cues / iter_dedupe_rolling_cues 将重叠/前缀重复的字幕合并为互不重叠的干净条目，并修正起止时间；
+  后者为生成器，可与流式 VTT 解析串联
+- 返回移除的词数等统计，便于评估对翻译与报告体积的影响
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def _overlap(tail: List[str], tokens: List[str]) -> int:
+    """返回 tail 的后缀与 tokens 的前缀最长重合的词数。"""
+    for k in range(min(len(tail), len(tokens)), 0, -1):
+        if tail[-k:] == tokens[:k]:
+            return k
+    return 0
+
+
+def iter_dedupe_rolling_cues(items: Iterable[Dict], stats: Optional[Dict[str, int]] = None, min_overlap: int = 2, window: int = 64) -> Iterator[Dict]:
+    """
+    合并滚动字幕中的重复内容，逐条产出，不保留整份列表。
+    - 每条字幕只保留相对已输出内容新增的词；重合词数不少于 min_overlap 才视为滚动重复，
+      避免误删人工字幕中恰好相同的单个词
+    - 完全重复的字幕被丢弃，并把上一条的结束时间延长到该条结束
+    - 输出条目按时间互不重叠：上一条的结束时间不会晚于下一条的开始
+    上一条的结束时间要看到下一条才能确定，因此只暂存一条。
+    传入 stats 字典时在其中累计 cues_in / cues_out / tokens_in / tokens_removed。
+    """
+    if stats is None:
+        stats = {}
+    for key in ('cues_in', 'cues_out', 'tokens_in', 'tokens_removed'):
+        stats.setdefault(key, 0)
+    prev: Optional[Dict] = None
+    tail: List[str] = []
+    for it in items:
+        stats['cues_in'] += 1
+        tokens = (it.get('text') or '').split()
+        stats['tokens_in'] += len(tokens)
+        start = float(it.get('start', 0.0))
+        end = start + float(it.get('duration', 0.0))
+        k = _overlap(tail, tokens)
+        if k < min_overlap and not (prev and tokens and tokens == tail[-len(tokens):] and start <= prev['_end']):
+            k = 0
+        new_tokens = tokens[k:]
+        stats['tokens_removed'] += k
+        if not new_tokens:
+            if prev and k:
+                prev['_end'] = max(prev['_end'], end)
+            continue
+        if prev is not None:
+            if prev['_end'] > start:
+                prev['_end'] = max(prev['start'], start)
+            stats['cues_out'] += 1
+            yield _finish(prev)
+        prev = {'start': start, '_end': max(start, end), 'text': ' '.join(new_tokens)}
+        tail = (tail + new_tokens)[-window:]
+    if prev is not None:
+        stats['cues_out'] += 1
+        yield _finish(prev)
+
+
+def _finish(cue: Dict) -> Dict:
+    return {'start': round(cue['start'], 3), 'duration': round(cue['_end'] - cue['start'], 3), 'text': cue['text']}
+
+
+def dedupe_rolling_cues(items: Iterable[Dict], min_overlap: int = 2, window: int = 64) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    合并滚动字幕中的重复内容（规则见 iter_dedupe_rolling_cues）。
+    items 可以是生成器，逐条消费。返回 (条目列表, 统计)。
+    """
+    stats: Dict[str, int] = {}
+    result = list(iter_dedupe_rolling_cues(items, stats, min_overlap, window))
+    return result, stats
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+
+"""
+处理流水线模块：
+- 提取字幕 → 翻译段落/生成总结/翻译标题与章节（并发）→ 分配时间轴 → 生成 HTML 报告
+- 配置以 PipelineConfig 显式传入（兼容同结构的字典），不写入 os.environ，同一进程内的并发任务互不干扰
+- 不依赖 Streamlit：进度通过 on_progress(percent, message, level) 回调上报，
+  可在后台任务线程中运行，也可在命令行中直接调用
+- 可预期的失败（提取失败、无字幕）抛出 PipelineError，附带给用户的提示
+- 成品缓存：完整跑通（无阶段超时/失败、翻译器无回退原文）的结果按 (视频 ID, 配置指纹) 写入 ReportCache，再次处理同一视频时直接返回
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import hashlib
+import tempfile
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
+
+from .config import PipelineConfig
+from .extractor import extract_transcript_with_fallback, fetch_youtube_translation, parse_video_id
+from .langs import detect_language, normalize_lang
+from .alignment import align_paragraphs
+from .translator import REPORT_PROMPT_VERSION, SubtitleTranslator
+from .cache import get_report_cache, get_transcript_cache, get_translation_memory
+from .batching import chapter_break_offsets
+from .stages import Stage, run_stages
+from .html_report import HtmlReportGenerator
+
+
+# 各并发阶段的超时（秒），超时后使用兜底结果继续生成报告
+STAGE_TIMEOUTS = {
+    'paragraphs': 1800,
+    'summary': 900,
+    'title': 120,
+    'chapters': 300,
+}
+
+# 进度级别：info 为进行中，success / warning 为阶段结果
+INFO = 'info'
+SUCCESS = 'success'
+WARNING = 'warning'
+
+ProgressCallback = Callable[[Optional[int], str, str], None]
+ConfigLike = Union[PipelineConfig, Mapping[str, Any]]
+
+
+class PipelineError(Exception):
+    """流水线的可预期失败；hint 为给用户的补充提示。"""
+
+    def __init__(self, message: str, hint: str = '') -> None:
+        super().__init__(message)
+        self.hint = hint
+
+
+def job_key(config: ConfigLike) -> Optional[Tuple[Any, ...]]:
+    """
+    产出相同报告的请求的标识：(video_id, 目标语言, 提供方, 模型, 提示词版本, 是否使用 YouTube 翻译, 源语言优先级,
+    API 地址, 采样温度)；后两项只对 DeepSeek 有意义，Google 时为 None。
+    链接无效时返回 None（不参与合并）。任务合并与报告缓存的配置指纹都由它导出，二者的判定保持一致。
+    """
+    config = PipelineConfig.coerce(config)
+    video_id = parse_video_id(config.url or '')
+    if not video_id:
+        return None
+    deepseek = config.provider == "deepseek"
+    model = config.deepseek_model if deepseek else 'google-translate'
+    target = normalize_lang(config.target_lang) or config.target_lang
+    return (video_id, target, config.provider, model, REPORT_PROMPT_VERSION, config.youtube_translation,
+            tuple(config.source_langs),
+            config.deepseek_base_url if deepseek else None,
+            config.deepseek_temperature if deepseek else None)
+
+
+def config_fingerprint(config: ConfigLike) -> str:
+    """报告缓存的配置指纹：job_key 中除视频 ID 外的部分。"""
+    key = job_key(config) or (None,)
+    return hashlib.sha1(json.dumps(list(key[1:]), ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+def cached_report(config: ConfigLike) -> Optional[Dict[str, Any]]:
+    """查询成品报告缓存；命中时返回结果字典（stats['cache'] 为 'hit'），否则返回 None。"""
+    config = PipelineConfig.coerce(config)
+    video_id = parse_video_id(config.url or '')
+    if not video_id:
+        return None
+    started = time.time()
+    try:
+        result = get_report_cache().lookup(video_id, config_fingerprint(config))
+    except Exception as e:
+        print(f".. 读取报告缓存失败：{e}", flush=True)
+        return None
+    if result is None:
+        return None
+    result['stats']['cache'] = 'hit'
+    result['stats']['processing_time'] = time.time() - started
+    return result
+
+
+def invalidate_report(config: ConfigLike) -> int:
+    """删除该视频在当前配置下缓存的报告，返回删除条数。"""
+    config = PipelineConfig.coerce(config)
+    video_id = parse_video_id(config.url or '')
+    if not video_id:
+        return 0
+    return get_report_cache().invalidate(video_id, config_fingerprint(config))
+
+
+def run_pipeline(config: ConfigLike, on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    处理一个视频，返回结果字典（video_id、title、title_cn、html_content、summary、full_text、stats）。
+    config 为 PipelineConfig，或与 app 侧边栏配置相同结构的字典（url、provider、target_lang、source_langs 等）。
+    on_progress(percent, message, level)：percent 为 0~100 或 None（只更新消息）。
+    config.refresh_report 为真时忽略已缓存的报告并重新处理。
+    """
+    config = PipelineConfig.coerce(config)
+
+    def report(percent: Optional[int], message: str, level: str = INFO) -> None:
+        if on_progress is not None:
+            on_progress(percent, message, level)
+
+    # 解析视频 ID
+    video_id = parse_video_id(config.url or '')
+    if not video_id:
+        raise PipelineError("无效的 YouTube 视频链接")
+
+    if not config.refresh_report:
+        cached = cached_report(config)
+        if cached is not None:
+            report(100, "命中报告缓存，处理完成！", SUCCESS)
+            return cached
+
+    # 使用临时目录，处理结束后自动删除
+    with tempfile.TemporaryDirectory() as tmpdir:
+        start_time = time.time()
+
+        # 步骤 1: 提取字幕
+        report(10, "正在连接 YouTube...")
+        try:
+            transcript_items, detected_lang, title, source_name, chapters = extract_transcript_with_fallback(
+                config.url,
+                preferred_langs=config.source_langs,
+                workdir=tmpdir,
+                cache=get_transcript_cache(),
+                config=config
+            )
+        except Exception as e:
+            error_msg = str(e)
+            hint = "对于超长视频（>20分钟），可能需要更长时间。请稍后重试或尝试较短视频。"
+            if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
+                raise PipelineError(f"提取字幕超时（视频可能过长）。错误信息：{error_msg}", hint) from e
+            raise PipelineError(f"提取字幕失败：{error_msg}", hint) from e
+
+        if not transcript_items:
+            raise PipelineError(
+                "未能获取到任何字幕，请检查视频是否有字幕。",
+                "可能的原因：\n1. 视频确实没有字幕\n2. 视频过长导致超时（Streamlit Cloud 限制）\n3. Cookie 已过期，需要重新配置"
+            )
+
+        report(30, f"提取字幕完成！检测到语言：{detected_lang}", SUCCESS)
+
+        # 步骤 2: 翻译字幕
+        report(40, f"正在使用 {config.provider.upper()} 翻译字幕...")
+
+        # 规范化源语言代码；未知时对字幕文本做本地检测
+        source_lang = normalize_lang(detected_lang) or detect_language(transcript_items.texts())
+
+        translator = SubtitleTranslator.from_config(
+            config,
+            source_language=source_lang,
+            memory=get_translation_memory()
+        )
+
+        # 源语言与目标语言相同时直接透传字幕；否则视频支持时，逐行目标语言字幕直接取自 YouTube 翻译。
+        # 两种情况都不再调用大模型分段翻译。
+        # Google 没有语义分段能力：字幕先重组为句子整句翻译，再切回各条字幕，得到逐行译文
+        line_track = None
+        if translator.passthrough:
+            line_track = transcript_items
+            target_track = 'passthrough'
+        elif config.youtube_translation:
+            line_track = fetch_youtube_translation(video_id, detected_lang, config.target_lang)
+            target_track = 'youtube-translate' if line_track else config.provider
+        else:
+            target_track = config.provider
+
+        # 翻译全文并分段、生成总结、翻译标题与章节：四个阶段只依赖字幕，并发执行
+        full_text = transcript_items.full_text
+        break_offsets = chapter_break_offsets(transcript_items, chapters)
+        by_cue = not line_track and config.provider == 'google'
+        stage_labels = {
+            'paragraphs': '翻译字幕' if by_cue else '翻译段落',
+            'summary': '生成总结',
+            'title': '翻译标题',
+            'chapters': '翻译章节',
+        }
+        stages = []
+        if by_cue:
+            stages.append(Stage('paragraphs', lambda _: translator.translate_items(transcript_items, by_sentence=True),
+                                timeout=STAGE_TIMEOUTS['paragraphs'], fallback=list(transcript_items.texts())))
+        elif not line_track:
+            stages.append(Stage('paragraphs', lambda _: translator.translate_full_and_split(full_text, break_offsets),
+                                timeout=STAGE_TIMEOUTS['paragraphs'], fallback=[full_text]))
+        stages += [
+            Stage('summary', lambda _: translator.generate_summary(full_text, break_offsets),
+                  timeout=STAGE_TIMEOUTS['summary'], fallback="生成总结失败：处理超时"),
+            Stage('title', lambda _: translator.translate_title(title or ''),
+                  timeout=STAGE_TIMEOUTS['title'], fallback=''),
+        ]
+        if chapters:
+            stages.append(Stage('chapters', lambda _: translator.translate_chapters(chapters),
+                                timeout=STAGE_TIMEOUTS['chapters'], fallback=chapters))
+        running_labels = [stage_labels[s.name] for s in stages]
+        degraded = []  # 超时或失败、使用了兜底结果的阶段，或翻译器有回退；此时不写入报告缓存
+
+        report(50, f"正在使用 {config.provider.upper()} 并行处理：{'、'.join(running_labels)}...")
+
+        def on_stage_event(event):
+            if event.kind == 'started':
+                return
+            label = stage_labels[event.stage]
+            if label in running_labels:
+                running_labels.remove(label)
+            percent = 50 + 35 * event.done // max(1, event.total)
+            if event.kind == 'finished':
+                report(percent, f"{label}完成（{event.elapsed:.1f}秒），剩余：{'、'.join(running_labels) or '无'}", SUCCESS)
+            else:
+                degraded.append(event.stage)
+                report(percent, f"{label}未完成（{event.error}），剩余：{'、'.join(running_labels) or '无'}", WARNING)
+
+        stage_results = run_stages(stages, on_event=on_stage_event)
+        if line_track:
+            cn_paragraphs = [it.get('text', '') for it in line_track]
+        else:
+            cn_paragraphs = stage_results['paragraphs']
+        summary = stage_results['summary']
+        if isinstance(summary, str) and summary.startswith("生成总结失败"):
+            degraded.append('summary')
+        title_cn = stage_results['title']
+        if chapters:
+            chapters = stage_results['chapters']
+        if translator.degraded:
+            # 翻译器内部的回退（译文保留原文、降级到其他提供方）不会体现为阶段失败
+            degraded.append('translator')
+            print(f".. 部分内容未能翻译（{translator.fallbacks}），本次结果不写入报告缓存", flush=True)
+
+        report(85, "正在分配时间轴...")
+
+        # 分配时间轴（透传、YouTube 翻译与逐条译文的字幕自带逐行时间轴，直接使用）
+        if line_track:
+            items_cn = [{
+                'start': it['start'],
+                'duration': it['duration'],
+                'text': '',
+                'translated_text': it.get('text', '')
+            } for it in line_track]
+        elif by_cue:
+            items_cn = [{
+                'start': it['start'],
+                'duration': it['duration'],
+                'text': '',
+                'translated_text': line
+            } for it, line in zip(transcript_items, cn_paragraphs)]
+        else:
+            # 按原文累计长度与数字/专名锚点，把每段对应到一段连续的原文字幕
+            items_cn = align_paragraphs(transcript_items, cn_paragraphs)
+
+        # 步骤 3: 生成 HTML 报告
+        report(90, "正在生成 HTML 报告...")
+
+        html_content = HtmlReportGenerator().render(
+            video_id=video_id,
+            title=title,
+            title_cn=title_cn,
+            items_en=transcript_items,
+            items_cn=items_cn,
+            chapters=chapters,
+            summary=summary,
+            source_language=detected_lang,
+            target_language=config.target_lang
+        )
+
+        processing_time = time.time() - start_time
+        report(100, "处理完成！", SUCCESS)
+
+        result = {
+            'video_id': video_id,
+            'title': title,
+            'title_cn': title_cn,
+            'html_content': html_content,
+            'summary': summary,
+            'full_text': full_text,
+            'stats': {
+                'source_language': detected_lang,
+                'target_language': config.target_lang,
+                'subtitle_count': len(transcript_items),
+                'paragraph_count': len(cn_paragraphs),
+                'source': source_name,
+                'target_track': target_track,
+                'processing_time': processing_time,
+                'full_text_length': len(full_text),  # 原文字符数
+                'cache': 'miss',
+            }
+        }
+        if not degraded:
+            try:
+                get_report_cache().store(video_id, config_fingerprint(config), result)
+            except Exception as e:
+                print(f".. 写入报告缓存失败：{e}", flush=True)
+        return result
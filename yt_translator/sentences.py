@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+"""
+句子重组模块：
+- 自动字幕每条只是 2~3 秒的片段，常把一句话拆成两半；逐条翻译既缺上下文又多耗请求
+- group_sentences 按句末标点与时间间隔把相邻字幕合并为句子（以整条字幕为单位，不拆分字幕）
+- split_translation 按各条字幕的原文长度比例，把句子译文在就近的标点/空格处切回各条字幕
+- group_lines 把以换行连接的字幕全文合并为段落（透传等不经大模型分段的场景）
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+
+# 句末标点（含引号/括号收尾的情况由 rstrip 处理）
+_SENTENCE_END = frozenset('.?!。？！…')
+_TRAILING_CLOSERS = '"\'”’)）]」』'
+# 切分译文时优先落在这些字符之后
+_SOFT_BREAKS = frozenset('，。！？；：、,.!?;: ')
+
+
+class Sentence:
+    """由连续字幕 [first, last) 组成的句子。"""
+
+    __slots__ = ('text', 'first', 'last', 'start', 'end')
+
+    def __init__(self, text: str, first: int, last: int, start: float, end: float) -> None:
+        self.text = text
+        self.first = first
+        self.last = last
+        self.start = start
+        self.end = end
+
+    def __repr__(self) -> str:
+        return f'Sentence({self.first}:{self.last}, {self.text[:30]!r})'
+
+
+def _ends_sentence(text: str) -> bool:
+    t = text.rstrip().rstrip(_TRAILING_CLOSERS)
+    return bool(t) and t[-1] in _SENTENCE_END
+
+
+def group_sentences(items: Sequence[Dict], max_gap: float = 1.5, max_chars: int = 300, max_cues: int = 12) -> List[Sentence]:
+    """
+    把字幕合并为句子：遇到句末标点、与下一条间隔超过 max_gap 秒，
+    或累计超过 max_chars 字符 / max_cues 条时断句。
+    没有标点的自动字幕主要依靠时间间隔与长度上限断句。
+    """
+    sentences: List[Sentence] = []
+    texts: List[str] = []
+    first = 0
+    size = 0
+    n = len(items)
+    for i, it in enumerate(items):
+        text = (it.get('text') or '').strip()
+        start = float(it.get('start', 0))
+        end = start + float(it.get('duration', 0))
+        if not texts:
+            first = i
+            sent_start = start
+        if text:
+            texts.append(text)
+            size += len(text) + 1
+        if i + 1 < n:
+            gap = float(items[i + 1].get('start', 0)) - end
+            boundary = _ends_sentence(text) or gap > max_gap or size >= max_chars or i + 1 - first >= max_cues
+        else:
+            boundary = True
+        if boundary:
+            sentences.append(Sentence(' '.join(texts), first, i + 1, sent_start, end))
+            texts = []
+            size = 0
+    return sentences
+
+
+def _join(left: str, right: str) -> str:
+    """拼接两段文本：任一侧是中日韩文字时不加空格。"""
+    if not left:
+        return right
+    if ord(left[-1]) >= 0x2E80 or ord(right[0]) >= 0x2E80:
+        return left + right
+    return left + ' ' + right
+
+
+def group_lines(full_text: str, break_offsets: Optional[List[int]] = None, max_chars: int = 400) -> List[str]:
+    """
+    把换行连接的字幕全文合并为段落：累计超过 max_chars 后在句末断段，超过两倍时强制断段；
+    break_offsets（如章节起点的字符偏移）处总是断段。
+    """
+    breaks = set(break_offsets or [])
+    paragraphs: List[str] = []
+    current = ''
+    pos = 0
+    for raw in full_text.split('\n'):
+        line = raw.strip()
+        if current and pos in breaks:
+            paragraphs.append(current)
+            current = ''
+        pos += len(raw) + 1
+        if not line:
+            continue
+        current = _join(current, line)
+        if len(current) >= 2 * max_chars or (len(current) >= max_chars and _ends_sentence(line)):
+            paragraphs.append(current)
+            current = ''
+    if current:
+        paragraphs.append(current)
+    return paragraphs
+
+
+def split_translation(text: str, weights: List[int], window: int = 8) -> List[str]:
+    """
+    将一句译文按权重（各条字幕原文长度）切成 len(weights) 段。
+    每个切点在按比例计算的位置附近 window 个字符内寻找标点或空格，找不到时按比例硬切。
+    """
+    n = len(weights)
+    if n <= 1:
+        return [text.strip()]
+    total = sum(max(1, w) for w in weights)
+    length = len(text)
+    cuts = [0]
+    acc = 0
+    for w in weights[:-1]:
+        acc += max(1, w)
+        target = round(length * acc / total)
+        lo = max(cuts[-1], target - window)
+        hi = min(length, target + window)
+        best = None
+        for pos in range(lo, hi + 1):
+            if pos > 0 and text[pos - 1] in _SOFT_BREAKS:
+                if best is None or abs(pos - target) < abs(best - target):
+                    best = pos
+        cuts.append(best if best is not None else max(cuts[-1], min(length, target)))
+    cuts.append(length)
+    return [text[cuts[k]:cuts[k + 1]].strip() for k in range(n)]
+
+
+def map_to_cues(items: Sequence[Dict], sentences: List[Sentence], translations: List[str]) -> List[str]:
+    """
+    将句子译文映射回各条字幕，返回与 items 等长的译文列表。
+    某句翻译失败（译文与原句相同）时，该句各条字幕保留原文；
+    不属于任何句子的字幕为空字符串，由调用方逐条翻译补齐（见 SubtitleTranslator.translate_items）。
+    """
+    out: List[str] = [''] * len(items)
+    for sent, translated in zip(sentences, translations):
+        originals = [(items[i].get('text') or '').strip() for i in range(sent.first, sent.last)]
+        if translated == sent.text:
+            pieces = originals
+        else:
+            pieces = split_translation(translated, [len(t) for t in originals])
+        for k, piece in enumerate(pieces):
+            out[sent.first + k] = piece
+    return out
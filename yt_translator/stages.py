@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+流水线阶段调度模块：
+- 以有向无环图描述阶段依赖，互不依赖的阶段并发执行
+- 每个阶段可设置超时与失败时的兜底值
+- 进度事件在调用线程中回调，便于直接更新 Streamlit 界面
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Stage:
+    """
+    流水线中的一个阶段。
+    - func：接收 {依赖阶段名: 结果} 的可调用对象，返回本阶段结果
+    - deps：依赖的阶段名
+    - timeout：超时秒数，超时或异常时结果取 fallback
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Optional[List[str]] = None, timeout: Optional[float] = None, fallback: Any = None) -> None:
+        self.name = name
+        self.func = func
+        self.deps = list(deps or [])
+        self.timeout = timeout
+        self.fallback = fallback
+
+
+class StageEvent:
+    """阶段进度事件：kind 为 started / finished / failed / timeout。"""
+
+    __slots__ = ('kind', 'stage', 'elapsed', 'error', 'done', 'total')
+
+    def __init__(self, kind: str, stage: str, elapsed: float, done: int, total: int, error: Optional[BaseException] = None) -> None:
+        self.kind = kind
+        self.stage = stage
+        self.elapsed = elapsed
+        self.error = error
+        self.done = done
+        self.total = total
+
+
+def run_stages(stages: List[Stage], max_workers: Optional[int] = None, on_event: Optional[Callable[[StageEvent], None]] = None) -> Dict[str, Any]:
+    """
+    按依赖关系并发执行各阶段，全部结束后返回 {阶段名: 结果}。
+    超时的阶段不会被强制终止（线程无法中断），但其结果不再等待，直接使用 fallback。
+    """
+    by_name = {st.name: st for st in stages}
+    if len(by_name) != len(stages):
+        raise ValueError('阶段名称重复')
+    for st in stages:
+        for dep in st.deps:
+            if dep not in by_name:
+                raise ValueError(f'阶段 {st.name} 依赖未知阶段 {dep}')
+
+    results: Dict[str, Any] = {}
+    finished: set = set()
+    running: Dict[Future, str] = {}
+    started_at: Dict[str, float] = {}
+    total = len(stages)
+
+    def emit(kind: str, name: str, error: Optional[BaseException] = None) -> None:
+        if on_event is not None:
+            on_event(StageEvent(kind, name, time.time() - started_at.get(name, time.time()), len(finished), total, error))
+
+    def complete(name: str, value: Any, kind: str, error: Optional[BaseException] = None) -> None:
+        results[name] = value
+        finished.add(name)
+        emit(kind, name, error)
+
+    ex = ThreadPoolExecutor(max_workers=max_workers or max(1, total))
+    try:
+        pending = list(stages)
+        while len(finished) < total:
+            # 提交依赖已全部完成的阶段
+            ready = [st for st in pending if all(d in finished for d in st.deps)]
+            for st in ready:
+                pending.remove(st)
+                deps = {d: results[d] for d in st.deps}
+                started_at[st.name] = time.time()
+                running[ex.submit(st.func, deps)] = st.name
+                emit('started', st.name)
+            if not running:
+                raise ValueError('阶段依赖存在环：' + ', '.join(st.name for st in pending))
+
+            # 等待到最近的超时点或任一阶段完成
+            now = time.time()
+            deadlines = [
+                started_at[name] + by_name[name].timeout
+                for name in running.values() if by_name[name].timeout is not None
+            ]
+            wait_for = max(0.0, min(deadlines) - now) if deadlines else None
+            done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    complete(name, fut.result(), 'finished')
+                except Exception as e:
+                    complete(name, by_name[name].fallback, 'failed', e)
+
+            now = time.time()
+            for fut, name in list(running.items()):
+                timeout = by_name[name].timeout
+                if timeout is not None and now - started_at[name] >= timeout:
+                    running.pop(fut)
+                    fut.cancel()
+                    complete(name, by_name[name].fallback, 'timeout', TimeoutError(f'阶段 {name} 超时（{timeout}s）'))
+    finally:
+        # 不等待已超时的阶段线程，避免阻塞后续渲染
+        ex.shutdown(wait=False, cancel_futures=True)
+    return results
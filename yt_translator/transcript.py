@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""
+紧凑字幕表示模块：
+- 起始时间与时长存放在 array('d') 中，文本拼接为一个连续字符串并用偏移数组定位
+- 切片与按时间范围取子集均为 O(1)/O(log n) 的视图，不复制数据
+- full_text 即内部文本缓冲区本身（整条字幕时零拷贝），与 app 中"非空文本去首尾空白后换行连接"的构造方式一致
+- 兼容 List[Dict] 用法：下标访问与迭代返回 {'start', 'duration', 'text'} 字典
+- 可选 NumPy：安装时 starts_array / durations_array 返回共享内存的 ndarray
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union, overload
+
+try:
+    import numpy as np
+except Exception:  # NumPy 为可选依赖
+    np = None  # type: ignore
+
+
+class Transcript(Sequence):
+    """
+    以数组存储的只读字幕序列。
+    构造时丢弃空文本条目、去除文本首尾空白，并按起始时间排序。
+    切片（步长为 1）与 between() 返回共享底层存储的视图。
+    """
+
+    __slots__ = ('_starts', '_durations', '_buffer', '_offsets', '_lo', '_hi')
+
+    def __init__(self, starts: array, durations: array, buffer: str, offsets: array, lo: int = 0, hi: Optional[int] = None) -> None:
+        self._starts = starts
+        self._durations = durations
+        self._buffer = buffer
+        # offsets[i] 为第 i 条文本在 buffer 中的起点；offsets[n] 为 len(buffer) + 1（末尾虚拟换行）
+        self._offsets = offsets
+        self._lo = lo
+        self._hi = len(starts) if hi is None else hi
+
+    @classmethod
+    def from_items(cls, items: Union['Transcript', Iterable[Dict]]) -> 'Transcript':
+        """
+        从 {'start', 'duration', 'text'} 字典序列构造；传入 Transcript 时原样返回。
+        items 可以是生成器：逐条写入紧凑数组，不另建中间行列表（起始时间乱序时才整体重排）。
+        """
+        if isinstance(items, Transcript):
+            return items
+        starts = array('d')
+        durations = array('d')
+        texts: List[str] = []
+        ordered = True
+        for it in items:
+            text = (it.get('text') or '').strip()
+            if not text:
+                continue
+            start = float(it.get('start', 0) or 0)
+            if starts and start < starts[-1]:
+                ordered = False
+            starts.append(start)
+            durations.append(float(it.get('duration', 0) or 0))
+            texts.append(text)
+        if not ordered:
+            order = sorted(range(len(texts)), key=starts.__getitem__)
+            starts = array('d', (starts[i] for i in order))
+            durations = array('d', (durations[i] for i in order))
+            texts = [texts[i] for i in order]
+        offsets = array('q', [0])
+        pos = 0
+        for text in texts:
+            pos += len(text) + 1
+            offsets.append(pos)
+        return cls(starts, durations, '\n'.join(texts), offsets)
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, Any]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'Transcript': ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            lo, hi, step = index.indices(len(self))
+            if step != 1:
+                return Transcript.from_items([self[i] for i in range(lo, hi, step)])
+            return Transcript(self._starts, self._durations, self._buffer, self._offsets, self._lo + lo, self._lo + max(lo, hi))
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('Transcript index out of range')
+        i = self._lo + index
+        return {'start': self._starts[i], 'duration': self._durations[i], 'text': self._text_at(i)}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._lo, self._hi):
+            yield {'start': self._starts[i], 'duration': self._durations[i], 'text': self._text_at(i)}
+
+    def __repr__(self) -> str:
+        return f'Transcript({len(self)} cues, {self.start:.1f}s-{self.end:.1f}s)'
+
+    def _text_at(self, i: int) -> str:
+        return self._buffer[self._offsets[i]:self._offsets[i + 1] - 1]
+
+    def text(self, index: int) -> str:
+        """第 index 条字幕文本（不构造字典）。"""
+        if index < 0:
+            index += len(self)
+        return self._text_at(self._lo + index)
+
+    def texts(self) -> Iterator[str]:
+        for i in range(self._lo, self._hi):
+            yield self._text_at(i)
+
+    @property
+    def starts(self) -> memoryview:
+        """起始时间（秒）的只读视图。"""
+        return memoryview(self._starts)[self._lo:self._hi].toreadonly()
+
+    @property
+    def durations(self) -> memoryview:
+        """时长（秒）的只读视图。"""
+        return memoryview(self._durations)[self._lo:self._hi].toreadonly()
+
+    def starts_array(self) -> Any:
+        """起始时间：安装 NumPy 时为共享内存的 ndarray，否则为 memoryview。"""
+        if np is None:
+            return self.starts
+        return np.frombuffer(self._starts, dtype=np.float64)[self._lo:self._hi]
+
+    def durations_array(self) -> Any:
+        """时长：安装 NumPy 时为共享内存的 ndarray，否则为 memoryview。"""
+        if np is None:
+            return self.durations
+        return np.frombuffer(self._durations, dtype=np.float64)[self._lo:self._hi]
+
+    def text_ends_array(self) -> Any:
+        """各条文本（含换行分隔）在 full_text 中的累计结束位置，即字符长度的前缀和；安装 NumPy 时为 ndarray。"""
+        base = self._offsets[self._lo]
+        if np is None:
+            view = memoryview(self._offsets)[self._lo + 1:self._hi + 1]
+            return view.toreadonly() if base == 0 else [x - base for x in view]
+        ends = np.frombuffer(self._offsets, dtype=np.int64)[self._lo + 1:self._hi + 1]
+        return ends if base == 0 else ends - base
+
+    @property
+    def start(self) -> float:
+        return self._starts[self._lo] if len(self) else 0.0
+
+    @property
+    def end(self) -> float:
+        if not len(self):
+            return 0.0
+        i = self._hi - 1
+        return self._starts[i] + self._durations[i]
+
+    @property
+    def full_text(self) -> str:
+        """非空字幕文本以换行连接的全文；整条字幕时直接返回内部缓冲区，不复制。"""
+        if self._lo == 0 and self._hi == len(self._starts):
+            return self._buffer
+        if self._lo >= self._hi:
+            return ''
+        return self._buffer[self._offsets[self._lo]:self._offsets[self._hi] - 1]
+
+    def text_offset(self, index: int) -> int:
+        """第 index 条文本在 full_text 中的字符偏移。"""
+        return self._offsets[self._lo + index] - self._offsets[self._lo]
+
+    def index_at(self, seconds: float) -> int:
+        """最后一条起始时间不晚于 seconds 的条目下标（二分查找）；早于首条时返回 0。"""
+        i = bisect_right(self.starts, seconds) - 1
+        return max(0, i)
+
+    def between(self, t0: float, t1: float) -> 'Transcript':
+        """起始时间落在 [t0, t1) 内的条目视图。"""
+        starts = self.starts
+        return self[bisect_left(starts, t0):bisect_left(starts, t1)]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self)
@@ -2,20 +2,32 @@
 
 """
 翻译模块：
-- provider=google：使用 deep-translator 的 GoogleTranslator（无需 Key）
-- provider=deepseek：使用 DeepSeek 大模型 API（需设置环境变量 DEEPSEEK_API_KEY）
-- 均支持分批与重试
+- provider=google：默认批量模式，多行合并为一次请求（无需 Key）；google_bulk=False 时使用 deep-translator 逐行请求
+- provider=deepseek：使用 DeepSeek 大模型 API（Key、地址与模型取自 PipelineConfig，未传入时读取环境变量 DEEPSEEK_*）
+- 均支持分批与重试；重试、退避与并发由 governor 按提供方统一调控
+- DeepSeek 熔断期间逐行翻译自动降级为 Google，其余请求直接失败而不再逐个超时重试
+- 源语言与目标语言相同（规范化后比较，如 zh-Hans 与 zh-CN）时透传原文，不消耗翻译额度
+- 可选翻译记忆：跨会话复用已翻译的文本
+- DeepSeek 逐行翻译默认走异步引擎（共享事件循环与连接池），同步接口保持不变
 """
 
 from __future__ import annotations
 
-import time
-from typing import List, Optional, Dict, Tuple
+import threading
+from typing import Callable, Generator, List, Optional, Dict, Tuple, Union
 
 from deep_translator import GoogleTranslator
-import os
-import json
-import time
+
+from .cache import TranslationMemory
+from .config import PipelineConfig
+from .batching import Batch, pack_batches, summarize_batches, estimate_tokens, chunk_text
+from .async_engine import get_openai_client, get_async_openai_client, run_sync, run_batches
+from .governor import ProviderGovernor, get_governor
+from .langs import same_language
+from .sentences import group_lines, group_sentences, map_to_cues
+from .transcript import Transcript
+from .line_protocol import format_numbered, parse_numbered
+from .google_bulk import GoogleBulkTranslator, pack_lines
 
 try:
     from openai import OpenAI
@@ -23,45 +35,150 @@ except Exception:  # 避免在未安装 openai 时导入失败
     OpenAI = None  # type: ignore
 
 
+# 提示词版本：修改对应提示词时需同步递增，使翻译记忆中的旧译文失效
+LINE_PROMPT_VERSION = 'line-v2'
+TITLE_PROMPT_VERSION = 'title-v1'
+CHAPTER_PROMPT_VERSION = 'chapter-v1'
+SUMMARY_SECTION_PROMPT_VERSION = 'summary-section-v1'
+PARAGRAPH_PROMPT_VERSION = 'paragraph-v1'
+SUMMARY_PROMPT_VERSION = 'summary-v1'
+# 整份报告用到的全部提示词版本；任一提示词变化都会产生不同的报告
+REPORT_PROMPT_VERSION = '+'.join([
+    LINE_PROMPT_VERSION, TITLE_PROMPT_VERSION, CHAPTER_PROMPT_VERSION,
+    SUMMARY_SECTION_PROMPT_VERSION, PARAGRAPH_PROMPT_VERSION, SUMMARY_PROMPT_VERSION,
+])
+
+# 调控器自适应并发的上限；并发线程数作为初始值
+DEEPSEEK_MAX_IN_FLIGHT = 64
+GOOGLE_MAX_IN_FLIGHT = 16
+
+# DeepSeek 逐行翻译单批行数的安全上限；批次大小由 token 预算决定，该上限只防止极短行堆积过多编号
+DEEPSEEK_MAX_LINES_PER_BATCH = 1000
+
+
+def _drop_boundary_duplicates(previous: List[str], paras: List[str], threshold: float = 0.85, max_drop: int = 2) -> List[str]:
+    """去掉 paras 开头与上一块末尾段落近似重复的段落（由分块重叠导致），最多去掉 max_drop 段。"""
+    from difflib import SequenceMatcher
+    i = 0
+    while i < min(len(paras), max_drop) and any(
+        SequenceMatcher(None, paras[i], prev, autojunk=False).ratio() >= threshold for prev in previous
+    ):
+        i += 1
+    return paras[i:]
+
+
 class SubtitleTranslator:
     """字幕翻译器，支持批量翻译与简单重试。"""
 
-    def __init__(self, target_language: str = 'zh-CN', provider: str = 'google', batch_size: int = 25, max_retries: int = 3, retry_delay_seconds: float = 2.0, concurrent_workers: int = 1) -> None:
+    def __init__(self, target_language: str = 'zh-CN', provider: str = 'google', batch_size: int = 25, max_retries: int = 3, retry_delay_seconds: float = 2.0, concurrent_workers: int = 1, memory: Optional[TranslationMemory] = None, max_batch_input_tokens: int = 2000, max_batch_output_tokens: int = 4000, full_text_chunk_tokens: int = 6000, full_text_overlap_tokens: int = 200, summary_section_tokens: int = 8000, use_async: bool = True, max_in_flight: Optional[int] = None, max_repair_rounds: int = 2, google_bulk: bool = True, source_language: Optional[str] = None, config: Optional[PipelineConfig] = None) -> None:
         self.target_language = target_language
         self.provider = provider
         self.batch_size = max(1, int(batch_size))
         self.max_retries = max(0, int(max_retries))
         self.retry_delay_seconds = float(retry_delay_seconds)
         self.concurrent_workers = max(1, int(concurrent_workers))
+        self.memory = memory
+        # DeepSeek 逐行翻译按 token 预算打包批次；batch_size 只用于 Google 逐行模式的分批
+        self.max_batch_input_tokens = max(1, int(max_batch_input_tokens))
+        self.max_batch_output_tokens = max(1, int(max_batch_output_tokens))
+        self.last_batch_stats: Dict[str, object] = {}
+        # 全文分段翻译：超过该 token 数时分块并发翻译
+        self.full_text_chunk_tokens = max(1, int(full_text_chunk_tokens))
+        self.full_text_overlap_tokens = max(0, int(full_text_overlap_tokens))
+        # 分层总结：超过该 token 数时分部分并发总结；各部分结果在实例内与翻译记忆中缓存
+        self.summary_section_tokens = max(1, int(summary_section_tokens))
+        self._section_summary_cache: Dict[str, str] = {}
+        # 编号行协议：缺失/合并的行最多单独重发 max_repair_rounds 轮
+        self.max_repair_rounds = max(0, int(max_repair_rounds))
+        self.line_stats: Dict[str, int] = {'repair_requests': 0, 'repaired_lines': 0, 'unresolved_lines': 0}
+        self._line_stats_lock = threading.Lock()
+        # 译文回退为原文（或降级到其他提供方）的次数，按环节统计；非空时结果不应作为成品缓存
+        self.fallbacks: Dict[str, int] = {}
+        self._fallbacks_lock = threading.Lock()
 
         self._translator_google: Optional[GoogleTranslator] = None
         self._client_deepseek: Optional[OpenAI] = None
+        self._async_client_deepseek = None
+        self._google_bulk: Optional[GoogleBulkTranslator] = None
+        self._google_governor: Optional[ProviderGovernor] = None
+        self._google_bulk_enabled = google_bulk
+        # 源语言与目标语言规范化后相同（如 zh-Hans 与 zh-CN）时直接透传，不调用任何翻译接口
+        self.source_language = source_language
+        self.passthrough = same_language(source_language, target_language)
+        # 异步引擎下同时提交的批次数上限；实际在途请求数由调控器按 AIMD 自适应
+        self.max_in_flight = max(1, int(max_in_flight)) if max_in_flight else self.concurrent_workers
 
         if self.provider == 'google':
-            self._translator_google = GoogleTranslator(source='auto', target=self.target_language)
+            self._init_google(google_bulk)
+            self._governor = self._google_governor
         elif self.provider == 'deepseek':
             if OpenAI is None:
                 raise RuntimeError('需要安装 openai 依赖以使用 DeepSeek：pip install openai')
-            # 从环境变量读取 API Key
-            api_key = os.getenv('DEEPSEEK_API_KEY')
+            # Key、地址与模型取自显式传入的配置；未传入时按环境变量构造
+            settings = config if config is not None else PipelineConfig.from_env()
+            api_key = settings.deepseek_api_key
             if not api_key:
                 raise RuntimeError(
-                    '未检测到 DEEPSEEK_API_KEY 环境变量。\n'
+                    '未提供 DeepSeek API Key（配置中的 deepseek_api_key 或 DEEPSEEK_API_KEY 环境变量）。\n'
                     '请通过以下方式之一设置：\n'
                     '1. 创建 .env 文件并添加：DEEPSEEK_API_KEY=your_api_key\n'
                     '2. 设置环境变量：export DEEPSEEK_API_KEY="your_api_key"\n'
                     '3. 参考 .env.example 文件中的配置说明'
                 )
-            base_url = os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com')
-            self._client_deepseek = OpenAI(api_key=api_key, base_url=base_url)
-            # 模型可通过环境变量配置，默认 deepseek-chat（通用）
-            self._deepseek_model = os.getenv('DEEPSEEK_MODEL', 'deepseek-chat')
-            self._deepseek_temperature = float(os.getenv('DEEPSEEK_TEMPERATURE', '0.2'))
+            base_url = settings.deepseek_base_url
+            # 客户端按 (Key, 地址) 进程内复用，共享连接池
+            self._client_deepseek = get_openai_client(api_key, base_url)
+            if use_async:
+                self._async_client_deepseek = get_async_openai_client(api_key, base_url)
+            # 模型默认 deepseek-chat（通用）
+            self._deepseek_model = settings.deepseek_model
+            self._deepseek_temperature = settings.deepseek_temperature
+            # 同一 API 地址的所有会话共享调控器：按 429 与延迟自适应调整在途请求数
+            self._governor = get_governor(f'deepseek:{base_url}', initial_limit=self.concurrent_workers, max_limit=DEEPSEEK_MAX_IN_FLIGHT)
+            if not max_in_flight:
+                self.max_in_flight = DEEPSEEK_MAX_IN_FLIGHT
         else:
             raise ValueError('provider 仅支持 google 或 deepseek')
 
+    @classmethod
+    def from_config(cls, config: PipelineConfig, source_language: Optional[str] = None, memory: Optional[TranslationMemory] = None, **kwargs) -> 'SubtitleTranslator':
+        """按单次请求的配置构造；其余参数（分块大小、异步开关等）通过 kwargs 传入。"""
+        return cls(
+            target_language=config.target_lang,
+            provider=config.provider,
+            batch_size=config.batch_size,
+            max_retries=config.max_retries,
+            concurrent_workers=config.concurrent_workers,
+            memory=memory,
+            source_language=source_language,
+            config=config,
+            **kwargs
+        )
+
+    def _init_google(self, bulk: bool) -> None:
+        """初始化 Google 翻译所需的实例；DeepSeek 熔断时也用于逐行翻译的降级。"""
+        self._translator_google = GoogleTranslator(source='auto', target=self.target_language)
+        self._google_local = threading.local()
+        if bulk:
+            self._google_bulk = GoogleBulkTranslator(target=self.target_language)
+        self._google_governor = get_governor('google', initial_limit=self.concurrent_workers, max_limit=GOOGLE_MAX_IN_FLIGHT)
+
+    @property
+    def degraded(self) -> bool:
+        """是否有任何译文回退为原文或降级到其他提供方。"""
+        with self._fallbacks_lock:
+            return bool(self.fallbacks)
+
+    def _record_fallback(self, kind: str, count: int = 1) -> None:
+        if count <= 0:
+            return
+        with self._fallbacks_lock:
+            self.fallbacks[kind] = self.fallbacks.get(kind, 0) + count
+
     def translate_texts(self, texts: List[str]) -> List[str]:
-        """按批次翻译文本列表，支持并发与去重缓存。"""
+        """按批次翻译文本列表，支持并发、去重缓存与跨会话翻译记忆。"""
+        if self.passthrough:
+            return list(texts)
         # 去重缓存：相同文本只翻译一次
         unique_texts: List[str] = []
         index_map: Dict[int, int] = {}  # 原索引 -> unique 索引
@@ -75,134 +192,296 @@ class SubtitleTranslator:
                 text_to_unique_index[t] = uidx
                 index_map[idx] = uidx
 
-        # 将 unique_texts 分批
-        batches: List[Tuple[int, List[str]]] = []  # (起始 unique 索引, 批内容)
-        for i in range(0, len(unique_texts), self.batch_size):
-            batches.append((i, unique_texts[i:i + self.batch_size]))
+        # 翻译记忆：命中的文本不再发送给提供方
+        remembered = self._memory_lookup(LINE_PROMPT_VERSION, unique_texts)
+        pending = [t for t in unique_texts if t not in remembered]
 
-        # 并发处理各批
         if self.provider == 'google':
-            assert self._translator_google is not None
-            from concurrent.futures import ThreadPoolExecutor, as_completed
-
-            translated_unique: List[Optional[str]] = [None] * len(unique_texts)
-
-            def work(start_index: int, batch: List[str]) -> Tuple[int, List[str]]:
-                for attempt in range(self.max_retries + 1):
-                    try:
-                        out = self._translator_google.translate_batch(batch)
-                        if isinstance(out, str):
-                            out = [out]
-                        return start_index, out
-                    except Exception:
-                        if attempt >= self.max_retries:
-                            return start_index, batch
-                        time.sleep(self.retry_delay_seconds)
+            translated_pending, ok_mask = self._translate_with_google_concurrent(pending)
+            self._record_fallback('lines', ok_mask.count(False))
+        elif pending and not self._governor.breaker.available():
+            # DeepSeek 熔断中：直接改用 Google，降级译文不写入 DeepSeek 的翻译记忆
+            print(".. DeepSeek 暂时不可用（熔断中），本次逐行翻译改用 Google", flush=True)
+            if self._google_governor is None:
+                self._init_google(self._google_bulk_enabled)
+            translated_pending, ok_mask = self._translate_with_google_concurrent(pending)
+            self._record_fallback('lines', ok_mask.count(False))
+            self._record_fallback('provider', len(pending))
+            ok_mask = [False] * len(ok_mask)
+        else:
+            translated_pending, ok_mask = self._translate_with_deepseek_concurrent(pending)
+            self._record_fallback('lines', ok_mask.count(False))
+        self._memory_store(LINE_PROMPT_VERSION, {
+            src: dst for src, dst, ok in zip(pending, translated_pending, ok_mask) if ok
+        })
 
-            with ThreadPoolExecutor(max_workers=self.concurrent_workers) as ex:
-                futures = [ex.submit(work, s, b) for s, b in batches]
-                for fut in as_completed(futures):
-                    s, out = fut.result()
-                    for j, val in enumerate(out):
-                        translated_unique[s + j] = val
-
-            # 还原到原顺序
-            results: List[str] = []
-            for idx in range(len(texts)):
-                uidx = index_map[idx]
-                val = translated_unique[uidx]
-                results.append(val if val is not None else texts[idx])
-            return results
-
-        # DeepSeek 模式并发
-        return self._translate_with_deepseek_concurrent(unique_texts, index_map, texts)
-
-    def _translate_with_deepseek_concurrent(self, unique_texts: List[str], index_map: Dict[int, int], original_texts: List[str]) -> List[str]:
-        assert self._client_deepseek is not None
+        translated: Dict[str, str] = dict(remembered)
+        translated.update(zip(pending, translated_pending))
+
+        # 还原到原顺序
+        results: List[str] = []
+        for idx in range(len(texts)):
+            val = translated.get(unique_texts[index_map[idx]])
+            results.append(val if val is not None else texts[idx])
+        return results
+
+    def _memory_model(self) -> str:
+        """翻译记忆中区分模型的标识。"""
+        if self.provider == 'deepseek':
+            return self._deepseek_model
+        return 'google-translate'
+
+    def _memory_lookup(self, prompt_version: str, texts: List[str]) -> Dict[str, str]:
+        """查询翻译记忆，失败时视为全部未命中。"""
+        if self.memory is None or not texts:
+            return {}
+        try:
+            return self.memory.lookup_many(self.provider, self._memory_model(), self.target_language, prompt_version, texts)
+        except Exception:
+            return {}
+
+    def _memory_store(self, prompt_version: str, pairs: Dict[str, str]) -> None:
+        """写回翻译记忆，仅保存成功的译文。"""
+        if self.memory is None or not pairs:
+            return
+        try:
+            self.memory.store_many(self.provider, self._memory_model(), self.target_language, prompt_version, pairs)
+        except Exception:
+            pass
+
+    def _google_translator(self) -> GoogleTranslator:
+        """返回当前线程专用的 GoogleTranslator（其请求参数是实例状态，不能跨线程共享）。"""
+        translator = getattr(self._google_local, 'translator', None)
+        if translator is None:
+            translator = GoogleTranslator(source='auto', target=self.target_language)
+            self._google_local.translator = translator
+        return translator
+
+    def _translate_with_google_concurrent(self, unique_texts: List[str]) -> Tuple[List[str], List[bool]]:
+        """Google 模式并发翻译，返回 (译文列表, 是否成功标记)。"""
+        assert self._translator_google is not None and self._google_governor is not None
         from concurrent.futures import ThreadPoolExecutor, as_completed
+
         translated_unique: List[Optional[str]] = [None] * len(unique_texts)
+        ok_mask: List[bool] = [False] * len(unique_texts)
+        if not unique_texts:
+            return [], []
+
+        # 批量模式：按约 5000 字符把多行打包为一次请求；否则按 batch_size 分批逐行请求
+        batches: List[Tuple[int, List[str]]] = []  # (起始 unique 索引, 批内容)
+        if self._google_bulk is not None:
+            for idxs in pack_lines(unique_texts, self._google_bulk.max_chars):
+                batches.append((idxs[0], [unique_texts[i] for i in idxs]))
+        else:
+            for i in range(0, len(unique_texts), self.batch_size):
+                batches.append((i, unique_texts[i:i + self.batch_size]))
+
+        def work(start_index: int, batch: List[str]) -> Tuple[int, List[str], bool]:
+            if self._google_bulk is not None:
+                translate = lambda: self._google_bulk.translate_lines(batch)
+            else:
+                translate = lambda: self._google_translator().translate_batch(batch)
+            try:
+                out = self._google_governor.call(translate, self.max_retries, self.retry_delay_seconds, kind='lines')
+            except Exception:
+                return start_index, batch, False
+            if isinstance(out, str):
+                out = [out]
+            return start_index, out, True
+
+        with ThreadPoolExecutor(max_workers=self.concurrent_workers) as ex:
+            futures = [ex.submit(work, s, b) for s, b in batches]
+            for fut in as_completed(futures):
+                s, out, ok = fut.result()
+                for j, val in enumerate(out):
+                    translated_unique[s + j] = val
+                    ok_mask[s + j] = ok and val is not None
+
+        results = [val if val is not None else unique_texts[i] for i, val in enumerate(translated_unique)]
+        return results, ok_mask
+
+    def _line_messages(self, ids: List[int], texts: List[str]) -> List[Dict[str, str]]:
+        """构造逐行翻译请求的消息：每行带编号，要求按编号逐行输出译文。"""
         system_prompt = (
             "你是专业的字幕翻译助手。严格输出要求：\n"
             "1) 将每一行字幕翻译为 ${target}（中文），保持原意、术语与专有名词。\n"
-            "2) 不添加任何解释/标点修饰/序号；不合并或拆分行；不丢行。\n"
-            "3) 如果输入行为空或是仅含噪声标记，输出相应的空行或纯噪声去除后的结果。\n"
-            "4) 仅输出译文本身（逐行对应输入），不要代码块、不要前后缀。"
+            "2) 每行输入形如 [编号] 原文，输出必须为 [编号] 译文，编号与输入一一对应。\n"
+            "3) 不合并或拆分行；不丢行；每个编号只输出一次。\n"
+            "4) 如果输入行为空或是仅含噪声标记，输出 [编号] 加空内容或纯噪声去除后的结果。\n"
+            "5) 仅输出带编号的译文行，不要代码块、不要解释或前后缀。"
         ).replace('${target}', self.target_language)
+        content = (
+            "请将以下带编号的字幕逐行翻译为中文（目标语言：" + self.target_language + ")。"\
+            "每行保留原编号，只输出译文，不要任何额外文本。\n\n"\
+            "<INPUT>\n" + format_numbered(ids, texts) + "\n</INPUT>\n"
+        )
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": content},
+        ]
 
-        def work(start_index: int, batch: List[str]) -> Tuple[int, List[str]]:
-            content = (
-                "请将以下多行字幕逐行翻译为中文（目标语言：" + self.target_language + ")。"\
-                "严格保持行数一致与顺序对应，只输出译文，不要任何额外文本。\n\n"\
-                "<INPUT>\n" + "\n".join(batch) + "\n</INPUT>\n"
-            )
-            for attempt in range(self.max_retries + 1):
+    def _line_rounds(self, batch: List[str]) -> Generator[List[Dict[str, str]], Optional[str], Tuple[List[str], List[bool], int]]:
+        """
+        一个批次的编号行协议：每轮产出待发送的消息，接收回复文本（请求失败时为 None）；
+        解析出缺失/合并的编号后只重发这些行，最多修复 max_repair_rounds 轮。
+        结束时返回 (译文, 是否成功标记, 未对齐行数)；未对齐的行保留原文并标记失败（不写入翻译记忆）。
+        同步与异步路径只负责发送请求，见 _translate_batch / _translate_batch_async。
+        """
+        found: Dict[int, str] = {}
+        pending = list(range(1, len(batch) + 1))
+        rounds = 0
+        while pending and rounds <= self.max_repair_rounds:
+            if rounds:
+                with self._line_stats_lock:
+                    self.line_stats['repaired_lines'] += len(pending)
+            text = yield self._line_messages(pending, [batch[i - 1] for i in pending])
+            if text is None:
+                break
+            parsed, pending = parse_numbered(text, pending)
+            found.update(parsed)
+            rounds += 1
+        with self._line_stats_lock:
+            self.line_stats['repair_requests'] += max(0, rounds - 1)
+        lines = [found.get(i + 1, text) for i, text in enumerate(batch)]
+        oks = [(i + 1) in found for i in range(len(batch))]
+        return lines, oks, len(pending)
+
+    def _translate_batch(self, batch: List[str]) -> Tuple[List[str], List[bool], int]:
+        """同步发送一个批次（含修复轮次）。"""
+        rounds = self._line_rounds(batch)
+        try:
+            messages = next(rounds)
+            while True:
+                try:
+                    text: Optional[str] = self._deepseek_create(messages, timeout=60, kind='lines')
+                except Exception:
+                    text = None
+                messages = rounds.send(text)
+        except StopIteration as done:
+            return done.value
+
+    async def _translate_batch_async(self, batch: List[str]) -> Tuple[List[str], List[bool], int]:
+        """在共享事件循环中发送一个批次（含修复轮次）。"""
+        client = self._async_client_deepseek
+        rounds = self._line_rounds(batch)
+        try:
+            messages = next(rounds)
+            while True:
                 try:
-                    resp = self._client_deepseek.chat.completions.create(
-                        model=self._deepseek_model,
-                        temperature=self._deepseek_temperature,
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": content},
-                        ],
-                        timeout=60,
+                    resp = await self._governor.acall(
+                        lambda: client.chat.completions.create(
+                            model=self._deepseek_model,
+                            temperature=self._deepseek_temperature,
+                            messages=messages,
+                            timeout=60,
+                        ),
+                        self.max_retries, self.retry_delay_seconds, kind='lines',
                     )
-                    text = resp.choices[0].message.content.strip()
-                    if text.startswith("```"):
-                        parts = text.split("\n", 1)
-                        text = parts[1] if len(parts) > 1 else ''
-                        if text.endswith("```"):
-                            text = text.rsplit("\n", 1)[0]
-                    lines = [ln.strip() for ln in text.split("\n")]
-                    if len(lines) < len(batch):
-                        lines += batch[len(lines):]
-                    if len(lines) > len(batch):
-                        lines = lines[:len(batch)]
-                    return start_index, lines
+                    text: Optional[str] = resp.choices[0].message.content
                 except Exception:
-                    if attempt >= self.max_retries:
-                        return start_index, batch
-                    time.sleep(self.retry_delay_seconds)
-
-        # 构造并发任务
-        batches: List[Tuple[int, List[str]]] = []
-        for i in range(0, len(unique_texts), self.batch_size):
-            batches.append((i, unique_texts[i:i + self.batch_size]))
+                    text = None
+                messages = rounds.send(text)
+        except StopIteration as done:
+            return done.value
 
+    def _translate_with_deepseek_concurrent(self, unique_texts: List[str]) -> Tuple[List[str], List[bool]]:
+        """DeepSeek 模式并发逐行翻译，返回 (译文列表, 是否成功标记)。"""
+        assert self._client_deepseek is not None
         from concurrent.futures import ThreadPoolExecutor, as_completed
-        with ThreadPoolExecutor(max_workers=self.concurrent_workers) as ex:
-            futures = [ex.submit(work, s, b) for s, b in batches]
-            from time import time as _now
-            start_ts = _now()
-            for fut in as_completed(futures):
-                s, out = fut.result()
-                for j, val in enumerate(out):
-                    translated_unique[s + j] = val
-                # 简单进度日志
-                done = sum(1 for v in translated_unique if v is not None)
-                total = len(translated_unique)
-                print(f".. 翻译进度 {done}/{total} ({done*100//max(1,total)}%)", flush=True)
-
-        # 还原原顺序
-        results: List[str] = []
-        for idx in range(len(original_texts)):
-            uidx = index_map[idx]
-            val = translated_unique[uidx]
-            results.append(val if val is not None else original_texts[idx])
-        return results
+        translated_unique: List[Optional[str]] = [None] * len(unique_texts)
+        ok_mask: List[bool] = [False] * len(unique_texts)
+        if not unique_texts:
+            return [], []
+
+        # 按 token 预算打包批次：短行合并为更少的请求，长行不超出单次请求上限
+        packed = pack_batches(
+            unique_texts,
+            max_input_tokens=self.max_batch_input_tokens,
+            max_output_tokens=self.max_batch_output_tokens,
+            max_items=DEEPSEEK_MAX_LINES_PER_BATCH,
+        )
+        self.last_batch_stats = summarize_batches(packed, self.max_batch_input_tokens, self.max_batch_output_tokens)
+        print(
+            f".. 共 {self.last_batch_stats['batches']} 批，平均装填率 {self.last_batch_stats['avg_fill']:.0%}"
+            f"（最低 {self.last_batch_stats['min_fill']:.0%}）",
+            flush=True,
+        )
 
-    def translate_items(self, items: List[dict]) -> List[str]:
-        """翻译字幕条目列表，仅翻译 text 字段。"""
-        texts = [item.get('text', '') for item in items]
-        return self.translate_texts(texts)
+        unresolved = [0]  # 本次调用中多次修复后仍未对齐的行数
+
+        def collect(s: int, out: List[str], oks: List[bool], missing: int) -> None:
+            unresolved[0] += missing
+            for j, val in enumerate(out):
+                translated_unique[s + j] = val
+                ok_mask[s + j] = oks[j]
+            # 简单进度日志
+            done = sum(1 for v in translated_unique if v is not None)
+            total = len(translated_unique)
+            print(f".. 翻译进度 {done}/{total} ({done*100//max(1,total)}%)", flush=True)
+
+        if self._async_client_deepseek is not None:
+            # 异步引擎：所有批次在共享事件循环中并发，不为每个请求占用线程
+            run_sync(self._translate_batches_async(packed, collect))
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrent_workers) as ex:
+                futures = {ex.submit(self._translate_batch, b.texts): b for b in packed}
+                for fut in as_completed(futures):
+                    collect(futures[fut].start, *fut.result())
+
+        with self._line_stats_lock:
+            self.line_stats['unresolved_lines'] += unresolved[0]
+        if unresolved[0]:
+            print(f".. {unresolved[0]} 行多次修复后仍未对齐，已保留原文", flush=True)
+        results = [val if val is not None else unique_texts[i] for i, val in enumerate(translated_unique)]
+        return results, ok_mask
+
+    async def _translate_batches_async(self, packed: List[Batch], collect: Callable[[int, List[str], List[bool], int], None]) -> List[Tuple[List[str], List[bool], int]]:
+        """在共享事件循环中并发翻译各批次，在途请求数不超过 max_in_flight。"""
+        return await run_batches(
+            packed,
+            lambda batch: self._translate_batch_async(batch.texts),
+            self.max_in_flight,
+            on_done=lambda batch, r: collect(batch.start, *r),
+        )
 
-    def translate_full_and_split(self, full_text: str) -> List[str]:
+    def translate_items(self, items: Union[Transcript, List[dict]], by_sentence: bool = False) -> List[str]:
+        """
+        翻译字幕条目列表（或紧凑的 Transcript），仅翻译 text 字段，返回与 items 等长的译文列表。
+        by_sentence=True 时先按标点与时间间隔把片段合并为句子，整句翻译后再按原文长度比例切回各条字幕，
+        请求更少、上下文更完整，翻译记忆也以句子为单位命中；不属于任何句子的字幕逐条翻译。
+        """
+        if isinstance(items, Transcript):
+            texts = list(items.texts())
+        else:
+            texts = [item.get('text', '') for item in items]
+        if not by_sentence or self.passthrough:
+            return self.translate_texts(texts)
+        sentences = group_sentences(items)
+        print(f".. 字幕重组为句子：{len(items)} 条 -> {len(sentences)} 句", flush=True)
+        translations = self.translate_texts([s.text for s in sentences])
+        lines = map_to_cues(items, sentences, translations)
+        covered = [False] * len(texts)
+        for sent in sentences:
+            covered[sent.first:sent.last] = [True] * (sent.last - sent.first)
+        missing = [i for i, ok in enumerate(covered) if not ok]
+        if missing:
+            for i, line in zip(missing, self.translate_texts([texts[i] for i in missing])):
+                lines[i] = line
+        return lines
+
+    def translate_full_and_split(self, full_text: str, break_offsets: Optional[List[int]] = None) -> List[str]:
         """
         将整段英文字幕提交给提供方，请求生成按语义分段的中文段落列表。
         返回分段后的中文段落（每段一项，去除空段）。
         仅 provider=deepseek 实现此能力；google 模式下退化为逐句粗略分段。
+        超过 full_text_chunk_tokens 的长文本按句子/章节边界分块并发翻译，再按顺序拼接；
+        break_offsets 为优先断开的字符偏移（如章节起点，见 batching.chapter_break_offsets）。
         """
         if not full_text.strip():
             return []
+        if self.passthrough:
+            # 不翻译，但仍按句末与章节边界把逐行字幕合并为段落
+            return group_lines(full_text, break_offsets)
         if self.provider == 'google':
             # 粗略分段：按两个换行或句号分段，再调用批量翻译
             import re
@@ -210,6 +489,37 @@ class SubtitleTranslator:
             return self.translate_texts(rough)
 
         assert self._client_deepseek is not None
+        if estimate_tokens(full_text) <= self.full_text_chunk_tokens:
+            paras = self._translate_paragraph_chunk(full_text.strip())
+            if paras is None:
+                self._record_fallback('paragraphs')
+                return [full_text]
+            return paras
+
+        chunks = chunk_text(
+            full_text,
+            max_tokens=self.full_text_chunk_tokens,
+            overlap_tokens=self.full_text_overlap_tokens,
+            break_offsets=break_offsets,
+        )
+        print(f".. 长文本分为 {len(chunks)} 块并发翻译", flush=True)
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=self.concurrent_workers) as ex:
+            outputs = list(ex.map(lambda c: self._translate_paragraph_chunk(c.body, c.context), chunks))
+
+        # 按顺序拼接；失败的块保留原文，去掉块边界处因重叠产生的重复段落
+        paragraphs: List[str] = []
+        for chunk, paras in zip(chunks, outputs):
+            if paras is None:
+                self._record_fallback('paragraphs')
+                paras = [chunk.body]
+            if paragraphs:
+                paras = _drop_boundary_duplicates(paragraphs[-3:], paras)
+            paragraphs.extend(paras)
+        return paragraphs
+
+    def _translate_paragraph_chunk(self, body: str, context: str = '') -> Optional[List[str]]:
+        """翻译一段正文并按语义分段；context 为上文，仅供参考不翻译。失败返回 None。"""
         system_prompt = (
             "你是专业的中英翻译与编辑。请将用户提供的整段英文字幕翻译成中文，并按语义自动分段。\n"
             "要求：\n"
@@ -217,40 +527,33 @@ class SubtitleTranslator:
             "2) 不要保留原文，不要添加任何解释或编号，不要代码块标记。\n"
             "3) 尽量合并零散短句，保证上下文连贯、断句自然。\n"
         )
-        user_prompt = (
-            "以下是完整的英文字幕内容：\n<INPUT>\n" + full_text.strip() + "\n</INPUT>\n" \
-            "请直接输出中文段落，段落之间空一行。"
-        )
-        for attempt in range(self.max_retries + 1):
-            try:
-                resp = self._client_deepseek.chat.completions.create(
-                    model=self._deepseek_model,
-                    temperature=self._deepseek_temperature,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    timeout=120,
-                )
-                text = resp.choices[0].message.content.strip()
-                if text.startswith("```"):
-                    parts = text.split("\n", 1)
-                    text = parts[1] if len(parts) > 1 else ''
-                    if text.endswith("```"):
-                        text = text.rsplit("\n", 1)[0]
-                # 分段：以空行分隔
-                raw_paras = [p.strip() for p in text.split("\n\n")]
-                return [p for p in raw_paras if p]
-            except Exception:
-                if attempt >= self.max_retries:
-                    return [full_text]
-                time.sleep(self.retry_delay_seconds)
-
-    def generate_summary(self, full_text: str) -> str:
+        if context:
+            system_prompt += "4) <CONTEXT> 中是上文，仅用于理解语境，不要翻译或输出。\n"
+            user_prompt = (
+                "上文（仅供参考）：\n<CONTEXT>\n" + context + "\n</CONTEXT>\n\n"
+                "以下是需要翻译的英文字幕内容：\n<INPUT>\n" + body + "\n</INPUT>\n"
+                "请直接输出中文段落，段落之间空一行。"
+            )
+        else:
+            user_prompt = (
+                "以下是完整的英文字幕内容：\n<INPUT>\n" + body + "\n</INPUT>\n" \
+                "请直接输出中文段落，段落之间空一行。"
+            )
+        try:
+            text = self._deepseek_chat(system_prompt, user_prompt, timeout=120, kind='paragraphs')
+        except Exception:
+            return None
+        # 分段：以空行分隔
+        raw_paras = [p.strip() for p in text.split("\n\n")]
+        return [p for p in raw_paras if p]
+
+    def generate_summary(self, full_text: str, break_offsets: Optional[List[int]] = None) -> str:
         """
         基于完整原文生成归纳总结。
         返回中文总结文本。
         仅 provider=deepseek 支持此功能；google 模式返回简单提示。
+        超过 summary_section_tokens 的长文本采用分层总结：先按章节/token 预算切分并发总结各部分（结果缓存），
+        再一次性归纳为最终总结；调整最终提示词后重新总结只需重跑归纳这一步。
         """
         if not full_text.strip():
             return "暂无内容可供总结"
@@ -260,6 +563,9 @@ class SubtitleTranslator:
             return "总结功能需要使用 DeepSeek 作为翻译提供方。当前使用的是 Google 翻译。"
         
         assert self._client_deepseek is not None
+        if estimate_tokens(full_text) > self.summary_section_tokens:
+            return self._generate_summary_hierarchical(full_text, break_offsets)
+        
         system_prompt = (
             "你是专业的内容分析与总结助手。请基于用户提供的完整英文字幕内容，生成一个结构化的中文总结。\n"
             "要求：\n"
@@ -275,67 +581,148 @@ class SubtitleTranslator:
             "请直接输出中文总结，使用段落和标题组织内容。"
         )
         
-        for attempt in range(self.max_retries + 1):
+        try:
+            return self._deepseek_chat(system_prompt, user_prompt, timeout=120, kind='summary')
+        except Exception as e:
+            self._record_fallback('summary')
+            return f"生成总结失败：{str(e)}"
+
+    def _generate_summary_hierarchical(self, full_text: str, break_offsets: Optional[List[int]]) -> str:
+        """分层总结：并发总结各部分（map），再归纳为最终总结（reduce）。"""
+        sections = chunk_text(full_text, max_tokens=self.summary_section_tokens, overlap_tokens=0, break_offsets=break_offsets)
+        bodies = [c.body for c in sections]
+        print(f".. 长文本分为 {len(sections)} 部分并发总结", flush=True)
+
+        # 各部分总结先查缓存，只请求未命中的部分
+        section_summaries: Dict[str, str] = self._memory_lookup(SUMMARY_SECTION_PROMPT_VERSION, bodies)
+        for body in bodies:
+            if body not in section_summaries and body in self._section_summary_cache:
+                section_summaries[body] = self._section_summary_cache[body]
+        pending = [b for b in dict.fromkeys(bodies) if b not in section_summaries]
+
+        def summarize_section(body: str) -> Tuple[str, Optional[str]]:
             try:
-                resp = self._client_deepseek.chat.completions.create(
-                    model=self._deepseek_model,
-                    temperature=self._deepseek_temperature,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    timeout=120,
-                )
-                summary = resp.choices[0].message.content.strip()
-                # 移除可能的代码块标记
-                if summary.startswith("```"):
-                    parts = summary.split("\n", 1)
-                    summary = parts[1] if len(parts) > 1 else ''
-                    if summary.endswith("```"):
-                        summary = summary.rsplit("\n", 1)[0]
-                return summary.strip()
-            except Exception as e:
-                if attempt >= self.max_retries:
-                    return f"生成总结失败：{str(e)}"
-                time.sleep(self.retry_delay_seconds)
-        
-        return "生成总结失败：超过最大重试次数"
+                return body, self._summarize_section(body)
+            except Exception:
+                return body, None
+
+        if pending:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=self.concurrent_workers) as ex:
+                fresh = {body: out for body, out in ex.map(summarize_section, pending) if out}
+            self._section_summary_cache.update(fresh)
+            self._memory_store(SUMMARY_SECTION_PROMPT_VERSION, fresh)
+            section_summaries.update(fresh)
+
+        parts = [section_summaries[b] for b in bodies if b in section_summaries]
+        # 部分总结失败时最终总结缺少这些部分
+        self._record_fallback('summary_sections', len(bodies) - len(parts))
+        if not parts:
+            return "生成总结失败：各部分总结均未成功"
+
+        system_prompt = (
+            "你是专业的内容分析与总结助手。用户会按顺序提供一个长视频各部分的要点摘要，请据此生成一个结构化的中文总结。\n"
+            "要求：\n"
+            "1) 总结应包含：核心主题、关键要点、主要论点/观点\n"
+            "2) 使用清晰的段落结构，用小标题或序号组织内容\n"
+            "3) 保持客观准确，不添加个人观点\n"
+            "4) 长度控制在 300-500 字左右\n"
+            "5) 使用通俗易懂的语言，避免过度技术化"
+        )
+        user_prompt = (
+            "以下是视频各部分的要点摘要（按时间顺序）：\n\n"
+            + "\n\n".join(f"<PART {i + 1}>\n{p}\n</PART {i + 1}>" for i, p in enumerate(parts))
+            + "\n\n请直接输出中文总结，使用段落和标题组织内容。"
+        )
+        try:
+            return self._deepseek_chat(system_prompt, user_prompt, timeout=120, kind='summary')
+        except Exception as e:
+            self._record_fallback('summary')
+            return f"生成总结失败：{str(e)}"
+
+    def _summarize_section(self, body: str) -> str:
+        """总结长视频的一个部分，输出要点列表。"""
+        system_prompt = (
+            "你是专业的内容分析助手。用户提供的是一个长视频字幕中的一部分，请用中文提炼这一部分的要点。\n"
+            "要求：\n"
+            "1) 以要点列表输出，保留关键事实、数据、人名与论点\n"
+            "2) 保持客观准确，不添加个人观点\n"
+            "3) 长度控制在 150-300 字左右"
+        )
+        user_prompt = "<INPUT>\n" + body + "\n</INPUT>\n\n请直接输出要点列表。"
+        return self._deepseek_chat(system_prompt, user_prompt, timeout=120, kind='summary')
+
+    def _deepseek_create(self, messages: List[Dict[str, str]], timeout: float, temperature: Optional[float] = None, kind: str = 'default') -> str:
+        """
+        经调控器发送一次 DeepSeek 对话请求（含按错误类型的重试与限流），返回原始回复文本。
+        kind 为请求类型，调控器按类型分别统计延迟。
+        """
+        assert self._client_deepseek is not None
+        resp = self._governor.call(
+            lambda: self._client_deepseek.chat.completions.create(
+                model=self._deepseek_model,
+                temperature=self._deepseek_temperature if temperature is None else temperature,
+                messages=messages,
+                timeout=timeout,
+            ),
+            self.max_retries, self.retry_delay_seconds, kind=kind,
+        )
+        return resp.choices[0].message.content
+
+    def _deepseek_chat(self, system_prompt: str, user_prompt: str, timeout: float, temperature: Optional[float] = None, kind: str = 'default') -> str:
+        """发送一次 DeepSeek 对话请求，返回去除代码块标记后的文本；最终失败时抛出最后一次异常。"""
+        text = self._deepseek_create(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            timeout=timeout,
+            temperature=temperature,
+            kind=kind,
+        ).strip()
+        # 移除可能的代码块标记
+        if text.startswith("```"):
+            parts = text.split("\n", 1)
+            text = parts[1] if len(parts) > 1 else ''
+            if text.endswith("```"):
+                text = text.rsplit("\n", 1)[0]
+        return text.strip()
 
     def translate_title(self, title: str) -> str:
         """
         翻译视频标题。
         返回中文翻译。
         """
-        if not title.strip():
+        if not title.strip() or self.passthrough:
             return ""
         
+        remembered = self._memory_lookup(TITLE_PROMPT_VERSION, [title])
+        if title in remembered:
+            return remembered[title]
+        
         if self.provider == 'google':
             try:
-                return self._translator_google.translate(title)
+                translated = self._governor.call(
+                    lambda: self._google_translator().translate(title),
+                    self.max_retries, self.retry_delay_seconds, kind='title',
+                )
+                self._memory_store(TITLE_PROMPT_VERSION, {title: translated})
+                return translated
             except Exception:
+                self._record_fallback('title')
                 return title
         
         assert self._client_deepseek is not None
         system_prompt = "你是专业的翻译助手。请将用户提供的英文标题翻译成中文，保持简洁准确。只输出翻译结果，不要任何解释。"
         user_prompt = f"请将以下标题翻译成中文：\n{title}"
         
-        for attempt in range(self.max_retries + 1):
-            try:
-                resp = self._client_deepseek.chat.completions.create(
-                    model=self._deepseek_model,
-                    temperature=0.1,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    timeout=30,
-                )
-                return resp.choices[0].message.content.strip()
-            except Exception:
-                if attempt >= self.max_retries:
-                    return title
-                time.sleep(self.retry_delay_seconds)
-        return title
+        try:
+            translated = self._deepseek_chat(system_prompt, user_prompt, timeout=30, temperature=0.1, kind='title')
+        except Exception:
+            self._record_fallback('title')
+            return title
+        self._memory_store(TITLE_PROMPT_VERSION, {title: translated})
+        return translated
 
     def translate_chapters(self, chapters: List[Dict]) -> List[Dict]:
         """
@@ -347,7 +734,7 @@ class SubtitleTranslator:
         
         # 提取所有章节标题
         titles = [ch.get('title', '') for ch in chapters]
-        if not titles:
+        if not titles or self.passthrough:
             return chapters
         
         if self.provider == 'google':
@@ -357,10 +744,19 @@ class SubtitleTranslator:
                     ch['title_cn'] = translated_titles[i] if i < len(translated_titles) else ch.get('title', '')
                 return chapters
             except Exception:
+                self._record_fallback('chapters', len(chapters))
                 for ch in chapters:
                     ch['title_cn'] = ch.get('title', '')
                 return chapters
         
+        # 翻译记忆命中的章节标题不再请求
+        remembered = self._memory_lookup(CHAPTER_PROMPT_VERSION, titles)
+        pending = list(dict.fromkeys(t for t in titles if t not in remembered))
+        if not pending:
+            for ch in chapters:
+                ch['title_cn'] = remembered.get(ch.get('title', ''), ch.get('title', ''))
+            return chapters
+        
         assert self._client_deepseek is not None
         system_prompt = (
             "你是专业的翻译助手。请将用户提供的英文章节标题逐行翻译成中文。\n"
@@ -370,40 +766,24 @@ class SubtitleTranslator:
             "3) 不要添加序号、解释或其他内容\n"
             "4) 严格保持行数一致"
         )
-        user_prompt = "请将以下章节标题逐行翻译成中文：\n\n" + "\n".join(titles)
+        user_prompt = "请将以下章节标题逐行翻译成中文：\n\n" + "\n".join(pending)
         
-        for attempt in range(self.max_retries + 1):
-            try:
-                resp = self._client_deepseek.chat.completions.create(
-                    model=self._deepseek_model,
-                    temperature=0.1,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    timeout=60,
-                )
-                text = resp.choices[0].message.content.strip()
-                translated_lines = [line.strip() for line in text.split('\n') if line.strip()]
-                
-                # 匹配翻译结果到章节
-                for i, ch in enumerate(chapters):
-                    if i < len(translated_lines):
-                        ch['title_cn'] = translated_lines[i]
-                    else:
-                        ch['title_cn'] = ch.get('title', '')
-                return chapters
-            except Exception:
-                if attempt >= self.max_retries:
-                    for ch in chapters:
-                        ch['title_cn'] = ch.get('title', '')
-                    return chapters
-                time.sleep(self.retry_delay_seconds)
+        try:
+            text = self._deepseek_chat(system_prompt, user_prompt, timeout=60, temperature=0.1, kind='chapters')
+        except Exception:
+            self._record_fallback('chapters', len(pending))
+            for ch in chapters:
+                ch['title_cn'] = remembered.get(ch.get('title', ''), ch.get('title', ''))
+            return chapters
+        translated_lines = [line.strip() for line in text.split('\n') if line.strip()]
         
+        # 匹配翻译结果到章节；行数一致时才写入翻译记忆
+        fresh = dict(zip(pending, translated_lines))
+        if len(translated_lines) == len(pending):
+            self._memory_store(CHAPTER_PROMPT_VERSION, fresh)
+        else:
+            self._record_fallback('chapters', max(0, len(pending) - len(translated_lines)))
+        fresh.update(remembered)
         for ch in chapters:
-            ch['title_cn'] = ch.get('title', '')
+            ch['title_cn'] = fresh.get(ch.get('title', ''), ch.get('title', ''))
         return chapters
-
-
-
-